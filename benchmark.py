@@ -0,0 +1,607 @@
+"""Benchmark da sincronização, das buscas e da montagem da grade
+
+Roda sem rede: os dados são gerados localmente em um arquivo SQLite que faz
+o papel do SQL Server (FonteSqlite). Os resultados são gravados em JSON para
+comparar execuções entre commits.
+
+Uso:
+    python benchmark.py                         # 100 mil registros
+    python benchmark.py --tamanhos 100k 1m 5m
+    python benchmark.py --saida resultados.json --diretorio C:\\temp\\bench
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import consulta_dados
+import indice_memoria
+from criar_banco import criar_indices, criar_tabelas, reconstruir_indices_busca
+from esquema_compacto import COLUNAS_CONTRATO
+from fontes_dados import FonteRedeSimulada, FonteSqlite
+from sincronizar_dados import SQL_TABLE, LeitorEmSegundoPlano, criar_leitor, inserir_dados_sqlite
+
+TAMANHOS = {'100k': 100_000, '1m': 1_000_000, '5m': 5_000_000}
+
+# Modos de busca medidos (os mesmos do dropdown do app)
+MODOS_BUSCA = ['contrato', 'cnpj', 'raiz', 'razao_social', 'consultor', 'email', 'contem', 'todos']
+
+# Buscas medidas por modo (além do aquecimento)
+BUSCAS_POR_MODO = 200
+BUSCAS_AQUECIMENTO = 10
+
+# Quantidades de linhas usadas na medição da montagem da grade
+LINHAS_GRADE = [100, 1000, 10000]
+
+# Extração com a latência de rede simulada: demora por lote de 5000 linhas (segundos) e as
+# configurações comparadas (partições, conexões); (0, 1) é a leitura única
+ATRASO_LOTE = 0.5
+CONFIGURACOES_EXTRACAO = [(0, 1), (8, 4), (16, 8)]
+
+SEMENTE = 42
+
+NOMES = ['JOSE', 'MARIA', 'ANA', 'JOAO', 'ANTONIO', 'FRANCISCO', 'CARLOS', 'PAULO', 'PEDRO', 'LUCAS',
+         'LUIZ', 'MARCOS', 'LUIS', 'GABRIEL', 'RAFAEL', 'DANIEL', 'MARCELO', 'BRUNO', 'EDUARDO', 'FELIPE',
+         'JULIANA', 'FERNANDA', 'PATRICIA', 'ALINE', 'SANDRA', 'CAMILA', 'AMANDA', 'BRUNA', 'JESSICA', 'LETICIA',
+         'CONCEIÇÃO', 'MÁRCIO', 'SÉRGIO', 'FÁBIO', 'VITÓRIA', 'JOSÉ', 'ANDRÉ', 'CÉLIA', 'LÚCIA', 'INÊS']
+SOBRENOMES = ['SILVA', 'SANTOS', 'OLIVEIRA', 'SOUZA', 'RODRIGUES', 'FERREIRA', 'ALVES', 'PEREIRA', 'LIMA',
+              'GOMES', 'COSTA', 'RIBEIRO', 'MARTINS', 'CARVALHO', 'ALMEIDA', 'LOPES', 'SOARES', 'FERNANDES',
+              'VIEIRA', 'BARBOSA', 'ROCHA', 'DIAS', 'NASCIMENTO', 'ANDRADE', 'MOREIRA', 'NUNES', 'MARQUES',
+              'MACHADO', 'MENDES', 'FREITAS', 'CARDOSO', 'RAMOS', 'GONÇALVES', 'SANTANA', 'TEIXEIRA', 'ARAÚJO']
+ATIVIDADES = ['COMERCIO', 'INDUSTRIA', 'SERVIÇOS', 'ALIMENTOS', 'TRANSPORTES', 'CONSTRUÇÕES', 'LOGISTICA',
+              'TECNOLOGIA', 'DISTRIBUIDORA', 'MATERIAIS', 'ENGENHARIA', 'CONSULTORIA', 'AGROPECUARIA',
+              'METALURGICA', 'CONFECÇÕES', 'FARMACIA', 'SUPERMERCADO', 'AUTO PEÇAS', 'HOSPITAL', 'EDUCAÇÃO']
+SUFIXOS = ['LTDA', 'LTDA', 'LTDA', 'S.A.', 'EIRELI', 'ME', 'EPP']
+MUNICIPIOS = [('SAO PAULO', 'SP'), ('CAMPINAS', 'SP'), ('SANTOS', 'SP'), ('RIO DE JANEIRO', 'RJ'),
+              ('NITEROI', 'RJ'), ('BELO HORIZONTE', 'MG'), ('UBERLANDIA', 'MG'), ('CURITIBA', 'PR'),
+              ('LONDRINA', 'PR'), ('PORTO ALEGRE', 'RS'), ('FLORIANOPOLIS', 'SC'), ('JOINVILLE', 'SC'),
+              ('SALVADOR', 'BA'), ('RECIFE', 'PE'), ('FORTALEZA', 'CE'), ('BRASILIA', 'DF'),
+              ('GOIANIA', 'GO'), ('MANAUS', 'AM'), ('BELEM', 'PA'), ('VITORIA', 'ES')]
+PRODUTOS = ['REFEIÇÃO', 'ALIMENTAÇÃO', 'MULTIBENEFICIOS', 'COMBUSTIVEL', 'PREMIAÇÃO', 'AUXILIO']
+CNAES = [('5611201', 'RESTAURANTES E SIMILARES'), ('4711302', 'COMERCIO VAREJISTA - SUPERMERCADOS'),
+         ('4930202', 'TRANSPORTE RODOVIARIO DE CARGA'), ('6201501', 'DESENVOLVIMENTO DE PROGRAMAS'),
+         ('4120400', 'CONSTRUÇÃO DE EDIFICIOS'), ('8610101', 'ATIVIDADES DE ATENDIMENTO HOSPITALAR'),
+         ('8513900', 'ENSINO FUNDAMENTAL'), ('2511000', 'FABRICAÇÃO DE ESTRUTURAS METALICAS')]
+SETORES = [('01', 'COMERCIO', '011', 'VAREJO'), ('02', 'INDUSTRIA', '021', 'TRANSFORMAÇÃO'),
+           ('03', 'SERVIÇOS', '031', 'SAUDE'), ('03', 'SERVIÇOS', '032', 'EDUCAÇÃO'),
+           ('04', 'AGRONEGOCIO', '041', 'AGRICULTURA'), ('05', 'SETOR PUBLICO', '051', 'MUNICIPAL')]
+SEGMENTOS = ['MICRO', 'PEQUENA', 'MEDIA', 'GRANDE', 'CORPORATE', 'GOVERNO']
+
+
+def digitos_verificadores_cnpj(base):
+    """Calcula os dois dígitos verificadores de um CNPJ a partir dos 12 primeiros dígitos"""
+    numeros = [int(d) for d in base]
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = sum(n * p for n, p in zip(numeros, pesos)) % 11
+        numeros.append(0 if resto < 2 else 11 - resto)
+    return ''.join(str(n) for n in numeros[12:])
+
+
+def formatar_cnpj(digitos):
+    return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+
+
+def colunas_origem():
+    """As 52 colunas da tabela, na ordem de criar_banco.py (sem as chaves numéricas)"""
+    return list(COLUNAS_CONTRATO)
+
+
+def _data(dia):
+    return dia.strftime('%d/%m/%Y')
+
+
+class GeradorDados:
+    """Gera linhas plausíveis de tb_base_contrato_consultor
+
+    Cada empresa (raiz) pode ter várias filiais e contratos; poucos
+    consultores concentram a maior parte da carteira (distribuição de Zipf),
+    como na base real.
+    """
+
+    def __init__(self, total, semente=SEMENTE):
+        self.total = total
+        self.aleatorio = random.Random(semente)
+        self.colunas = colunas_origem()
+        aleatorio = self.aleatorio
+
+        # Hierarquia comercial: diretor > superintendente > gerente nacional > gerente regional > consultor
+        self.consultores = []
+        quantidade_consultores = max(50, min(2000, total // 1000))
+        for indice in range(quantidade_consultores):
+            nome = f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+            regional = indice // 8
+            self.consultores.append({
+                'consultor': nome,
+                'matricula': f"{100000 + indice}",
+                'email': f"{nome.split()[0].lower()}.{nome.split()[-1].lower()}{indice}@alelo.com.br",
+                'carteira': f"CARTEIRA {indice:04d}",
+                'gerente_regional': f"GERENTE REGIONAL {regional:03d}",
+                'gerente_nacional': f"GERENTE NACIONAL {regional // 6:02d}",
+                'superintendente': f"SUPERINTENDENTE {regional // 24:02d}",
+                'diretor': f"DIRETOR {regional // 96:02d}",
+                'consultor_hunter_auto': aleatorio.choice(['HUNTER', 'AUTO']),
+            })
+        pesos = [1 / (posicao + 1) ** 1.1 for posicao in range(quantidade_consultores)]
+        self.pesos_consultores = list(_acumular(pesos))
+
+        self.quantidade_empresas = max(1, total // 3)
+
+    def _empresa(self, indice):
+        # Cada empresa tem dados fixos derivados do seu índice (mesma raiz, mesmo nome)
+        aleatorio = random.Random(indice * 7919 + SEMENTE)
+        raiz = f"{aleatorio.randrange(10 ** 8):08d}"
+        nome = (f"{aleatorio.choice(SOBRENOMES)} {aleatorio.choice(ATIVIDADES)} "
+                f"{aleatorio.choice(SUFIXOS)}")
+        return raiz, nome, aleatorio.choice(MUNICIPIOS), aleatorio.choice(CNAES), aleatorio.choice(SETORES)
+
+    def linhas(self):
+        aleatorio = self.aleatorio
+        hoje = date.today()
+        for indice in range(self.total):
+            # Empresas grandes concentram contratos: sorteio enviesado para os menores índices
+            empresa = int(self.quantidade_empresas * aleatorio.random() ** 2)
+            raiz, razao_social, (municipio, estado), (cod_cnae, des_cnae), setor = self._empresa(empresa)
+            filial = 1 + int(aleatorio.expovariate(1.5))
+            base = f"{raiz}{filial:04d}"
+            cnpj = formatar_cnpj(base + digitos_verificadores_cnpj(base))
+            consultor = aleatorio.choices(self.consultores, cum_weights=self.pesos_consultores)[0]
+            safra = hoje - timedelta(days=aleatorio.randrange(3650))
+            primeiro_faturamento = safra + timedelta(days=aleatorio.randrange(60))
+            ultimo_faturamento = primeiro_faturamento + timedelta(days=aleatorio.randrange(max(1, (hoje - primeiro_faturamento).days)))
+            segmento = aleatorio.choice(SEGMENTOS)
+            valores = {
+                'data_atualizacao': _data(hoje),
+                'contrato': f"{10_000_000 + indice}",
+                'tipo_mercado': aleatorio.choice(['PRIVADO', 'PRIVADO', 'PRIVADO', 'PUBLICO']),
+                'tipo_venda': aleatorio.choice(['NOVA', 'RENOVAÇÃO', 'UPGRADE']),
+                'produto': aleatorio.choice(PRODUTOS),
+                'safra': safra.strftime('%Y%m'),
+                'dt_safra': _data(safra.replace(day=1)),
+                'razao_social': razao_social,
+                'cnpj': cnpj,
+                'raiz': raiz,
+                'municipio': municipio,
+                'estado': estado,
+                'grupo_vendedor': f"GRUPO {aleatorio.randrange(30):02d}",
+                'agencia': f"{aleatorio.randrange(10000):04d}",
+                'cod_cnae': cod_cnae,
+                'des_cnae': des_cnae,
+                'cod_setor': setor[0],
+                'des_setor': setor[1],
+                'cod_sub_setor': setor[2],
+                'des_sub_setor': setor[3],
+                'canal_entrada': aleatorio.choice(['CONSULTOR', 'PARCEIRO', 'BANCO', 'DIGITAL']),
+                'vendedor_pf': f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}",
+                'dt_prim_fat': _data(primeiro_faturamento),
+                'dt_ult_fat': _data(ultimo_faturamento),
+                'forma_pgto': aleatorio.choice(['BOLETO', 'DEBITO EM CONTA', 'PIX']),
+                'dias_prazo_pagto': aleatorio.choice(['0', '15', '30', '45']),
+                'grupo_rel': f"GRUPO REL {empresa % 500:03d}",
+                'agencia_grupo_rel': f"{aleatorio.randrange(10000):04d}",
+                'cod_cnae_grupo_rel': cod_cnae,
+                'des_cnae_grupo_rel': des_cnae,
+                'cod_setor_grupo_rel': setor[0],
+                'des_setor_grupo_rel': setor[1],
+                'cod_sub_setor_grupo_rel': setor[2],
+                'des_sub_setor_grupo_rel': setor[3],
+                'segmento_comercial': segmento,
+                'segmento_analitycs': aleatorio.choice(SEGMENTOS),
+                'segmento_bradesco': aleatorio.choice(['VAREJO', 'PRIME', 'EMPRESAS', None]),
+                'segmento_bb': aleatorio.choice(['PJ', 'ESTILO', 'CORPORATE', None]),
+                'contato': f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)}",
+                'id_grupo_rel': f"{empresa % 500}",
+                'segmento_grupo_rel': segmento,
+                'cancelamento_de_contrato_renegociacao_de_tarifas': aleatorio.choice(['SIM', 'NAO', None, None]),
+                'interesse_em_novos_produtos_prospects': aleatorio.choice(['SIM', 'NAO', None, None]),
+                **consultor,
+            }
+            yield tuple(valores.get(coluna) for coluna in self.colunas)
+
+    def gravar(self, caminho, tamanho_lote=10000):
+        """Grava as linhas em um arquivo SQLite usado como origem da sincronização"""
+        conn = sqlite3.connect(caminho)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(f"CREATE TABLE {SQL_TABLE} ({', '.join(f'{coluna} TEXT' for coluna in self.colunas)})")
+        sql = f"INSERT INTO {SQL_TABLE} VALUES ({','.join('?' for _ in self.colunas)})"
+        lote = []
+        for linha in self.linhas():
+            lote.append(linha)
+            if len(lote) >= tamanho_lote:
+                conn.executemany(sql, lote)
+                lote = []
+        conn.executemany(sql, lote)
+        conn.commit()
+        conn.close()
+
+
+def _acumular(valores):
+    total = 0
+    for valor in valores:
+        total += valor
+        yield total
+
+
+def percentis(amostras):
+    """p50/p95/p99, média e máximo em milissegundos"""
+    ordenadas = sorted(amostras)
+    cortes = statistics.quantiles(ordenadas, n=100, method='inclusive')
+    return {
+        'amostras': len(ordenadas),
+        'p50_ms': round(cortes[49] * 1000, 3),
+        'p95_ms': round(cortes[94] * 1000, 3),
+        'p99_ms': round(cortes[98] * 1000, 3),
+        'media_ms': round(statistics.fmean(ordenadas) * 1000, 3),
+        'max_ms': round(ordenadas[-1] * 1000, 3),
+    }
+
+
+def medir_insercao(caminho_fonte, caminho_destino, compacto=True):
+    """Carrega a fonte em um banco novo, como a construção do snapshot
+
+    Mede separadamente a inserção (inserir_dados_sqlite) e a criação dos
+    índices. Com compacto=False o banco usa o layout antigo (tudo como texto).
+    """
+    fonte = FonteSqlite(caminho_fonte, SQL_TABLE)
+    conn = sqlite3.connect(caminho_destino)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-200000")
+        cursor = conn.cursor()
+        criar_tabelas(cursor, compacto)
+
+        inicio = time.perf_counter()
+        leitor = LeitorEmSegundoPlano(fonte)
+        total = inserir_dados_sqlite(conn, fonte.colunas(), leitor, leitor, commit_por_lote=False)
+        conn.commit()
+        segundos_insercao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        criar_indices(cursor)
+        reconstruir_indices_busca(conn)
+        conn.commit()
+        cursor.execute("ANALYZE")
+        segundos_indices = time.perf_counter() - inicio
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+        fonte.fechar()
+
+    return {
+        'registros': total,
+        'insercao_s': round(segundos_insercao, 3),
+        'registros_por_s': round(total / segundos_insercao) if total and segundos_insercao else None,
+        'indices_s': round(segundos_indices, 3),
+        'tamanho_arquivo_bytes': os.path.getsize(caminho_destino),
+    }
+
+
+def medir_extracao(caminho_fonte, diretorio, atraso_lote=ATRASO_LOTE):
+    """Leitura única contra leitura por partições em paralelo, com latência simulada na origem
+
+    Cada configuração carrega a fonte inteira em um banco novo; a quantidade
+    gravada tem que ser igual à da origem.
+    """
+    resultados = {}
+    caminho_destino = os.path.join(diretorio, 'extracao.db')
+    for particoes, conexoes in CONFIGURACOES_EXTRACAO:
+        fonte = FonteRedeSimulada(FonteSqlite(caminho_fonte, SQL_TABLE), atraso_lote=atraso_lote)
+        if os.path.exists(caminho_destino):
+            os.remove(caminho_destino)
+        conn = sqlite3.connect(caminho_destino)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            criar_tabelas(conn.cursor())
+            esperados = fonte.contar()
+
+            inicio = time.perf_counter()
+            leitor = criar_leitor(fonte, particoes=particoes, conexoes=conexoes)
+            total = inserir_dados_sqlite(conn, fonte.colunas(), leitor, leitor, commit_por_lote=False)
+            conn.commit()
+            segundos = time.perf_counter() - inicio
+        finally:
+            conn.close()
+            fonte.fechar()
+        resultados[f'{particoes}x{conexoes}'] = {
+            'particoes': particoes,
+            'conexoes': conexoes,
+            'segundos': round(segundos, 3),
+            'registros_por_s': round(total / segundos) if total and segundos else None,
+            'contagem_confere': total == esperados,
+        }
+    os.remove(caminho_destino)
+    return resultados
+
+
+def filtros_de_teste(conn, modo, quantidade, aleatorio):
+    """Filtros plausíveis para o modo: inícios de valores reais, com e sem pontuação"""
+    total = conn.execute(f"SELECT MAX(ROWID) FROM {SQL_TABLE}").fetchone()[0] or 0
+    filtros = []
+    while len(filtros) < quantidade and total:
+        linha = conn.execute(
+            f"SELECT contrato, cnpj, raiz, razao_social, consultor, email FROM {SQL_TABLE} WHERE ROWID = ?",
+            (aleatorio.randint(1, total),),
+        ).fetchone()
+        if linha is None:
+            continue
+        contrato, cnpj, raiz, razao_social, consultor, email = linha
+        if modo == 'contem':
+            palavra = aleatorio.choice(razao_social.split())
+            filtros.append(palavra[1:5] if len(palavra) >= 5 else palavra)
+            continue
+        valor = {
+            'contrato': contrato,
+            'cnpj': aleatorio.choice([cnpj, ''.join(c for c in cnpj if c.isdigit())]),
+            'raiz': raiz,
+            'razao_social': razao_social,
+            'consultor': consultor,
+            'email': email,
+            'todos': aleatorio.choice([contrato, cnpj, razao_social, consultor, email]),
+        }[modo] or ''
+        filtros.append(valor[:aleatorio.randint(3, max(3, min(len(valor), 10)))])
+    return filtros
+
+
+def medir_buscas(caminho_banco, buscas_por_modo=BUSCAS_POR_MODO, semente=SEMENTE):
+    """Latência da primeira página de buscar_dados em cada modo, e no índice em memória"""
+    conn = sqlite3.connect(f'{Path(caminho_banco).absolute().as_uri()}?mode=ro&immutable=1', uri=True)
+    conn.execute("PRAGMA mmap_size=1073741824")
+    aleatorio = random.Random(semente)
+    resultados = {'sql': {}, 'indice_memoria': {}}
+
+    indice = None
+    if indice_memoria.disponivel():
+        inicio = time.perf_counter()
+        indice = indice_memoria.IndiceMemoria.construir(conn, 'benchmark')
+        resultados['indice_memoria_construcao'] = {
+            'segundos': round(time.perf_counter() - inicio, 3),
+            'bytes': indice.bytes_usados(),
+        }
+
+    for modo in MODOS_BUSCA:
+        filtros = filtros_de_teste(conn, modo, buscas_por_modo + BUSCAS_AQUECIMENTO, aleatorio)
+        tempos, linhas = [], 0
+        for posicao, filtro in enumerate(filtros):
+            inicio = time.perf_counter()
+            dados = consulta_dados.buscar_dados(conn, filtro, modo)
+            if posicao >= BUSCAS_AQUECIMENTO:
+                tempos.append(time.perf_counter() - inicio)
+                linhas += len(dados)
+        resultados['sql'][modo] = {**percentis(tempos), 'linhas_media': round(linhas / len(tempos), 1)}
+
+        if indice is None or modo == 'contem':
+            continue
+        tempos = []
+        for posicao, filtro in enumerate(filtros):
+            inicio = time.perf_counter()
+            resultado = indice.buscar_pagina(conn, filtro, modo)
+            if resultado is not None and posicao >= BUSCAS_AQUECIMENTO:
+                tempos.append(time.perf_counter() - inicio)
+        if len(tempos) >= 2:
+            resultados['indice_memoria'][modo] = percentis(tempos)
+
+    conn.close()
+    return resultados
+
+
+def bytes_lidos_processo():
+    """Total de bytes lidos pelo processo até agora (None se o sistema não informar)"""
+    try:
+        with open('/proc/self/io') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('rchar:'):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().io_counters().read_bytes
+
+
+def tamanho_tabelas(conn):
+    """Bytes ocupados por tabela e índice no arquivo (vazio se o SQLite não tiver dbstat)"""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY name"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def medir_leitura(caminho_banco, buscas_por_modo=BUSCAS_POR_MODO, semente=SEMENTE):
+    """Bytes lidos do arquivo por busca, com o cache do SQLite vazio antes de cada uma
+
+    Sem mmap, cada página vem de uma leitura do arquivo, como acontece com o
+    banco na rede. Além da busca completa (buscar_dados), compara a leitura das
+    colunas da grade para os mesmos ROWIDs na projeção de busca e na tabela
+    principal de 52 colunas.
+    """
+    if bytes_lidos_processo() is None:
+        return None
+    conn = sqlite3.connect(f'{Path(caminho_banco).absolute().as_uri()}?mode=ro', uri=True)
+    conn.execute("PRAGMA mmap_size=0")
+    sql_tabela_principal = consulta_dados.CONSULTAS['rowids'].replace('tb_busca_grade', SQL_TABLE)
+    aleatorio = random.Random(semente)
+
+    # Custo da própria leitura do contador, descontado de cada medida
+    custo_contador = -bytes_lidos_processo() + bytes_lidos_processo()
+
+    def lidos(funcao):
+        conn.execute("PRAGMA shrink_memory")
+        antes = bytes_lidos_processo()
+        resultado = funcao()
+        return bytes_lidos_processo() - antes - custo_contador, resultado
+
+    resultados = {'tabelas_bytes': tamanho_tabelas(conn), 'busca': {}}
+    projecao, principal = [], []
+    for modo in MODOS_BUSCA:
+        amostras = []
+        for filtro in filtros_de_teste(conn, modo, buscas_por_modo, aleatorio):
+            lido, dados = lidos(lambda: consulta_dados.buscar_dados(conn, filtro, modo))
+            amostras.append(lido)
+            if not dados:
+                continue
+            ids = json.dumps([linha[0] for linha in dados])
+            projecao.append(lidos(lambda: conn.execute(consulta_dados.CONSULTAS['rowids'], (ids,)).fetchall())[0])
+            principal.append(lidos(lambda: conn.execute(sql_tabela_principal, (ids,)).fetchall())[0])
+        resultados['busca'][modo] = {
+            'bytes_p50': round(statistics.median(amostras)),
+            'bytes_media': round(statistics.fmean(amostras)),
+        }
+    if projecao:
+        resultados['linhas_da_pagina'] = {
+            'projecao_bytes_media': round(statistics.fmean(projecao)),
+            'tabela_principal_bytes_media': round(statistics.fmean(principal)),
+        }
+    conn.close()
+    return resultados
+
+
+def medir_grade(caminho_banco):
+    """Tempo para montar os controles da grade (criar_tabela) e serializá-los para o cliente"""
+    import grade_resultados
+
+    conn = sqlite3.connect(f'{Path(caminho_banco).absolute().as_uri()}?mode=ro&immutable=1', uri=True)
+    linhas = conn.execute(
+        f"SELECT {consulta_dados.COLUNAS_GRADE} FROM {SQL_TABLE} ORDER BY ROWID LIMIT ?", (max(LINHAS_GRADE),)
+    ).fetchall()
+    conn.close()
+
+    resultados = {}
+    for quantidade in LINHAS_GRADE:
+        dados = linhas[:quantidade]
+        inicio = time.perf_counter()
+        grade = grade_resultados.criar_grade(grade_resultados.criar_lista(dados, lambda e, v: None))
+        construcao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        comandos = grade._build_add_commands(index={}, added_controls=[])
+        serializacao = time.perf_counter() - inicio
+        resultados[str(len(dados))] = {
+            'construcao_ms': round(construcao * 1000, 1),
+            'serializacao_ms': round(serializacao * 1000, 1),
+            'controles': len(comandos),
+        }
+    return resultados
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(tamanhos, diretorio, buscas_por_modo=BUSCAS_POR_MODO, medir_controles=True, atraso_lote=ATRASO_LOTE):
+    resultado = {
+        'commit': versao_codigo(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'tamanhos': {},
+    }
+
+    for nome in tamanhos:
+        total = TAMANHOS[nome] if nome in TAMANHOS else int(nome)
+        print(f"\n=== {total} registros ===")
+        caminho_fonte = os.path.join(diretorio, f'fonte_{total}.db')
+        caminho_banco = os.path.join(diretorio, f'consultor_{total}.db')
+        medidas = {}
+
+        if not os.path.exists(caminho_fonte):
+            print("Gerando dados sintéticos...")
+            inicio = time.perf_counter()
+            GeradorDados(total).gravar(caminho_fonte + '.tmp')
+            os.replace(caminho_fonte + '.tmp', caminho_fonte)
+            medidas['geracao_s'] = round(time.perf_counter() - inicio, 3)
+
+        if os.path.exists(caminho_banco):
+            os.remove(caminho_banco)
+        medidas['sincronizacao'] = medir_insercao(caminho_fonte, caminho_banco)
+        print(f"✓ Inserção: {medidas['sincronizacao']['registros_por_s']} reg/s")
+
+        # Mesmo carregamento no layout antigo, para comparar o tamanho do arquivo
+        caminho_antigo = os.path.join(diretorio, f'consultor_{total}_antigo.db')
+        if os.path.exists(caminho_antigo):
+            os.remove(caminho_antigo)
+        medidas['sincronizacao_layout_antigo'] = medir_insercao(caminho_fonte, caminho_antigo, compacto=False)
+        os.remove(caminho_antigo)
+        compacto = medidas['sincronizacao']['tamanho_arquivo_bytes']
+        antigo = medidas['sincronizacao_layout_antigo']['tamanho_arquivo_bytes']
+        print(f"✓ Arquivo: {compacto / 2 ** 20:.1f} MB no layout compacto, "
+              f"{antigo / 2 ** 20:.1f} MB no layout antigo ({1 - compacto / antigo:.0%} menor)")
+
+        if atraso_lote is not None:
+            print(f"Medindo extração com {atraso_lote * 1000:.0f} ms de latência por lote...")
+            medidas['extracao'] = medir_extracao(caminho_fonte, diretorio, atraso_lote)
+            for nome, extracao in medidas['extracao'].items():
+                confere = "✓" if extracao['contagem_confere'] else "✗ contagem divergente"
+                print(f"  {nome:<6} {extracao['segundos']:>8} s | {extracao['registros_por_s']} reg/s {confere}")
+
+        print("Medindo buscas...")
+        medidas['busca'] = medir_buscas(caminho_banco, buscas_por_modo)
+        for modo, tempos in medidas['busca']['sql'].items():
+            print(f"  {modo:<14} p50 {tempos['p50_ms']:>8} ms | p95 {tempos['p95_ms']:>8} ms | p99 {tempos['p99_ms']:>8} ms")
+
+        print("Medindo bytes lidos por busca...")
+        medidas['leitura'] = medir_leitura(caminho_banco, buscas_por_modo)
+        if medidas['leitura'] is None:
+            print("⚠ Aviso: o sistema não informa os bytes lidos pelo processo (instale o psutil)")
+        else:
+            for modo, lidos in medidas['leitura']['busca'].items():
+                print(f"  {modo:<14} p50 {lidos['bytes_p50']:>9} bytes | média {lidos['bytes_media']:>9} bytes")
+            pagina = medidas['leitura'].get('linhas_da_pagina')
+            if pagina:
+                print(f"  Linhas de uma página: {pagina['projecao_bytes_media']} bytes na projeção, "
+                      f"{pagina['tabela_principal_bytes_media']} bytes na tabela principal")
+        resultado['tamanhos'][str(total)] = medidas
+
+    if medir_controles and tamanhos:
+        print("\nMedindo montagem da grade...")
+        resultado['criar_tabela'] = medir_grade(caminho_banco)
+        for quantidade, tempos in resultado['criar_tabela'].items():
+            print(f"  {quantidade:>6} linhas: {tempos['construcao_ms']} ms (+{tempos['serializacao_ms']} ms serialização)")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark com dados sintéticos (sem rede)")
+    parser.add_argument('--tamanhos', nargs='+', default=['100k'],
+                        help="quantidades de registros: 100k, 1m, 5m ou um número (padrão: 100k)")
+    parser.add_argument('--diretorio', help="pasta para os bancos gerados (padrão: pasta temporária)")
+    parser.add_argument('--saida', default='benchmark.json', help="arquivo JSON com os resultados")
+    parser.add_argument('--buscas', type=int, default=BUSCAS_POR_MODO, help="buscas medidas por modo")
+    parser.add_argument('--sem-grade', action='store_true', help="não mede a montagem da grade (requer flet)")
+    parser.add_argument('--atraso', type=float, default=ATRASO_LOTE * 1000,
+                        help="latência simulada por lote na medição da extração, em ms (negativo: não mede)")
+    args = parser.parse_args()
+
+    diretorio = args.diretorio or os.path.join(tempfile.gettempdir(), 'benchmark_consultor')
+    os.makedirs(diretorio, exist_ok=True)
+
+    atraso_lote = args.atraso / 1000 if args.atraso >= 0 else None
+    resultado = executar(args.tamanhos, diretorio, args.buscas, not args.sem_grade, atraso_lote)
+    with open(args.saida, 'w', encoding='utf-8') as saida:
+        json.dump(resultado, saida, ensure_ascii=False, indent=2)
+    print(f"\n✓ Resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
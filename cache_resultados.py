@@ -0,0 +1,139 @@
+import sys
+import threading
+from collections import OrderedDict
+
+# Memória máxima ocupada pelos resultados guardados (bytes, estimativa)
+LIMITE_MEMORIA = 32 * 1024 * 1024
+
+# Versão não informada pelo chamador: é lida com versao_atual (None é uma versão válida)
+_LER_VERSAO = object()
+
+
+def tamanho_estimado(valor):
+    """Estimativa dos bytes ocupados por um valor (linhas, tuplas e dicionários de valores simples)"""
+    total = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        itens = [*valor.keys(), *valor.values()]
+    elif isinstance(valor, (list, tuple)):
+        itens = valor
+    else:
+        return total
+    return total + sum(tamanho_estimado(item) for item in itens)
+
+
+class CacheResultados:
+    """Guarda as páginas de resultado das buscas mais recentes (LRU)
+
+    A chave é (campo_filtro, filtro normalizado, página). O total guardado é
+    limitado por uma estimativa de memória: ao passar do limite, as páginas
+    usadas há mais tempo saem primeiro. Buscas sem resultado também são
+    guardadas, já que repetir uma busca vazia custa o mesmo que uma cheia.
+
+    Quando a versão do banco muda (nova sincronização publicada), todo o
+    conteúdo é descartado na próxima consulta ao cache. Quem já leu a versão
+    (uma busca lê o marcador uma vez só) a informa em `obter` e `guardar`.
+    """
+
+    def __init__(self, versao_atual=None, limite_bytes=LIMITE_MEMORIA, guardar_vazios=True):
+        self._versao_atual = versao_atual or (lambda: None)
+        self._versao = None
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.limite_bytes = limite_bytes
+        self.guardar_vazios = guardar_vazios
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.acertos_vazios = 0
+        self.invalidacoes = 0
+        self.removidos = 0
+
+    def _conferir_versao(self, versao=_LER_VERSAO):
+        if versao is _LER_VERSAO:
+            versao = self._versao_atual()
+        if versao != self._versao:
+            if self._itens:
+                self.invalidacoes += 1
+            self._itens.clear()
+            self.bytes_usados = 0
+            self._versao = versao
+        return versao
+
+    def obter(self, chave, versao=_LER_VERSAO):
+        """Retorna o valor guardado para `chave`, ou None se não houver
+
+        `versao` é a versão do banco já lida por quem consulta; sem ela, a
+        versão é lida aqui.
+        """
+        with self._lock:
+            self._conferir_versao(versao)
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            valor, _ = item
+            if not valor[0]:
+                self.acertos_vazios += 1
+            return valor
+
+    def contem(self, chave, versao=_LER_VERSAO):
+        """Indica se há valor guardado para `chave`, sem contar como consulta"""
+        with self._lock:
+            self._conferir_versao(versao)
+            return chave in self._itens
+
+    def guardar(self, chave, valor, versao=None):
+        """Guarda `valor` = (linhas, proximo) para `chave` (ou (registro, None))
+
+        `versao` é a versão do banco lida antes da consulta (a mesma passada a
+        `obter` ou devolvida por `versao`): se o conteúdo já passou para outra
+        versão enquanto a consulta rodava, o resultado não é guardado. A
+        versão não é lida de novo: um resultado da versão anterior fica com
+        ela e é descartado na próxima consulta que vir a versão nova.
+        """
+        linhas = valor[0]
+        if not linhas and not self.guardar_vazios:
+            return
+        tamanho = tamanho_estimado(linhas)
+        if tamanho > self.limite_bytes:
+            return
+        with self._lock:
+            if versao != self._versao:
+                return
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self.bytes_usados -= anterior[1]
+            self._itens[chave] = (valor, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.limite_bytes:
+                _, (_, tamanho_removido) = self._itens.popitem(last=False)
+                self.bytes_usados -= tamanho_removido
+                self.removidos += 1
+
+    def versao(self):
+        """Versão do banco à qual o conteúdo atual pertence"""
+        with self._lock:
+            return self._conferir_versao()
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.bytes_usados = 0
+
+    def estatisticas(self):
+        """Contadores de uso do cache"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'cache_acertos': self.acertos,
+                'cache_falhas': self.falhas,
+                'cache_acertos_vazios': self.acertos_vazios,
+                'cache_taxa_acerto': round(self.acertos / consultas, 4) if consultas else 0.0,
+                'cache_itens': len(self._itens),
+                'cache_bytes': self.bytes_usados,
+                'cache_limite_bytes': self.limite_bytes,
+                'cache_invalidacoes': self.invalidacoes,
+                'cache_removidos': self.removidos,
+            }
@@ -0,0 +1,259 @@
+import json
+import threading
+import time
+
+import metricas
+from consulta_dados import (
+    CAMPOS_MAP,
+    CHAVES_NUMERICAS,
+    COLUNAS_GRADE,
+    NOMES_GRADE,
+    TAMANHO_PAGINA,
+    buscar_pagina_filtrada,
+    faixa_prefixo,
+    faixas_numericas,
+)
+from criar_banco import COLUNAS_BUSCA_TEXTO
+from normalizacao import normalizar_texto, somente_digitos
+
+# Carteiras maiores que isto não são mantidas em memória (as buscas seguem pela base)
+LIMITE_CARTEIRA = 200_000
+
+_POSICAO = {coluna: posicao for posicao, coluna in enumerate(NOMES_GRADE)}
+
+# Linhas da grade da carteira, com as chaves numéricas no fim (para as buscas
+# por número darem o mesmo resultado da base)
+_CONSULTA_CARTEIRA = f'''
+        SELECT {COLUNAS_GRADE}, {', '.join(coluna for coluna, _ in CHAVES_NUMERICAS.values())}
+        FROM tb_busca_grade
+        WHERE email COLLATE NOCASE IN (SELECT value FROM json_each(?))
+        ORDER BY ROWID
+    '''
+
+
+def _nocase(texto):
+    # Mesma comparação da collation NOCASE: só as letras ASCII são convertidas
+    return ''.join(c.lower() if c.isascii() else c for c in texto)
+
+
+def identificar(conn, usuario):
+    """E-mails do usuário logado na base: pelo início do e-mail ou pela matrícula
+
+    O login costuma ser a parte do e-mail antes do @ (busca pelo índice do
+    e-mail, conferindo a parte antes do primeiro @ inteira: o login "joao"
+    não pega joao_pereira@). Se nenhum e-mail for do login, ele é procurado
+    como matrícula, o que lê a tabela inteira (feito uma vez por versão, em
+    segundo plano).
+    """
+    if not usuario:
+        return []
+    inicio, fim = faixa_prefixo(f'{usuario}@')
+    emails = [email for (email,) in conn.execute('''
+        SELECT DISTINCT email FROM tb_busca_grade
+        WHERE email >= ? COLLATE NOCASE AND email < ? COLLATE NOCASE
+          AND lower(substr(email, 1, instr(email, '@'))) = lower(?) || '@'
+    ''', (inicio, fim, usuario))]
+    if emails:
+        return emails
+    return [email for (email,) in conn.execute('''
+        SELECT DISTINCT email FROM tb_base_contrato_consultor
+        WHERE matricula = ? COLLATE NOCASE AND email IS NOT NULL
+    ''', (usuario,))]
+
+
+class CarteiraUsuario:
+    """Contratos do consultor logado, em memória, para responder as buscas dele na hora
+
+    Guarda as linhas da grade da carteira (em ordem de ROWID) e, para cada
+    linha, os valores já preparados para as comparações: o texto como a
+    collation NOCASE compara, as chaves numéricas e o texto normalizado das
+    colunas do índice de trigramas. As buscas seguem as mesmas regras de
+    consulta_dados, mas a busca por trecho vem em ordem de ROWID (sem
+    relevância).
+    """
+
+    def __init__(self, versao, usuario, emails):
+        self.versao = versao
+        self.usuario = usuario
+        self.emails = emails
+        self.linhas = []
+        self._prefixos = []
+        self._chaves = []
+        self._textos = []
+        self.tempo_construcao = 0.0
+
+    @classmethod
+    def construir(cls, conn, versao, usuario):
+        """Lê a carteira do usuário (None se ele não for encontrado ou a carteira passar do limite)"""
+        inicio = time.perf_counter()
+        emails = identificar(conn, usuario)
+        if not emails:
+            return None
+        carteira = cls(versao, usuario, emails)
+        cursor = conn.execute(_CONSULTA_CARTEIRA, (json.dumps(emails),))
+        quantidade_grade = len(NOMES_GRADE)
+        while True:
+            bloco = cursor.fetchmany(5000)
+            if not bloco:
+                break
+            for linha in bloco:
+                grade = linha[:quantidade_grade]
+                carteira.linhas.append(grade)
+                # Valores vazios ficam como '', que não começa com nenhum filtro
+                carteira._prefixos.append({
+                    campo: _nocase(str(grade[_POSICAO[campo_db]] or '')) for campo, campo_db in CAMPOS_MAP.items()
+                })
+                carteira._chaves.append(dict(zip(CHAVES_NUMERICAS, linha[quantidade_grade:])))
+                carteira._textos.append([
+                    normalizar_texto(grade[_POSICAO[coluna]]) or '' for coluna in COLUNAS_BUSCA_TEXTO
+                ])
+            if len(carteira.linhas) > LIMITE_CARTEIRA:
+                cursor.close()
+                print(f"⚠ Aviso: Carteira de {usuario} com mais de {LIMITE_CARTEIRA} contratos, mantida só na base")
+                return None
+        carteira.tempo_construcao = time.perf_counter() - inicio
+        return carteira
+
+    def _por_prefixo(self, campo, inicio):
+        return lambda posicao: self._prefixos[posicao][campo].startswith(inicio)
+
+    def _por_chave(self, campo, digitos):
+        faixas = [(comeco, fim) for comeco, fim in faixas_numericas(digitos, CHAVES_NUMERICAS[campo][1]) if fim > comeco]
+
+        def atende(posicao):
+            chave = self._chaves[posicao][campo]
+            return chave is not None and any(comeco <= chave < fim for comeco, fim in faixas)
+
+        return atende
+
+    def _criterio(self, filtro, campo_filtro):
+        # Função posição -> bool com a mesma regra de consulta_dados.montar_consulta
+        if campo_filtro == 'contem':
+            palavras = [p for p in normalizar_texto(filtro).split() if len(p) >= 3]
+            if palavras:
+                return lambda posicao: all(
+                    any(palavra in texto for texto in self._textos[posicao]) for palavra in palavras
+                )
+            campo_filtro = 'razao_social'
+        if campo_filtro not in CAMPOS_MAP and campo_filtro != 'todos':
+            campo_filtro = 'contrato'
+
+        digitos = somente_digitos(filtro)
+        inicio = faixa_prefixo(filtro)[0]
+        campos = CAMPOS_MAP if campo_filtro == 'todos' else [campo_filtro]
+        criterios = [
+            self._por_chave(campo, digitos) if digitos is not None and campo in CHAVES_NUMERICAS
+            else self._por_prefixo(campo, inicio)
+            for campo in campos
+        ]
+        return lambda posicao: any(criterio(posicao) for criterio in criterios)
+
+    def encontrados(self, filtro, campo_filtro):
+        """Linhas da carteira que atendem ao filtro, em ordem de ROWID"""
+        if not filtro:
+            return self.linhas
+        criterio = self._criterio(filtro, campo_filtro)
+        return [linha for posicao, linha in enumerate(self.linhas) if criterio(posicao)]
+
+    def buscar_pagina(self, conn, filtro, campo_filtro, apos=None, limite=TAMANHO_PAGINA, permitido=None):
+        """Página da busca com os contratos da carteira antes dos demais da base
+
+        Mesmo formato de consulta_dados.buscar_pagina, mas o cursor diz em que
+        parte a busca está: ('carteira', ROWID) enquanto há linhas da carteira
+        e ('base', cursor da busca na base) depois delas, que continua pelo
+        SQL sem repetir as linhas da carteira. Retorna None quando nada da
+        carteira atende à busca (ou o cursor não é desta busca): ela segue
+        então pelo caminho normal. `permitido(rowid)`, se informado, restringe
+        as linhas (as facetas selecionadas).
+        """
+        if apos is not None and not isinstance(apos, tuple):
+            return None
+        parte, cursor = apos or ('carteira', None)
+        with metricas.medir('busca.carteira'):
+            linhas = self.encontrados(filtro, campo_filtro)
+            if permitido is not None:
+                linhas = [linha for linha in linhas if permitido(linha[0])]
+        if not linhas:
+            return None
+
+        pagina = []
+        if parte == 'carteira':
+            seguintes = [linha for linha in linhas if linha[0] > (cursor or 0)]
+            if len(seguintes) > limite:
+                pagina = seguintes[:limite]
+                return pagina, ('carteira', pagina[-1][0])
+            pagina, cursor = seguintes, None
+            if len(pagina) == limite:
+                return pagina, ('base', None)
+
+        da_carteira = {linha[0] for linha in linhas}
+
+        def da_base(rowid):
+            return rowid not in da_carteira and (permitido is None or permitido(rowid))
+
+        base, proximo = buscar_pagina_filtrada(conn, filtro, campo_filtro, da_base, cursor, limite - len(pagina))
+        return pagina + base, (None if proximo is None else ('base', proximo))
+
+
+class MotorCarteira:
+    """Carrega e mantém a CarteiraUsuario do usuário logado para a versão atual do banco
+
+    Como o índice em memória, a carteira é lida em segundo plano ao abrir o
+    app e de novo a cada nova versão copiada; `carteira(versao)` devolve None
+    até ela ficar pronta (as buscas seguem pela base enquanto isso).
+    """
+
+    def __init__(self, pool, usuario):
+        self._pool = pool
+        self.usuario = usuario
+        self._carteira = None
+        self._lock = threading.Lock()
+        self._carregando = None
+        self._sem_carteira = None
+        self._aviso_pronto = None
+
+    def iniciar(self, ao_carregar=None):
+        """Lê a carteira da versão atual; `ao_carregar(carteira)` é chamado quando ela ficar pronta"""
+        self._aviso_pronto = ao_carregar
+        with self._pool.conexao() as conn:
+            versao = self._pool.versao_de(conn) if conn else None
+        if versao is not None:
+            self._agendar(versao)
+
+    def _agendar(self, versao):
+        with self._lock:
+            if versao in (self._carregando, self._sem_carteira) or (self._carteira and self._carteira.versao == versao):
+                return
+            self._carregando = versao
+        threading.Thread(target=self._carregar, args=(versao,), name="carteira", daemon=True).start()
+
+    def _carregar(self, versao):
+        try:
+            with self._pool.conexao() as conn:
+                if conn is None or self._pool.versao_de(conn) != versao:
+                    return
+                carteira = CarteiraUsuario.construir(conn, versao, self.usuario)
+            if carteira is None:
+                self._sem_carteira = versao
+                return
+            with self._lock:
+                self._carteira = carteira
+            print(f"✓ Carteira de {self.usuario} pronta (versão {versao}): "
+                  f"{len(carteira.linhas)} contratos em {carteira.tempo_construcao:.1f}s")
+            if self._aviso_pronto is not None:
+                self._aviso_pronto(carteira)
+        except Exception as e:
+            self._sem_carteira = versao
+            print(f"⚠ Aviso: Carteira do usuário indisponível: {e}")
+        finally:
+            with self._lock:
+                if self._carregando == versao:
+                    self._carregando = None
+
+    def carteira(self, versao):
+        """CarteiraUsuario da versão informada (None enquanto não estiver pronta)"""
+        carteira = self._carteira
+        if carteira is None or carteira.versao != versao:
+            self._agendar(versao)
+            return None
+        return carteira
@@ -0,0 +1,409 @@
+import json
+import sqlite3
+import sys
+
+import metricas
+from normalizacao import MAX_DIGITOS, normalizar_texto, somente_digitos
+
+# Colunas exibidas na grade de resultados
+COLUNAS_GRADE = '''
+            ROWID as id,
+            contrato,
+            razao_social,
+            cnpj,
+            raiz,
+            consultor,
+            contato,
+            email,
+            municipio,
+            estado,
+            produto
+'''
+
+# Nomes das colunas da grade, na ordem em que aparecem nas linhas
+NOMES_GRADE = [coluna.split()[-1] for coluna in COLUNAS_GRADE.split(',')]
+
+# Mapeamento dos campos pesquisáveis
+CAMPOS_MAP = {
+    'contrato': 'contrato',
+    'cnpj': 'cnpj',
+    'raiz': 'raiz',
+    'razao_social': 'razao_social',
+    'consultor': 'consultor',
+    'email': 'email'
+}
+
+# Campos com chave numérica: coluna da chave e quantidade fixa de dígitos
+# (None quando o tamanho varia, como no contrato)
+CHAVES_NUMERICAS = {
+    'contrato': ('contrato_num', None),
+    'cnpj': ('cnpj_num', 14),
+    'raiz': ('raiz_num', 8),
+}
+
+# Colunas de busca calculadas na sincronização e o rowid que a view do layout
+# compacto expõe (não fazem parte do registro de origem)
+COLUNAS_INTERNAS = {'contrato_num', 'cnpj_num', 'raiz_num', 'rowid'}
+
+# Registros por página da grade. A paginação é por ROWID (keyset): cada
+# página continua depois do último ROWID exibido, sem limite total
+TAMANHO_PAGINA = 100
+
+
+# As buscas leem a projeção tb_busca_grade (colunas da grade e chaves, com o
+# mesmo ROWID da tabela principal), criada na sincronização; só o painel de
+# detalhes lê a tabela principal, com todas as colunas
+
+# Nas buscas por índice, "+ROWID" impede o SQLite de trocar o índice do
+# campo por uma leitura da tabela inteira na ordem do ROWID
+
+
+def _busca_por_prefixo(campo_db):
+    # Faixa [prefixo, próximo prefixo) com o índice NOCASE do campo: equivale
+    # ao LIKE 'x%' sem diferenciar maiúsculas, mas sem tratar % e _ como curinga
+    return f'''
+        SELECT ROWID AS id_busca FROM tb_busca_grade
+        WHERE {campo_db} >= ? COLLATE NOCASE AND {campo_db} < ? COLLATE NOCASE
+          AND +ROWID > ?
+        ORDER BY +ROWID
+        LIMIT ?
+    '''
+
+
+def _quantidade_faixas(largura):
+    # Campos de tamanho fixo: valor exato + faixa do prefixo; tamanho variável:
+    # uma faixa para cada quantidade possível de dígitos
+    return 2 if largura else MAX_DIGITOS
+
+
+def _busca_por_chave(campo):
+    # Faixas [início, fim) na chave numérica, todas resolvidas pelo índice
+    # inteiro da chave (o SQLite une as faixas sem repetir linhas)
+    coluna, largura = CHAVES_NUMERICAS[campo]
+    faixas = ' OR '.join([f'({coluna} >= ? AND {coluna} < ?)'] * _quantidade_faixas(largura))
+    return f'''
+        SELECT ROWID AS id_busca FROM tb_busca_grade
+        WHERE ({faixas})
+          AND +ROWID > ?
+        ORDER BY +ROWID
+        LIMIT ?
+    '''
+
+
+def _uniao(buscas):
+    return ' UNION '.join(f'SELECT id_busca FROM ({busca})' for busca in buscas)
+
+
+# Os textos são montados uma única vez: com as conexões do pool mantidas
+# abertas, o sqlite3 reaproveita o comando já preparado
+CONSULTAS = {
+    # Sem filtro: todos os registros, página a página
+    '': f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID > ?
+        ORDER BY ROWID
+        LIMIT ?
+    ''',
+    # Busca em todos os campos: uma busca por faixa de índice em cada campo,
+    # unidas e sem repetição de ROWID
+    'todos': f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID IN (
+            {_uniao(_busca_por_prefixo(campo) for campo in CAMPOS_MAP.values())}
+        )
+        ORDER BY ROWID
+        LIMIT ?
+    ''',
+    # Todos os campos com um valor numérico digitado: contrato, CNPJ e raiz
+    # pelas chaves numéricas, os demais pelo prefixo do texto
+    'todos_numerico': f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID IN (
+            {_uniao(
+                _busca_por_chave(campo) if campo in CHAVES_NUMERICAS else _busca_por_prefixo(campo_db)
+                for campo, campo_db in CAMPOS_MAP.items()
+            )}
+        )
+        ORDER BY ROWID
+        LIMIT ?
+    ''',
+    # Busca por trecho (razão social, consultor, e-mail e cidade) no índice de
+    # texto, ordenada por relevância com mais peso para a razão social. Como a
+    # ordem não é a do ROWID, esta busca pagina pela posição no resultado
+    'contem': f'''
+        WITH encontrados AS (
+            SELECT rowid AS id_busca,
+                   bm25(tb_busca_texto, 4.0, 2.0, 1.0, 1.0) AS relevancia
+            FROM tb_busca_texto
+            WHERE tb_busca_texto MATCH ?
+            ORDER BY relevancia
+            LIMIT ? OFFSET ?
+        )
+        SELECT {COLUNAS_GRADE}
+        FROM encontrados
+        JOIN tb_busca_grade
+          ON tb_busca_grade.ROWID = encontrados.id_busca
+        ORDER BY relevancia
+    ''',
+}
+# Colunas da grade para uma lista de ROWIDs (passada como um array JSON, para
+# que o texto da consulta seja sempre o mesmo)
+CONSULTAS['rowids'] = f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID IN (SELECT value FROM json_each(?))
+        ORDER BY ROWID
+    '''
+# Registros completos (todas as colunas) para o painel de detalhes
+CONSULTAS['registros'] = '''
+        SELECT ROWID AS id, *
+        FROM tb_base_contrato_consultor
+        WHERE ROWID IN (SELECT value FROM json_each(?))
+    '''
+for _campo, _campo_db in CAMPOS_MAP.items():
+    # Busca específica no campo selecionado
+    CONSULTAS[_campo] = f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID IN ({_busca_por_prefixo(_campo_db)})
+        ORDER BY ROWID
+    '''
+for _campo in CHAVES_NUMERICAS:
+    # Busca pela chave numérica, usada quando o valor digitado é um número
+    CONSULTAS[f'{_campo}_numerico'] = f'''
+        SELECT {COLUNAS_GRADE}
+        FROM tb_busca_grade
+        WHERE ROWID IN ({_busca_por_chave(_campo)})
+        ORDER BY ROWID
+    '''
+
+
+def faixa_prefixo(filtro):
+    """Limites (início, fim) da faixa de valores que começam com `filtro` na collation NOCASE
+
+    A NOCASE só ignora maiúsculas/minúsculas de letras ASCII, então só elas
+    são convertidas antes de calcular o limite superior. O limite é o
+    sucessor do último caractere já na forma comparada pela NOCASE: depois de
+    '@' vem 'A', que ela compara como 'a' (a faixa pegaria '_', '[' ...), então
+    o limite passa para '[', logo depois de 'Z'.
+    """
+    inicio = ''.join(c.lower() if c.isascii() else c for c in filtro)
+    proximo = chr(ord(inicio[-1]) + 1)
+    if 'A' <= proximo <= 'Z':
+        proximo = '['
+    return inicio, inicio[:-1] + proximo
+
+
+def faixas_numericas(digitos, largura):
+    """Faixas [início, fim) da chave numérica para os dígitos digitados
+
+    Sempre inclui o valor exato (que cobre números colados sem os zeros à
+    esquerda). Com largura fixa, os dígitos também são tratados como o início
+    do número completo; com largura variável, como o início de um número de
+    qualquer tamanho. O total de faixas é fixo para cada campo, para que o
+    texto da consulta não mude; as sobras recebem faixas vazias.
+    """
+    numero = int(digitos)
+    faixas = [(numero, numero + 1)]
+    if largura:
+        if len(digitos) < largura:
+            fator = 10 ** (largura - len(digitos))
+            faixas.append((numero * fator, (numero + 1) * fator))
+    else:
+        for total in range(len(digitos) + 1, MAX_DIGITOS + 1):
+            fator = 10 ** (total - len(digitos))
+            faixas.append((numero * fator, (numero + 1) * fator))
+    faixas += [(0, 0)] * (_quantidade_faixas(largura) - len(faixas))
+    return faixas
+
+
+def _parametros_chave(digitos, campo):
+    return tuple(valor for faixa in faixas_numericas(digitos, CHAVES_NUMERICAS[campo][1]) for valor in faixa)
+
+
+def expressao_busca_texto(filtro):
+    """Monta a expressão MATCH do índice de trigramas (None se nenhuma palavra tiver 3+ letras)"""
+    palavras = [p for p in normalizar_texto(filtro).split() if len(p) >= 3]
+    if not palavras:
+        return None
+    return ' AND '.join('"' + p.replace('"', '""') + '"' for p in palavras)
+
+
+def normalizar_filtro(filtro='', campo_filtro='todos'):
+    """Forma canônica do filtro para o modo de busca, usada como chave do cache
+
+    Filtros que geram exatamente a mesma consulta têm a mesma forma: os
+    dígitos de um número digitado com ou sem pontuação, a expressão do
+    índice de texto na busca por trecho e, nas buscas por prefixo, o texto
+    com as letras ASCII em minúsculas (como compara a collation NOCASE).
+    """
+    if not filtro:
+        return ''
+    if campo_filtro == 'contem':
+        expressao = expressao_busca_texto(filtro)
+        if expressao:
+            return expressao
+    digitos = somente_digitos(filtro)
+    if digitos is not None and campo_filtro in CHAVES_NUMERICAS:
+        return digitos
+    return faixa_prefixo(filtro)[0]
+
+
+def _pagina_por_posicao(filtro, campo_filtro):
+    return bool(filtro) and campo_filtro == 'contem' and expressao_busca_texto(filtro) is not None
+
+
+def montar_consulta(filtro='', campo_filtro='todos', apos=None, limite=TAMANHO_PAGINA):
+    """Retorna o SQL e os parâmetros de uma página da busca
+
+    `apos` é o cursor devolvido pela página anterior (None na primeira página).
+    """
+    apos = apos or 0
+    if not filtro:
+        return CONSULTAS[''], (apos, limite)
+
+    if campo_filtro == 'contem':
+        expressao = expressao_busca_texto(filtro)
+        if expressao:
+            return CONSULTAS['contem'], (expressao, limite, apos)
+        # Trigramas exigem 3 letras: termos curtos buscam pelo início da razão social
+        campo_filtro = 'razao_social'
+
+    if campo_filtro not in CAMPOS_MAP and campo_filtro != 'todos':
+        campo_filtro = 'contrato'
+
+    # Valores numéricos (em qualquer formatação) usam as chaves numéricas
+    digitos = somente_digitos(filtro)
+    faixa = faixa_prefixo(filtro) + (apos, limite)
+    if campo_filtro == 'todos':
+        if digitos is None:
+            return CONSULTAS['todos'], faixa * len(CAMPOS_MAP) + (limite,)
+        parametros = ()
+        for campo in CAMPOS_MAP:
+            if campo in CHAVES_NUMERICAS:
+                parametros += _parametros_chave(digitos, campo) + (apos, limite)
+            else:
+                parametros += faixa
+        return CONSULTAS['todos_numerico'], parametros + (limite,)
+
+    if digitos is not None and campo_filtro in CHAVES_NUMERICAS:
+        return CONSULTAS[f'{campo_filtro}_numerico'], _parametros_chave(digitos, campo_filtro) + (apos, limite)
+    return CONSULTAS[campo_filtro], faixa
+
+
+def buscar_pagina(conn, filtro='', campo_filtro='todos', apos=None, limite=TAMANHO_PAGINA):
+    """Busca uma página de resultados
+
+    Retorna (linhas, proximo): `proximo` é o cursor da página seguinte, ou
+    None quando não há mais resultados.
+    """
+    sql, parametros = montar_consulta(filtro, campo_filtro, apos, limite)
+    cursor = conn.cursor()
+    with metricas.medir('busca.sql'):
+        cursor.execute(sql, parametros)
+    with metricas.medir('busca.fetchall'):
+        linhas = cursor.fetchall()
+
+    if len(linhas) < limite:
+        return linhas, None
+    if _pagina_por_posicao(filtro, campo_filtro):
+        return linhas, (apos or 0) + len(linhas)
+    return linhas, linhas[-1][0]
+
+
+def buscar_pagina_filtrada(conn, filtro, campo_filtro, permitido, apos=None, limite=TAMANHO_PAGINA):
+    """Página da busca só com as linhas cujo ROWID passa em `permitido(rowid)`
+
+    Percorre o resultado completo da busca, na ordem dela, até juntar a
+    página. O cursor segue a mesma regra de buscar_pagina: ROWID da última
+    linha, ou, na busca por trecho, a posição no resultado sem o filtro.
+    """
+    por_posicao = _pagina_por_posicao(filtro, campo_filtro)
+    sql, parametros = montar_consulta(filtro, campo_filtro, apos, -1)
+    cursor = conn.cursor()
+    with metricas.medir('busca.sql_filtrada'):
+        cursor.execute(sql, parametros)
+        linhas = []
+        lidas = apos or 0
+        while True:
+            lote = cursor.fetchmany(1000)
+            if not lote:
+                return linhas, None
+            for linha in lote:
+                if not permitido(linha[0]):
+                    lidas += 1
+                    continue
+                if len(linhas) == limite:
+                    # Existe pelo menos mais uma linha: a página seguinte começa nela
+                    cursor.close()
+                    return linhas, lidas if por_posicao else linhas[-1][0]
+                linhas.append(linha)
+                lidas += 1
+
+
+def buscar_por_rowids(conn, rowids):
+    """Linhas da grade para os ROWIDs informados, em ordem de ROWID"""
+    if not rowids:
+        return []
+    with metricas.medir('busca.linhas_por_rowid'):
+        return conn.execute(CONSULTAS['rowids'], (json.dumps(rowids),)).fetchall()
+
+
+def buscar_registros(conn, rowids):
+    """Registros completos dos ROWIDs informados, como {rowid: {coluna: valor}}"""
+    if not rowids:
+        return {}
+    with metricas.medir('detalhe.sql'):
+        cursor = conn.execute(CONSULTAS['registros'], (json.dumps(list(rowids)),))
+        colunas = [coluna[0] for coluna in cursor.description]
+        return {
+            linha[0]: {
+                coluna: valor for coluna, valor in zip(colunas[1:], linha[1:]) if coluna not in COLUNAS_INTERNAS
+            }
+            for linha in cursor
+        }
+
+
+def buscar_dados(conn, filtro='', campo_filtro='todos', limite=TAMANHO_PAGINA):
+    """Executa a busca na conexão informada e retorna as linhas da primeira página"""
+    return buscar_pagina(conn, filtro, campo_filtro, limite=limite)[0]
+
+
+def verificar_planos(conn, filtros=('abc', '12.345')):
+    """Roda EXPLAIN QUERY PLAN em todos os modos de busca, com filtros de texto e numéricos
+
+    Retorna a lista de (modo, detalhe) das etapas que percorrem a projeção
+    de busca inteira, seja por SCAN ou por uma leitura em ordem de ROWID
+    (rowid>?) no lugar do índice do campo. Na listagem sem filtro a leitura
+    por ROWID é o esperado.
+    """
+    varreduras = []
+    modos = [('', '')] + [(filtro, modo) for filtro in filtros for modo in ['todos', 'contem', *CAMPOS_MAP]]
+    for filtro, modo in modos:
+        sql, parametros = montar_consulta(filtro, modo)
+        for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros):
+            detalhe = linha[3]
+            if detalhe.startswith('SCAN tb_busca_grade') or (filtro and 'rowid>?' in detalhe):
+                varreduras.append((f'{modo or "sem filtro"} "{filtro}"', detalhe))
+    return varreduras
+
+
+if __name__ == "__main__":
+    # Uso: python consulta_dados.py caminho\para\consultor.db
+    # Termina com código 1 se algum modo de busca fizer varredura completa
+    if len(sys.argv) != 2:
+        print("Uso: python consulta_dados.py <caminho do banco>")
+        sys.exit(2)
+
+    conn = sqlite3.connect(sys.argv[1])
+    varreduras = verificar_planos(conn)
+    conn.close()
+
+    if varreduras:
+        for modo, detalhe in varreduras:
+            print(f"✗ [{modo}] {detalhe}")
+        sys.exit(1)
+    print("✓ Todos os modos de busca usam índice")
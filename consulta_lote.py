@@ -0,0 +1,158 @@
+import re
+import time
+
+import metricas
+from consulta_dados import CHAVES_NUMERICAS, COLUNAS_INTERNAS
+from normalizacao import normalizar_texto, somente_digitos
+from planilhas import ler_linhas
+
+# Linhas do resultado lidas e gravadas por vez
+TAMANHO_BLOCO = 2000
+
+# Intervalo mínimo entre dois avisos de progresso (segundos)
+INTERVALO_PROGRESSO = 0.2
+
+ENCONTRADO = 'encontrado'
+NAO_ENCONTRADO = 'não encontrado'
+INVALIDO = 'valor inválido'
+
+# Tipos de chave aceitos na consulta em lote (os campos com chave numérica)
+TIPOS_CHAVE = {'cnpj': "CNPJ", 'raiz': "Raiz CNPJ", 'contrato': "Contrato"}
+
+
+def normalizar_chave(valor, tipo):
+    """Chave numérica do valor para o tipo (None se não for um número válido para ele)
+
+    Na consulta por raiz, um CNPJ completo é aceito e reduzido aos 8 primeiros dígitos.
+    """
+    digitos = somente_digitos(valor)
+    if digitos is None:
+        return None
+    largura = CHAVES_NUMERICAS[tipo][1]
+    if tipo == 'raiz' and len(digitos) == CHAVES_NUMERICAS['cnpj'][1]:
+        digitos = digitos[:largura]
+    if largura and len(digitos) > largura:
+        return None
+    return int(digitos)
+
+
+def valores_de_texto(texto):
+    """Valores de uma lista colada: um por linha, ou separados por ; , ou tabulação"""
+    return [valor.strip() for valor in re.split(r'[\r\n;,\t]+', texto or '') if valor.strip()]
+
+
+def _coluna_do_tipo(cabecalho, tipo):
+    nomes = [normalizar_texto(nome).lower() for nome in cabecalho]
+    if tipo in nomes:
+        return nomes.index(tipo)
+    for posicao, nome in enumerate(nomes):
+        if tipo in nome:
+            return posicao
+    return None
+
+
+def valores_de_arquivo(caminho, tipo):
+    """Valores de um arquivo CSV, TXT ou XLSX, lidos sob demanda
+
+    Usa a coluna cujo cabeçalho tem o nome do tipo (cnpj, raiz ou contrato);
+    sem cabeçalho reconhecido, usa a primeira coluna. A primeira linha só é
+    tratada como dado se for um número válido para o tipo.
+    """
+    linhas = ler_linhas(caminho)
+    primeira = next(linhas, None)
+    if primeira is None:
+        return
+    coluna = _coluna_do_tipo(primeira, tipo)
+    if coluna is None:
+        coluna = 0
+        if primeira and normalizar_chave(primeira[0], tipo) is not None:
+            yield primeira[0].strip()
+    for linha in linhas:
+        if len(linha) > coluna and linha[coluna].strip():
+            yield linha[coluna].strip()
+
+
+def resolver_lote(conn, valores, tipo, escritor, progresso=None, cancelado=None):
+    """Procura todos os valores de uma vez e grava encontrados e não encontrados no escritor
+
+    Os valores vão para uma tabela temporária, resolvida com uma única
+    consulta (pelo índice da chave numérica do tipo). O resultado é lido e
+    gravado em blocos, na ordem da lista: cada valor gera uma linha por
+    registro encontrado, ou uma linha indicando que não foi encontrado.
+    `progresso(processados, total)` é chamado ao longo da gravação e
+    `cancelado()`, se retornar True, interrompe a gravação.
+
+    Retorna o resumo: valores lidos, encontrados, não encontrados, inválidos,
+    registros gravados e se a consulta foi cancelada.
+    """
+    coluna = CHAVES_NUMERICAS[tipo][0]
+    cursor = None
+    resumo = {'valores': 0, 'encontrados': 0, 'nao_encontrados': 0, 'invalidos': 0, 'registros': 0, 'cancelado': False}
+
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS tb_consulta_lote (
+            posicao INTEGER PRIMARY KEY,
+            valor TEXT,
+            chave INTEGER
+        )
+    ''')
+    try:
+        conn.execute("DELETE FROM temp.tb_consulta_lote")
+        with metricas.medir('lote.carregar'):
+            cursor = conn.executemany(
+                "INSERT INTO temp.tb_consulta_lote (valor, chave) VALUES (?, ?)",
+                ((valor, normalizar_chave(valor, tipo)) for valor in valores),
+            )
+        total = resumo['valores'] = cursor.rowcount
+
+        with metricas.medir('lote.consulta'):
+            cursor = conn.execute(f'''
+                SELECT lote.posicao, lote.valor, lote.chave IS NULL, busca.id, registro.*
+                FROM temp.tb_consulta_lote AS lote
+                LEFT JOIN tb_busca_grade AS busca ON busca.{coluna} = lote.chave
+                LEFT JOIN tb_base_contrato_consultor AS registro ON registro.ROWID = busca.id
+                ORDER BY lote.posicao, busca.id
+            ''')
+        colunas = [descricao[0] for descricao in cursor.description][4:]
+        visiveis = [posicao for posicao, nome in enumerate(colunas) if nome not in COLUNAS_INTERNAS]
+        escritor.escrever_linhas([['valor_pesquisado', 'situacao', *(colunas[posicao] for posicao in visiveis)]])
+
+        ultimo_aviso = 0.0
+        ultima_posicao_encontrada = None
+        while True:
+            if cancelado is not None and cancelado():
+                resumo['cancelado'] = True
+                break
+            with metricas.medir('lote.bloco'):
+                bloco = cursor.fetchmany(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                linhas = []
+                for posicao, valor, invalido, rowid, *registro in bloco:
+                    if rowid is not None:
+                        # Um valor pode ter vários registros (um CNPJ com vários contratos)
+                        if posicao != ultima_posicao_encontrada:
+                            resumo['encontrados'] += 1
+                            ultima_posicao_encontrada = posicao
+                        resumo['registros'] += 1
+                        linhas.append([valor, ENCONTRADO, *(registro[indice] for indice in visiveis)])
+                    elif invalido:
+                        resumo['invalidos'] += 1
+                        linhas.append([valor, INVALIDO])
+                    else:
+                        resumo['nao_encontrados'] += 1
+                        linhas.append([valor, NAO_ENCONTRADO])
+                escritor.escrever_linhas(linhas)
+
+            agora = time.perf_counter()
+            if progresso is not None and agora - ultimo_aviso >= INTERVALO_PROGRESSO:
+                ultimo_aviso = agora
+                progresso(bloco[-1][0], total)
+        if progresso is not None and not resumo['cancelado']:
+            progresso(total, total)
+        return resumo
+    finally:
+        # A consulta interrompida precisa ser encerrada antes de apagar a tabela
+        if cursor is not None:
+            cursor.close()
+        conn.execute("DROP TABLE IF EXISTS temp.tb_consulta_lote")
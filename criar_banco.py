@@ -1,101 +1,126 @@
 import sqlite3
 import os
+import sys
+import zlib
+from array import array
 
-def criar_banco():
-    """Cria o banco de dados SQLite na raiz do projeto"""
-    
-    # Obtém o diretório do script atual (raiz do projeto)
-    diretorio_raiz = os.path.dirname(os.path.abspath(__file__))
-    caminho_banco = os.path.join(diretorio_raiz, 'consultor.db')
-    
-    print(f"Criando banco de dados em: {caminho_banco}")
+from esquema_compacto import (
+    COLUNAS_CONTRATO,
+    COLUNAS_DATA,
+    COLUNAS_DIMENSAO,
+    TABELA_COMPACTA,
+    criar_tabelas_compactas,
+    layout_compacto,
+    remover_tabela_antiga,
+    tabela_contratos,
+)
+from normalizacao import chave_numerica, normalizar_texto
+
+# Colunas com busca por prefixo (índice NOCASE em cada uma)
+CAMPOS_BUSCA_PREFIXO = ['contrato', 'cnpj', 'raiz', 'razao_social', 'consultor', 'email']
+
+# Chaves numéricas de busca (somente dígitos, como inteiro) e a coluna de origem
+CHAVES_NUMERICAS = {
+    'contrato_num': 'contrato',
+    'cnpj_num': 'cnpj',
+    'raiz_num': 'raiz',
+}
+
+# Colunas cobertas pelo índice de texto (busca por trecho em qualquer posição)
+COLUNAS_BUSCA_TEXTO = ['razao_social', 'consultor', 'email', 'municipio']
+
+# Colunas da projeção de busca: as exibidas na grade e as chaves numéricas
+COLUNAS_GRADE = [
+    'contrato', 'razao_social', 'cnpj', 'raiz', 'consultor', 'contato',
+    'email', 'municipio', 'estado', 'produto',
+]
+COLUNAS_PROJECAO = COLUNAS_GRADE + list(CHAVES_NUMERICAS)
+
+# Facetas da barra de filtros do app: hierarquia comercial e dimensões de negócio
+COLUNAS_FACETA = [
+    'diretor', 'superintendente', 'gerente_nacional', 'gerente_regional',
+    'consultor', 'estado', 'produto', 'segmento_comercial',
+]
+
+# Resumos da carteira para o painel do app, recalculados a cada sincronização:
+# contratos por valor de cada dimensão, com quantos têm cada indicador marcado
+DIMENSOES_RESUMO = [
+    'consultor', 'estado', 'produto', 'safra',
+    'cancelamento_de_contrato_renegociacao_de_tarifas',
+    'interesse_em_novos_produtos_prospects',
+]
+
+# Valores (sem espaços, em maiúsculas) que contam como indicador marcado
+VALORES_SIM = ('SIM', 'S')
+
+# Layout dos bancos novos: tb_contrato com datas e números como inteiro e as
+# dimensões em tabelas de dicionário (False: tabela antiga, tudo como texto)
+LAYOUT_COMPACTO = True
+
+def criar_tabelas(cursor, compacto=LAYOUT_COMPACTO):
+    """Cria as tabelas do banco, caso ainda não existam"""
     
-    # Conecta ao banco (cria se não existir)
-    conn = sqlite3.connect(caminho_banco)
-    cursor = conn.cursor()
+    # Cria a tabela dos contratos. Bancos novos usam o layout compacto
+    # (tb_contrato, dimensões e a view tb_base_contrato_consultor); bancos
+    # que já têm a tabela antiga ficam com ela até a próxima carga completa
+    existe = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'tb_base_contrato_consultor'"
+    ).fetchone() is not None
+    if layout_compacto(cursor.connection) or (compacto and not existe):
+        criar_tabelas_compactas(cursor, CHAVES_NUMERICAS)
+    elif not existe:
+        cursor.execute(f'''
+            CREATE TABLE tb_base_contrato_consultor (
+                {', '.join(f'{coluna} TEXT' for coluna in COLUNAS_CONTRATO)},
+                {', '.join(f'{chave} INTEGER' for chave in CHAVES_NUMERICAS)}
+            )
+        ''')
     
-    # Cria a tabela tb_base_contrato_consultor
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tb_base_contrato_consultor (
-            data_atualizacao TEXT,
-            contrato TEXT,
-            tipo_mercado TEXT,
-            tipo_venda TEXT,
-            produto TEXT,
-            safra TEXT,
-            dt_safra TEXT,
-            razao_social TEXT,
-            cnpj TEXT,
-            raiz TEXT,
-            municipio TEXT,
-            estado TEXT,
-            grupo_vendedor TEXT,
-            agencia TEXT,
-            cod_cnae TEXT,
-            des_cnae TEXT,
-            cod_setor TEXT,
-            des_setor TEXT,
-            cod_sub_setor TEXT,
-            des_sub_setor TEXT,
-            canal_entrada TEXT,
-            vendedor_pf TEXT,
-            dt_prim_fat TEXT,
-            dt_ult_fat TEXT,
-            forma_pgto TEXT,
-            dias_prazo_pagto TEXT,
-            grupo_rel TEXT,
-            agencia_grupo_rel TEXT,
-            cod_cnae_grupo_rel TEXT,
-            des_cnae_grupo_rel TEXT,
-            cod_setor_grupo_rel TEXT,
-            des_setor_grupo_rel TEXT,
-            cod_sub_setor_grupo_rel TEXT,
-            des_sub_setor_grupo_rel TEXT,
-            segmento_comercial TEXT,
-            segmento_analitycs TEXT,
-            segmento_bradesco TEXT,
-            segmento_bb TEXT,
-            diretor TEXT,
-            superintendente TEXT,
-            gerente_nacional TEXT,
-            gerente_regional TEXT,
-            consultor TEXT,
-            matricula TEXT,
-            email TEXT,
-            contato TEXT,
-            carteira TEXT,
-            id_grupo_rel TEXT,
-            segmento_grupo_rel TEXT,
-            consultor_hunter_auto TEXT,
-            cancelamento_de_contrato_renegociacao_de_tarifas TEXT,
-            interesse_em_novos_produtos_prospects TEXT
+    # Projeção estreita usada pelas buscas: só as colunas da grade e as chaves,
+    # com o id igual ao ROWID da tabela principal. Cada página do arquivo
+    # guarda muito mais linhas do que a tabela de 52 colunas, então cada busca
+    # lê bem menos páginas (o que pesa quando o banco está na rede)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS tb_busca_grade (
+            id INTEGER PRIMARY KEY,
+            {', '.join(f'{coluna} TEXT' for coluna in COLUNAS_GRADE)},
+            {', '.join(f'{chave} INTEGER' for chave in CHAVES_NUMERICAS)}
         )
     ''')
     
-    # Cria índices para melhorar a performance das buscas
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_contrato 
-        ON tb_base_contrato_consultor(contrato)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_cnpj 
-        ON tb_base_contrato_consultor(cnpj)
-    ''')
-    
+    # Facetas: os valores de cada faceta com o total de contratos e, por
+    # faceta, o código do valor de cada linha em um array indexado pelo ROWID
+    # (comprimido; código 0 = sem valor). O app conta e filtra as facetas só
+    # com esses arrays, sem agrupar a tabela a cada clique
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_raiz 
-        ON tb_base_contrato_consultor(raiz)
+        CREATE TABLE IF NOT EXISTS tb_faceta_valor (
+            faceta TEXT,
+            codigo INTEGER,
+            valor TEXT,
+            total INTEGER,
+            PRIMARY KEY (faceta, codigo)
+        ) WITHOUT ROWID
     ''')
-    
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_email 
-        ON tb_base_contrato_consultor(email)
+        CREATE TABLE IF NOT EXISTS tb_faceta_codigos (
+            faceta TEXT PRIMARY KEY,
+            largura INTEGER,
+            linhas INTEGER,
+            codigos BLOB
+        )
     ''')
     
+    # Resumos da carteira: uma linha por valor de cada dimensão (a dimensão
+    # 'total' tem a linha da carteira inteira). Valores vazios ficam como ''
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_razao_social 
-        ON tb_base_contrato_consultor(razao_social)
+        CREATE TABLE IF NOT EXISTS tb_resumo_carteira (
+            dimensao TEXT,
+            valor TEXT,
+            contratos INTEGER,
+            com_cancelamento INTEGER,
+            com_interesse INTEGER,
+            PRIMARY KEY (dimensao, valor)
+        ) WITHOUT ROWID
     ''')
     
     # Cria a tabela de log de importações
@@ -105,11 +130,313 @@ def criar_banco():
             arquivo TEXT,
             registros_inseridos INTEGER,
             registros_atualizados INTEGER,
+            registros_removidos INTEGER,
+            impressao_origem TEXT,
             data_importacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Cria a tabela de controle da sincronização incremental
+    # (hash do conteúdo de cada contrato na última carga e a faixa da origem de onde veio)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tb_hash_contrato (
+            contrato TEXT PRIMARY KEY,
+            hash_linha TEXT,
+            particao INTEGER
+        ) WITHOUT ROWID
+    ''')
+
+    # Cria as tabelas de pontos de retomada da carga completa: a execução, com o
+    # identificador dos dados da origem, e o avanço gravado em cada partição
+    # (limites e última chave sem tipo declarado, para manter o tipo da origem)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tb_sincronizacao_execucao (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            modo TEXT,
+            identificador_origem TEXT,
+            colunas TEXT,
+            registros INTEGER,
+            iniciada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            concluida_em TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tb_sincronizacao_particao (
+            execucao INTEGER,
+            numero INTEGER,
+            inicio,
+            fim,
+            nulos INTEGER,
+            ultima_chave,
+            ultimo_rowid INTEGER,
+            registros INTEGER DEFAULT 0,
+            concluida INTEGER DEFAULT 0,
+            PRIMARY KEY (execucao, numero)
+        ) WITHOUT ROWID
+    ''')
+
+def criar_indices(cursor):
+    """Cria os índices da tabela principal e da projeção de busca, caso ainda não existam"""
+    
+    # Índice exato do contrato (usado pela sincronização incremental)
+    cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_contrato 
+        ON {tabela_contratos(cursor.connection)}(contrato)
+    ''')
+    
+    # Datas do layout compacto (inteiros AAAAMMDD): filtros por período
+    # (BETWEEN) resolvidos pelo índice, sem ler a tabela inteira
+    if layout_compacto(cursor.connection):
+        for coluna in COLUNAS_DATA:
+            cursor.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{coluna}
+                ON {TABELA_COMPACTA}({coluna})
+            ''')
+    
+    _criar_indices_projecao(cursor)
+    
+    # Índices de busca que ficavam na tabela principal, antes da projeção
+    for campo in CAMPOS_BUSCA_PREFIXO:
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{campo}_nocase")
+    for chave in CHAVES_NUMERICAS:
+        cursor.execute(f"DROP INDEX IF EXISTS idx_{chave}")
+    
+    # Índices BINARY de versões anteriores, substituídos pelos índices NOCASE
+    for indice in ['idx_cnpj', 'idx_raiz', 'idx_email', 'idx_razao_social']:
+        cursor.execute(f"DROP INDEX IF EXISTS {indice}")
+    
+    # Índice de texto por trigramas: encontra "PADARIA" em "NOVA PADARIA LTDA".
+    # Guarda os textos já normalizados (sem acento, em maiúsculas) e usa o
+    # ROWID da tabela principal como rowid
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tb_busca_texto 
+        USING fts5({', '.join(COLUNAS_BUSCA_TEXTO)}, tokenize='trigram')
+    ''')
+
+def converter_para_layout_compacto(cursor):
+    """Troca a tabela antiga pelo layout compacto, vazio (usado antes de uma carga completa; não faz commit)"""
+    remover_tabela_antiga(cursor)
+    criar_tabelas_compactas(cursor, CHAVES_NUMERICAS)
+
+def _criar_indices_projecao(cursor):
+    # As buscas por prefixo não diferenciam maiúsculas, então os índices usam
+    # NOCASE; com a collation BINARY o SQLite acabava lendo a tabela inteira.
+    # Os índices têm só o campo (e o ROWID): a faixa e a ordenação por ROWID
+    # são resolvidas sem ler a tabela, que só é lida para as linhas da página.
+    # Índices cobrindo as colunas da grade foram medidos com medir_leitura
+    # (100 mil registros): cada um passa de 1,3-3,7 MB para ~16 MB e a busca
+    # lê mais, não menos (email p50: 532 KB -> 1,5 MB; contrato, média:
+    # 351 KB -> 4,1 MB), porque toda a faixa passa a ser lida nas linhas largas.
+    # WITHOUT ROWID não ajuda: a chave seria o próprio id, a mesma árvore de hoje
+    for campo in CAMPOS_BUSCA_PREFIXO:
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_grade_{campo}_nocase 
+            ON tb_busca_grade({campo} COLLATE NOCASE)
+        ''')
+    
+    # Índices das chaves numéricas: busca exata ou por faixa, independente
+    # da formatação digitada
+    for chave in CHAVES_NUMERICAS:
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_grade_{chave} 
+            ON tb_busca_grade({chave})
+        ''')
+
+def _remover_indices_projecao(cursor):
+    for campo in CAMPOS_BUSCA_PREFIXO:
+        cursor.execute(f"DROP INDEX IF EXISTS idx_grade_{campo}_nocase")
+    for chave in CHAVES_NUMERICAS:
+        cursor.execute(f"DROP INDEX IF EXISTS idx_grade_{chave}")
+
+def _registrar_normalizacao(conn):
+    conn.create_function('normalizar', 1, normalizar_texto, deterministic=True)
+
+def reconstruir_indices_busca(conn):
+    """Reconstrói a projeção de busca e o índice de texto a partir da tabela principal (não faz commit)"""
+    _registrar_normalizacao(conn)
+    cursor = conn.cursor()
+    
+    # Índices da projeção recriados depois da carga, que é mais rápido do que
+    # mantê-los linha a linha
+    _remover_indices_projecao(cursor)
+    cursor.execute("DELETE FROM tb_busca_grade")
+    cursor.execute(f'''
+        INSERT INTO tb_busca_grade (id, {', '.join(COLUNAS_PROJECAO)})
+        SELECT ROWID, {', '.join(COLUNAS_PROJECAO)}
+        FROM tb_base_contrato_consultor
+        ORDER BY ROWID
+    ''')
+    _criar_indices_projecao(cursor)
+    
+    cursor.execute("DELETE FROM tb_busca_texto")
+    cursor.execute(f'''
+        INSERT INTO tb_busca_texto (rowid, {', '.join(COLUNAS_BUSCA_TEXTO)})
+        SELECT ROWID, {', '.join(f'normalizar({coluna})' for coluna in COLUNAS_BUSCA_TEXTO)}
+        FROM tb_base_contrato_consultor
+    ''')
+    cursor.execute("INSERT INTO tb_busca_texto (tb_busca_texto) VALUES ('optimize')")
+    
+    reconstruir_facetas(conn)
+    reconstruir_resumos(conn)
+
+def reconstruir_resumos(conn):
+    """Recalcula os resumos da carteira (não faz commit)
+
+    São os únicos agrupamentos da tabela inteira: o painel do app só lê o
+    resultado, do tamanho da quantidade de valores de cada dimensão.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM tb_resumo_carteira")
+    sim = ', '.join('?' for _ in VALORES_SIM)
+    indicadores = ', '.join(
+        f"SUM(COALESCE(UPPER(TRIM({coluna})) IN ({sim}), 0))"
+        for coluna in ('cancelamento_de_contrato_renegociacao_de_tarifas', 'interesse_em_novos_produtos_prospects')
+    )
+    for dimensao in DIMENSOES_RESUMO:
+        cursor.execute(f'''
+            INSERT INTO tb_resumo_carteira (dimensao, valor, contratos, com_cancelamento, com_interesse)
+            SELECT ?, COALESCE(CAST({dimensao} AS TEXT), ''), COUNT(*), {indicadores}
+            FROM tb_base_contrato_consultor
+            GROUP BY 2
+        ''', (dimensao, *VALORES_SIM * 2))
+    # A carteira inteira é a soma dos valores de qualquer dimensão
+    cursor.execute('''
+        INSERT INTO tb_resumo_carteira (dimensao, valor, contratos, com_cancelamento, com_interesse)
+        SELECT 'total', '', COALESCE(SUM(contratos), 0), COALESCE(SUM(com_cancelamento), 0), COALESCE(SUM(com_interesse), 0)
+        FROM tb_resumo_carteira
+        WHERE dimensao = ?
+    ''', (DIMENSOES_RESUMO[0],))
+
+def reconstruir_facetas(conn):
+    """Recalcula os valores, os totais e os códigos por ROWID de cada faceta (não faz commit)"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM tb_faceta_valor")
+    cursor.execute("DELETE FROM tb_faceta_codigos")
+    linhas = (cursor.execute("SELECT MAX(ROWID) FROM tb_base_contrato_consultor").fetchone()[0] or 0) + 1
+    for faceta in COLUNAS_FACETA:
+        codigos_valor = {}
+        totais = [0]
+        codigos = array('I', bytes(4 * linhas))
+        for rowid, valor in conn.execute(f'''
+            SELECT ROWID, {faceta} FROM tb_base_contrato_consultor WHERE {faceta} IS NOT NULL
+        '''):
+            codigo = codigos_valor.get(valor)
+            if codigo is None:
+                codigo = codigos_valor[valor] = len(totais)
+                totais.append(0)
+            codigos[rowid] = codigo
+            totais[codigo] += 1
+        
+        # 2 bytes por linha enquanto couber (o consultor tem poucos milhares de valores)
+        if len(totais) <= 0xFFFF:
+            codigos = array('H', codigos)
+        if sys.byteorder == 'big':
+            codigos.byteswap()
+        cursor.executemany(
+            "INSERT INTO tb_faceta_valor (faceta, codigo, valor, total) VALUES (?, ?, ?, ?)",
+            ((faceta, codigo, valor, totais[codigo]) for valor, codigo in codigos_valor.items()),
+        )
+        cursor.execute(
+            "INSERT INTO tb_faceta_codigos (faceta, largura, linhas, codigos) VALUES (?, ?, ?, ?)",
+            (faceta, codigos.itemsize, linhas, zlib.compress(codigos.tobytes())),
+        )
+
+def atualizar_indices_busca(conn, contratos):
+    """Atualiza a projeção de busca e o índice de texto apenas para os contratos informados (não faz commit)"""
+    _registrar_normalizacao(conn)
+    cursor = conn.cursor()
+    parametros = [(contrato,) for contrato in contratos]
+    remover_indices_busca(conn, contratos)
+    cursor.executemany(f'''
+        INSERT INTO tb_busca_texto (rowid, {', '.join(COLUNAS_BUSCA_TEXTO)})
+        SELECT ROWID, {', '.join(f'normalizar({coluna})' for coluna in COLUNAS_BUSCA_TEXTO)}
+        FROM tb_base_contrato_consultor
+        WHERE contrato = ?
+    ''', parametros)
+    cursor.executemany(f'''
+        INSERT INTO tb_busca_grade (id, {', '.join(COLUNAS_PROJECAO)})
+        SELECT ROWID, {', '.join(COLUNAS_PROJECAO)}
+        FROM tb_base_contrato_consultor
+        WHERE contrato = ?
+    ''', parametros)
+
+def remover_indices_busca(conn, contratos):
+    """Remove da projeção e do índice de texto os contratos informados, antes de apagá-los da tabela principal"""
+    parametros = [(contrato,) for contrato in contratos]
+    conn.executemany('''
+        DELETE FROM tb_busca_texto
+        WHERE rowid IN (SELECT ROWID FROM tb_base_contrato_consultor WHERE contrato = ?)
+    ''', parametros)
+    conn.executemany('''
+        DELETE FROM tb_busca_grade
+        WHERE id IN (SELECT ROWID FROM tb_base_contrato_consultor WHERE contrato = ?)
+    ''', parametros)
+
+def garantir_indices_busca(conn):
+    """Cria os índices de busca que faltarem e preenche a projeção, o índice de texto, as facetas e os resumos se estiverem vazios"""
+    cursor = conn.cursor()
+    criar_indices(cursor)
+    vazio = (
+        cursor.execute("SELECT 1 FROM tb_busca_texto LIMIT 1").fetchone() is None
+        or cursor.execute("SELECT 1 FROM tb_busca_grade LIMIT 1").fetchone() is None
+    )
+    tem_dados = cursor.execute("SELECT 1 FROM tb_base_contrato_consultor LIMIT 1").fetchone() is not None
+    if vazio and tem_dados:
+        print("Construindo índices de busca...")
+        reconstruir_indices_busca(conn)
+    elif tem_dados:
+        if cursor.execute("SELECT 1 FROM tb_faceta_codigos LIMIT 1").fetchone() is None:
+            print("Construindo facetas...")
+            reconstruir_facetas(conn)
+        if cursor.execute("SELECT 1 FROM tb_resumo_carteira LIMIT 1").fetchone() is None:
+            print("Construindo resumos da carteira...")
+            reconstruir_resumos(conn)
+    conn.commit()
+
+def atualizar_estrutura(conn):
+    """Aplica em bancos já existentes as tabelas e colunas criadas em versões mais novas"""
+    cursor = conn.cursor()
+    criar_tabelas(cursor)
+    
+    colunas_log = [linha[1] for linha in cursor.execute("PRAGMA table_info(log_importacoes)")]
+    if 'registros_removidos' not in colunas_log:
+        cursor.execute("ALTER TABLE log_importacoes ADD COLUMN registros_removidos INTEGER")
+    if 'impressao_origem' not in colunas_log:
+        cursor.execute("ALTER TABLE log_importacoes ADD COLUMN impressao_origem TEXT")
+    
+    colunas_hash = [linha[1] for linha in cursor.execute("PRAGMA table_info(tb_hash_contrato)")]
+    if 'particao' not in colunas_hash:
+        cursor.execute("ALTER TABLE tb_hash_contrato ADD COLUMN particao INTEGER")
+    
+    colunas_base = [linha[1] for linha in cursor.execute("PRAGMA table_info(tb_base_contrato_consultor)")]
+    faltando = [chave for chave in CHAVES_NUMERICAS if chave not in colunas_base]
+    if faltando:
+        for chave in faltando:
+            cursor.execute(f"ALTER TABLE tb_base_contrato_consultor ADD COLUMN {chave} INTEGER")
+        # Preenche as chaves dos registros que já estavam no banco
+        conn.create_function('chave_numerica', 1, chave_numerica, deterministic=True)
+        cursor.execute(f'''
+            UPDATE tb_base_contrato_consultor
+            SET {', '.join(f'{chave} = chave_numerica({CHAVES_NUMERICAS[chave]})' for chave in faltando)}
+        ''')
+    
     conn.commit()
+
+def criar_banco():
+    """Cria o banco de dados SQLite na raiz do projeto"""
+    
+    # Obtém o diretório do script atual (raiz do projeto)
+    diretorio_raiz = os.path.dirname(os.path.abspath(__file__))
+    caminho_banco = os.path.join(diretorio_raiz, 'consultor.db')
+    
+    print(f"Criando banco de dados em: {caminho_banco}")
+    
+    # Conecta ao banco (cria se não existir)
+    conn = sqlite3.connect(caminho_banco)
+    cursor = conn.cursor()
+    
+    atualizar_estrutura(conn)
+    garantir_indices_busca(conn)
     
     # Verifica quantos registros existem
     cursor.execute('SELECT COUNT(*) FROM tb_base_contrato_consultor')
@@ -118,8 +445,12 @@ def criar_banco():
     print(f"\n{'='*60}")
     print(f"✓ Banco de dados criado com sucesso!")
     print(f"✓ Tabela: tb_base_contrato_consultor")
-    print(f"✓ Total de colunas: 51")
-    print(f"✓ Índices criados para: contrato, cnpj, raiz, email, razao_social")
+    print(f"✓ Total de colunas: {len(COLUNAS_CONTRATO)}")
+    if layout_compacto(conn):
+        print(f"✓ Layout compacto: tb_contrato + {len(COLUNAS_DIMENSAO)} tabelas de dimensão (tb_dim_*), "
+              f"{len(COLUNAS_DATA)} datas como inteiro AAAAMMDD (com índice)")
+    print(f"✓ Projeção de busca (tb_busca_grade) com índices para: {', '.join(CAMPOS_BUSCA_PREFIXO)}")
+    print(f"✓ Índice de texto (trigramas) para: {', '.join(COLUNAS_BUSCA_TEXTO)}")
     print(f"✓ Total de registros no banco: {total}")
     print(f"\nArquivo criado: consultor.db")
     print(f"Localização: {caminho_banco}")
@@ -0,0 +1,111 @@
+import flet as ft
+
+# Largura do painel lateral de detalhes
+LARGURA_PAINEL = 420
+
+# Campos do registro agrupados para o painel (rótulo exibido para cada coluna).
+# Colunas que não aparecem aqui são mostradas em "Outros"
+SECOES_DETALHE = [
+    ("Contrato", [
+        ('contrato', "Contrato"),
+        ('produto', "Produto"),
+        ('tipo_mercado', "Tipo de mercado"),
+        ('tipo_venda', "Tipo de venda"),
+        ('safra', "Safra"),
+        ('dt_safra', "Data da safra"),
+        ('canal_entrada', "Canal de entrada"),
+        ('vendedor_pf', "Vendedor PF"),
+        ('data_atualizacao', "Atualizado em"),
+    ]),
+    ("Empresa", [
+        ('razao_social', "Razão social"),
+        ('cnpj', "CNPJ"),
+        ('raiz', "Raiz CNPJ"),
+        ('municipio', "Cidade"),
+        ('estado', "Estado"),
+        ('contato', "Contato"),
+        ('agencia', "Agência"),
+    ]),
+    ("Hierarquia comercial", [
+        ('diretor', "Diretor"),
+        ('superintendente', "Superintendente"),
+        ('gerente_nacional', "Gerente nacional"),
+        ('gerente_regional', "Gerente regional"),
+        ('consultor', "Consultor"),
+        ('matricula', "Matrícula"),
+        ('email', "E-mail"),
+        ('carteira', "Carteira"),
+        ('grupo_vendedor', "Grupo vendedor"),
+        ('consultor_hunter_auto', "Hunter/Auto"),
+    ]),
+    ("Segmentos", [
+        ('segmento_comercial', "Comercial"),
+        ('segmento_analitycs', "Analytics"),
+        ('segmento_bradesco', "Bradesco"),
+        ('segmento_bb', "Banco do Brasil"),
+    ]),
+    ("Atividade", [
+        ('cod_cnae', "CNAE"),
+        ('des_cnae', "Descrição CNAE"),
+        ('cod_setor', "Setor"),
+        ('des_setor', "Descrição setor"),
+        ('cod_sub_setor', "Subsetor"),
+        ('des_sub_setor', "Descrição subsetor"),
+    ]),
+    ("Faturamento", [
+        ('dt_prim_fat', "Primeiro faturamento"),
+        ('dt_ult_fat', "Último faturamento"),
+        ('forma_pgto', "Forma de pagamento"),
+        ('dias_prazo_pagto', "Prazo de pagamento (dias)"),
+    ]),
+    ("Grupo de relacionamento", [
+        ('grupo_rel', "Grupo"),
+        ('id_grupo_rel', "ID do grupo"),
+        ('segmento_grupo_rel', "Segmento"),
+        ('agencia_grupo_rel', "Agência"),
+        ('cod_cnae_grupo_rel', "CNAE"),
+        ('des_cnae_grupo_rel', "Descrição CNAE"),
+        ('cod_setor_grupo_rel', "Setor"),
+        ('des_setor_grupo_rel', "Descrição setor"),
+        ('cod_sub_setor_grupo_rel', "Subsetor"),
+        ('des_sub_setor_grupo_rel', "Descrição subsetor"),
+    ]),
+    ("Relacionamento", [
+        ('cancelamento_de_contrato_renegociacao_de_tarifas', "Cancelamento / renegociação de tarifas"),
+        ('interesse_em_novos_produtos_prospects', "Interesse em novos produtos"),
+    ]),
+]
+
+
+def _campo(rotulo, valor, copiar):
+    return ft.Container(
+        padding=ft.padding.symmetric(vertical=3),
+        on_click=lambda e: copiar(e, valor) if valor else None,
+        content=ft.Column(
+            spacing=0,
+            controls=[
+                ft.Text(rotulo, size=11, color=ft.Colors.GREY_700),
+                ft.Text(str(valor) if valor not in (None, '') else "—", size=13),
+            ],
+        ),
+    )
+
+
+def criar_conteudo(registro, copiar):
+    """Controles do painel com todos os campos do registro, agrupados por seção"""
+    controles = []
+    secoes = list(SECOES_DETALHE)
+    agrupadas = {coluna for _, campos in secoes for coluna, _ in campos}
+    outras = [(coluna, coluna) for coluna in registro if coluna not in agrupadas]
+    if outras:
+        secoes.append(("Outros", outras))
+
+    for titulo, campos in secoes:
+        campos = [(coluna, rotulo) for coluna, rotulo in campos if coluna in registro]
+        if not campos:
+            continue
+        controles.append(ft.Text(titulo, size=14, weight="bold", color=ft.Colors.BLUE_800))
+        for coluna, rotulo in campos:
+            controles.append(_campo(rotulo, registro[coluna], copiar))
+        controles.append(ft.Divider(height=10))
+    return controles
@@ -0,0 +1,277 @@
+import math
+import re
+from datetime import date, datetime
+
+# Nome que os leitores usam: tabela no layout antigo, view no layout compacto
+TABELA_CONSULTA = 'tb_base_contrato_consultor'
+
+# Tabela física do layout compacto
+TABELA_COMPACTA = 'tb_contrato'
+
+# As 52 colunas da origem, na ordem da tabela
+COLUNAS_CONTRATO = [
+    'data_atualizacao', 'contrato', 'tipo_mercado', 'tipo_venda', 'produto',
+    'safra', 'dt_safra', 'razao_social', 'cnpj', 'raiz', 'municipio', 'estado',
+    'grupo_vendedor', 'agencia', 'cod_cnae', 'des_cnae', 'cod_setor',
+    'des_setor', 'cod_sub_setor', 'des_sub_setor', 'canal_entrada',
+    'vendedor_pf', 'dt_prim_fat', 'dt_ult_fat', 'forma_pgto',
+    'dias_prazo_pagto', 'grupo_rel', 'agencia_grupo_rel', 'cod_cnae_grupo_rel',
+    'des_cnae_grupo_rel', 'cod_setor_grupo_rel', 'des_setor_grupo_rel',
+    'cod_sub_setor_grupo_rel', 'des_sub_setor_grupo_rel', 'segmento_comercial',
+    'segmento_analitycs', 'segmento_bradesco', 'segmento_bb', 'diretor',
+    'superintendente', 'gerente_nacional', 'gerente_regional', 'consultor',
+    'matricula', 'email', 'contato', 'carteira', 'id_grupo_rel',
+    'segmento_grupo_rel', 'consultor_hunter_auto',
+    'cancelamento_de_contrato_renegociacao_de_tarifas',
+    'interesse_em_novos_produtos_prospects',
+]
+
+# Datas gravadas como inteiro AAAAMMDD: ordenáveis e filtráveis por faixa
+# (BETWEEN) com índice, em 4 bytes em vez de 10 caracteres
+COLUNAS_DATA = ['data_atualizacao', 'dt_safra', 'dt_prim_fat', 'dt_ult_fat']
+
+# Números que a origem entrega como texto: a afinidade INTEGER da coluna
+# converte o texto na gravação ('45' vira 45; textos não numéricos ficam como vieram)
+COLUNAS_INTEIRAS = ['safra', 'dias_prazo_pagto']
+
+# Dimensões com poucos valores distintos: cada valor fica uma vez em
+# tb_dim_<coluna> e a linha guarda só o id (<coluna>_id)
+COLUNAS_DIMENSAO = [
+    'tipo_mercado', 'tipo_venda', 'produto', 'municipio', 'estado',
+    'grupo_vendedor', 'des_cnae', 'des_setor', 'des_sub_setor', 'canal_entrada',
+    'forma_pgto', 'des_cnae_grupo_rel', 'des_setor_grupo_rel',
+    'des_sub_setor_grupo_rel', 'segmento_comercial', 'segmento_analitycs',
+    'segmento_bradesco', 'segmento_bb', 'diretor', 'superintendente',
+    'gerente_nacional', 'gerente_regional', 'consultor', 'segmento_grupo_rel',
+    'consultor_hunter_auto', 'cancelamento_de_contrato_renegociacao_de_tarifas',
+    'interesse_em_novos_produtos_prospects',
+]
+
+_DATA_ISO = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[ T]00:00(?::00(?:\.0+)?)?)?')
+_DATA_BR = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+
+
+def tabela_dimensao(coluna):
+    return f'tb_dim_{coluna}'
+
+
+def coluna_fisica(coluna):
+    """Nome da coluna em tb_contrato (as dimensões guardam o id do valor)"""
+    return f'{coluna}_id' if coluna in COLUNAS_DIMENSAO else coluna
+
+
+def data_inteira(valor):
+    """Data como inteiro AAAAMMDD
+
+    Aceita date/datetime (à meia-noite), 'AAAA-MM-DD' e 'DD/MM/AAAA'. Qualquer
+    outro valor (datas inválidas, horários) é mantido como veio, para não
+    perder informação.
+    """
+    if isinstance(valor, date):
+        if isinstance(valor, datetime) and valor.time() != datetime.min.time():
+            return valor
+        return valor.year * 10000 + valor.month * 100 + valor.day
+    if not isinstance(valor, str):
+        return valor
+    achado = _DATA_ISO.fullmatch(valor)
+    if achado:
+        ano, mes, dia = achado.groups()
+    else:
+        achado = _DATA_BR.fullmatch(valor)
+        if not achado:
+            return valor
+        dia, mes, ano = achado.groups()
+    try:
+        date(int(ano), int(mes), int(dia))
+    except ValueError:
+        return valor
+    return int(ano + mes + dia)
+
+
+def inteiro_gravado(valor):
+    """Valor como a afinidade INTEGER o grava: texto numérico vira número ('045' e '45.0' viram 45)"""
+    if not isinstance(valor, str) or '_' in valor:
+        return valor
+    texto = valor.strip()
+    try:
+        return int(texto)
+    except ValueError:
+        pass
+    try:
+        numero = float(texto)
+    except ValueError:
+        return valor
+    if not math.isfinite(numero):
+        return valor
+    return int(numero) if numero.is_integer() else numero
+
+
+def layout_compacto(conn):
+    """Indica se o banco usa o layout compacto (tb_contrato + dimensões + view)"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABELA_COMPACTA,)
+    ).fetchone() is not None
+
+
+def tabela_contratos(conn):
+    """Tabela física dos contratos: a que recebe as gravações e os índices"""
+    return TABELA_COMPACTA if layout_compacto(conn) else TABELA_CONSULTA
+
+
+def _expressao_view(coluna):
+    if coluna in COLUNAS_DIMENSAO:
+        return f"(SELECT valor FROM {tabela_dimensao(coluna)} WHERE id = c.{coluna}_id) AS {coluna}"
+    if coluna in COLUNAS_DATA:
+        return (
+            f"CASE WHEN typeof(c.{coluna}) = 'integer' "
+            f"THEN printf('%04d-%02d-%02d', c.{coluna} / 10000, c.{coluna} / 100 % 100, c.{coluna} % 100) "
+            f"ELSE c.{coluna} END AS {coluna}"
+        )
+    return f"c.{coluna}"
+
+
+def criar_tabelas_compactas(cursor, chaves_numericas):
+    """Cria as dimensões, a tabela tb_contrato e a view tb_base_contrato_consultor
+
+    A view mantém os nomes e a ordem das colunas da tabela antiga, com as
+    datas em ISO (AAAA-MM-DD) e os valores das dimensões, e expõe o id de
+    tb_contrato como rowid: as consultas por ROWID continuam iguais e usam a
+    chave primária.
+    """
+    for coluna in COLUNAS_DIMENSAO:
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {tabela_dimensao(coluna)} (
+                id INTEGER PRIMARY KEY,
+                valor TEXT NOT NULL UNIQUE
+            )
+        ''')
+
+    definicoes = []
+    for coluna in COLUNAS_CONTRATO:
+        if coluna in COLUNAS_DIMENSAO:
+            definicoes.append(f"{coluna}_id INTEGER REFERENCES {tabela_dimensao(coluna)}(id)")
+        elif coluna in COLUNAS_DATA or coluna in COLUNAS_INTEIRAS:
+            definicoes.append(f"{coluna} INTEGER")
+        else:
+            definicoes.append(f"{coluna} TEXT")
+    definicoes += [f"{chave} INTEGER" for chave in chaves_numericas]
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABELA_COMPACTA} (
+            id INTEGER PRIMARY KEY,
+            {', '.join(definicoes)}
+        )
+    ''')
+
+    cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS {TABELA_CONSULTA} AS
+        SELECT c.id AS rowid,
+               {', '.join(_expressao_view(coluna) for coluna in COLUNAS_CONTRATO)},
+               {', '.join(f'c.{chave}' for chave in chaves_numericas)}
+        FROM {TABELA_COMPACTA} AS c
+    ''')
+
+
+def remover_tabela_antiga(cursor):
+    """Apaga a tabela do layout antigo (e seus índices) para dar lugar ao layout compacto. Não confirma a transação."""
+    cursor.execute(f"DROP TABLE IF EXISTS {TABELA_CONSULTA}")
+
+
+def limpar_contratos(cursor):
+    """Apaga todos os contratos (e, no layout compacto, os valores das dimensões)"""
+    if layout_compacto(cursor.connection):
+        cursor.execute(f"DELETE FROM {TABELA_COMPACTA}")
+        for coluna in COLUNAS_DIMENSAO:
+            cursor.execute(f"DELETE FROM {tabela_dimensao(coluna)}")
+    else:
+        cursor.execute(f"DELETE FROM {TABELA_CONSULTA}")
+
+
+class GravadorContratos:
+    """SQL de gravação dos contratos e conversão das linhas para o layout do banco
+
+    No layout compacto as linhas vão para tb_contrato: datas como inteiro
+    AAAAMMDD e dimensões como o id do valor. Valores
+    novos de uma dimensão são cadastrados na transação de quem grava. Em
+    bancos no layout antigo, as linhas são gravadas como vieram.
+
+    `colunas` são as colunas gravadas (as da origem e as chaves numéricas).
+    """
+
+    def __init__(self, conn, colunas):
+        self.conn = conn
+        self.compacto = layout_compacto(conn)
+        self.tabela = TABELA_COMPACTA if self.compacto else TABELA_CONSULTA
+        self._ids = {}
+        if self.compacto:
+            self.colunas = [coluna_fisica(coluna) for coluna in colunas]
+            # Só as colunas que mudam de forma: (posição, função)
+            conversores = [(posicao, self._conversor(coluna)) for posicao, coluna in enumerate(colunas)]
+            self._conversores = [(posicao, conversor) for posicao, conversor in conversores if conversor is not None]
+            self._normalizadores = [
+                (posicao, data_inteira if coluna in COLUNAS_DATA else inteiro_gravado)
+                for posicao, coluna in enumerate(colunas)
+                if coluna in COLUNAS_DATA or coluna in COLUNAS_INTEIRAS
+            ]
+        else:
+            self.colunas = list(colunas)
+            self._conversores = None
+            self._normalizadores = None
+
+        placeholders = ','.join('?' for _ in self.colunas)
+        self.sql_inserir = f"INSERT INTO {self.tabela} ({','.join(self.colunas)}) VALUES ({placeholders})"
+        self.sql_atualizar = (
+            f"UPDATE {self.tabela} SET {', '.join(f'{coluna} = ?' for coluna in self.colunas)} WHERE contrato = ?"
+        )
+        self.sql_remover = f"DELETE FROM {self.tabela} WHERE contrato = ?"
+
+    def _conversor(self, coluna):
+        if coluna in COLUNAS_DATA:
+            return data_inteira
+        if coluna in COLUNAS_DIMENSAO:
+            return self._conversor_dimensao(coluna)
+        return None
+
+    def _conversor_dimensao(self, coluna):
+        ids = self._ids.get(coluna)
+        if ids is None:
+            ids = self._ids[coluna] = dict(self.conn.execute(f"SELECT valor, id FROM {tabela_dimensao(coluna)}"))
+        inserir = f"INSERT INTO {tabela_dimensao(coluna)} (valor) VALUES (?)"
+
+        def converter(valor):
+            if valor is None:
+                return None
+            id_valor = ids.get(valor)
+            if id_valor is None:
+                # A coluna valor é TEXT: 15 e '15' são o mesmo valor da dimensão
+                valor = str(valor)
+                id_valor = ids.get(valor)
+                if id_valor is None:
+                    id_valor = ids[valor] = self.conn.execute(inserir, (valor,)).lastrowid
+            return id_valor
+
+        return converter
+
+    def forma_lida(self, linha):
+        """Linha da origem na forma em que volta da leitura de tb_base_contrato_consultor
+
+        Usada no hash de alterações, para que a linha da origem e a mesma
+        linha lida do banco tenham o mesmo hash. No layout compacto as datas
+        voltam em ISO e as colunas inteiras sem zeros à esquerda: os dois
+        lados passam pela mesma conversão da gravação (datas como AAAAMMDD,
+        números como a afinidade INTEGER).
+        """
+        if self._normalizadores is None:
+            return linha
+        valores = list(linha)
+        for posicao, normalizar in self._normalizadores:
+            valores[posicao] = normalizar(valores[posicao])
+        return tuple(valores)
+
+    def converter(self, linha):
+        """Linha pronta para sql_inserir (e, seguida do contrato, para sql_atualizar)"""
+        if self._conversores is None:
+            return tuple(linha)
+        valores = list(linha)
+        for posicao, conversor in self._conversores:
+            valores[posicao] = conversor(valores[posicao])
+        return tuple(valores)
@@ -0,0 +1,92 @@
+import time
+
+import consulta_dados
+import metricas
+
+# Linhas lidas do cursor e gravadas por vez
+TAMANHO_BLOCO = 2000
+
+# Intervalo mínimo entre dois avisos de progresso (segundos)
+INTERVALO_PROGRESSO = 0.2
+
+# Cabeçalho do arquivo com as colunas da grade
+CABECALHO_GRADE = [
+    'id', 'contrato', 'razao_social', 'cnpj', 'raiz', 'consultor',
+    'contato', 'email', 'municipio', 'estado', 'produto',
+]
+
+
+def colunas_registro(conn):
+    """Colunas do registro completo, na ordem da tabela (sem as colunas internas de busca)"""
+    return [
+        coluna[1] for coluna in conn.execute("PRAGMA table_info(tb_base_contrato_consultor)")
+        if coluna[1] not in consulta_dados.COLUNAS_INTERNAS
+    ]
+
+
+def _linhas_completas(conn, bloco, colunas):
+    registros = consulta_dados.buscar_registros(conn, [linha[0] for linha in bloco])
+    return [
+        [linha[0], *(registros.get(linha[0], {}).get(coluna) for coluna in colunas)]
+        for linha in bloco
+    ]
+
+
+def exportar_busca(conn, filtro, campo_filtro, escritor, completo=False, progresso=None, cancelado=None,
+                   permitido=None, primeiras=None):
+    """Grava no escritor todos os resultados da busca, sem o limite de páginas da grade
+
+    Usa a mesma consulta da grade, sem limite, e lê o cursor em blocos: a
+    memória usada não depende do tamanho do resultado. Com `completo`, grava
+    todas as colunas de cada registro no lugar das colunas da grade.
+    `progresso(gravados)` é chamado ao longo da gravação e `cancelado()`, se
+    retornar True, interrompe a exportação. `permitido(rowid)`, se informado,
+    restringe o arquivo às linhas aceitas (as facetas selecionadas na grade),
+    inclusive as `primeiras`. `primeiras`, se informadas, são linhas da grade
+    gravadas antes do resultado da consulta, que não as repete (a carteira do
+    usuário).
+
+    Retorna (registros gravados, se foi cancelada).
+    """
+    # LIMIT -1 no SQLite é "sem limite"
+    sql, parametros = consulta_dados.montar_consulta(filtro, campo_filtro, limite=-1)
+    cursor = conn.cursor()
+    with metricas.medir('exportacao.sql'):
+        cursor.execute(sql, parametros)
+
+    colunas = colunas_registro(conn) if completo else None
+    escritor.escrever_linhas([['id', *colunas] if completo else CABECALHO_GRADE])
+
+    primeiras = [linha for linha in primeiras or [] if permitido is None or permitido(linha[0])]
+    ja_gravadas = {linha[0] for linha in primeiras}
+    gravados = 0
+    ultimo_aviso = 0.0
+    try:
+        while True:
+            if cancelado is not None and cancelado():
+                return gravados, True
+            with metricas.medir('exportacao.bloco'):
+                if gravados < len(primeiras):
+                    bloco = primeiras[gravados:gravados + TAMANHO_BLOCO]
+                else:
+                    bloco = cursor.fetchmany(TAMANHO_BLOCO)
+                    if not bloco:
+                        break
+                    if permitido is not None or ja_gravadas:
+                        bloco = [
+                            linha for linha in bloco
+                            if linha[0] not in ja_gravadas and (permitido is None or permitido(linha[0]))
+                        ]
+                escritor.escrever_linhas(_linhas_completas(conn, bloco, colunas) if completo else bloco)
+            gravados += len(bloco)
+
+            agora = time.perf_counter()
+            if progresso is not None and agora - ultimo_aviso >= INTERVALO_PROGRESSO:
+                ultimo_aviso = agora
+                progresso(gravados)
+    finally:
+        cursor.close()
+
+    if progresso is not None:
+        progresso(gravados)
+    return gravados, False
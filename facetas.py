@@ -0,0 +1,245 @@
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import metricas
+from consulta_dados import buscar_pagina_filtrada, buscar_por_rowids
+from criar_banco import COLUNAS_FACETA
+
+# Rótulos da barra de filtros, na ordem da hierarquia
+ROTULOS = {
+    'diretor': 'Diretor',
+    'superintendente': 'Superintendente',
+    'gerente_nacional': 'Gerente nacional',
+    'gerente_regional': 'Gerente regional',
+    'consultor': 'Consultor',
+    'estado': 'Estado',
+    'produto': 'Produto',
+    'segmento_comercial': 'Segmento comercial',
+}
+
+
+def disponivel():
+    """Indica se o NumPy está instalado (sem ele a barra de facetas não aparece)"""
+    return np is not None
+
+
+def chave_selecao(selecao):
+    """Forma canônica de {faceta: valor}, usada na chave do cache de buscas"""
+    return tuple(sorted((faceta, valor) for faceta, valor in selecao.items() if valor is not None))
+
+
+class IndiceFacetas:
+    """Códigos das facetas de uma versão do banco, lidos das tabelas montadas na sincronização
+
+    Cada faceta é um array com o código do valor de cada linha, indexado pelo
+    ROWID (0 = sem valor), e a lista dos valores com o total de contratos.
+    Filtrar é comparar arrays e contar é um bincount das linhas filtradas:
+    nenhuma consulta agrupa a tabela.
+
+    As seleções são {faceta: valor}: os códigos mudam a cada sincronização,
+    os valores continuam valendo na versão seguinte.
+    """
+
+    def __init__(self, versao):
+        self.versao = versao
+        self.codigos = {}
+        self.valores = {}
+        self.codigos_valor = {}
+        self.totais = {}
+        self.tempo_construcao = 0.0
+
+    @classmethod
+    def carregar(cls, conn, versao):
+        """Lê as facetas da versão aberta em `conn` (None se o banco ainda não tiver facetas)"""
+        inicio = time.perf_counter()
+        indice = cls(versao)
+        for faceta, largura, codigos in conn.execute("SELECT faceta, largura, codigos FROM tb_faceta_codigos"):
+            if faceta not in COLUNAS_FACETA:
+                continue
+            indice.codigos[faceta] = np.frombuffer(zlib.decompress(codigos), dtype=f'<u{largura}')
+            indice.valores[faceta] = {}
+            indice.codigos_valor[faceta] = {}
+        if not indice.codigos:
+            return None
+        totais = {faceta: {} for faceta in indice.codigos}
+        for faceta, codigo, valor, total in conn.execute("SELECT faceta, codigo, valor, total FROM tb_faceta_valor"):
+            if faceta in totais:
+                indice.valores[faceta][codigo] = valor
+                indice.codigos_valor[faceta][valor] = codigo
+                totais[faceta][codigo] = total
+        for faceta, por_codigo in totais.items():
+            indice.totais[faceta] = np.zeros(max(por_codigo, default=0) + 1, dtype=np.int64)
+            indice.totais[faceta][list(por_codigo)] = list(por_codigo.values())
+        indice.tempo_construcao = time.perf_counter() - inicio
+        return indice
+
+    def bytes_usados(self):
+        return sum(codigos.nbytes for codigos in self.codigos.values())
+
+    def mascara(self, selecao, exceto=None):
+        """Linhas (array booleano por ROWID) que atendem a todas as facetas selecionadas
+
+        None quando nenhuma faceta (além de `exceto`) está selecionada.
+        """
+        mascara = None
+        for faceta, valor in selecao.items():
+            if valor is None or faceta == exceto or faceta not in self.codigos:
+                continue
+            # Um valor que não existe nesta versão não atende nenhuma linha (código -1)
+            atende = self.codigos[faceta] == self.codigos_valor[faceta].get(valor, -1)
+            mascara = atende if mascara is None else mascara & atende
+        return mascara
+
+    def permitido(self, selecao):
+        """Função rowid -> bool das linhas que atendem às facetas (None se nenhuma estiver selecionada)"""
+        mascara = self.mascara(selecao)
+        if mascara is None:
+            return None
+        return lambda rowid: rowid < len(mascara) and bool(mascara[rowid])
+
+    def contagens(self, selecao):
+        """Contratos por valor de cada faceta, dentro das seleções das outras facetas
+
+        Retorna {faceta: array de totais indexado pelo código}. Uma faceta
+        selecionada mostra as alternativas a ela (as outras seleções valem),
+        para que seja possível trocar o valor sem limpar o filtro.
+        """
+        contagens = {}
+        comum = self.mascara(selecao)
+        for faceta, codigos in self.codigos.items():
+            tamanho = len(self.totais[faceta])
+            mascara = self.mascara(selecao, exceto=faceta) if selecao.get(faceta) is not None else comum
+            if mascara is None:
+                contagens[faceta] = self.totais[faceta]
+            else:
+                contagens[faceta] = np.bincount(codigos[mascara], minlength=tamanho)[:tamanho]
+        return contagens
+
+    def opcoes(self, faceta, contagens, limite=None):
+        """(valor, contratos) dos valores com contratos, do mais frequente para o menos"""
+        totais = contagens[faceta]
+        codigos = np.flatnonzero(totais)
+        codigos = codigos[np.argsort(-totais[codigos], kind='stable')]
+        if limite is not None:
+            codigos = codigos[:limite]
+        valores = self.valores[faceta]
+        return [(valores.get(int(codigo), ''), int(totais[codigo])) for codigo in codigos]
+
+    def total(self, selecao):
+        """Contratos que atendem às facetas selecionadas"""
+        mascara = self.mascara(selecao)
+        if mascara is None:
+            return int(self.totais[COLUNAS_FACETA[0]].sum()) if self.totais else 0
+        return int(np.count_nonzero(mascara))
+
+    def buscar_pagina(self, conn, selecao, filtro, campo_filtro, apos=None, limite=100, indice_texto=None):
+        """Página da busca restrita às facetas selecionadas (mesmo formato de consulta_dados.buscar_pagina)
+
+        Sem filtro de texto, os ROWIDs saem direto da máscara. Com filtro, as
+        linhas encontradas pelo índice em memória (quando ele responde a
+        busca) ou pelo SQL são cortadas pela máscara. Retorna None quando
+        nenhuma faceta está selecionada (a busca segue pelo caminho normal).
+        """
+        mascara = self.mascara(selecao)
+        if mascara is None:
+            return None
+        with metricas.medir('busca.facetas'):
+            encontrados = None
+            if not filtro:
+                encontrados = np.flatnonzero(mascara)
+            elif indice_texto is not None:
+                encontrados = indice_texto.rowids(filtro, campo_filtro)
+                if encontrados is not None:
+                    encontrados = encontrados[encontrados < len(mascara)]
+                    encontrados = encontrados[mascara[encontrados]]
+        if encontrados is None:
+            return buscar_pagina_filtrada(conn, filtro, campo_filtro, self.permitido(selecao), apos, limite)
+        posicao = np.searchsorted(encontrados, apos or 0, 'right')
+        pagina = encontrados[posicao:posicao + limite]
+        linhas = buscar_por_rowids(conn, pagina.tolist())
+        proximo = int(pagina[-1]) if posicao + limite < len(encontrados) else None
+        return linhas, proximo
+
+
+class MotorFacetas:
+    """Carrega e mantém o IndiceFacetas da versão atual do banco
+
+    Como o índice em memória, a leitura acontece em segundo plano a cada nova
+    versão copiada; `indice(versao)` devolve None até ela terminar.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._indice = None
+        self._lock = threading.Lock()
+        self._carregando = None
+        self._sem_facetas = None
+        self._aviso_pronto = None
+
+    def iniciar(self, ao_carregar=None):
+        """Carrega as facetas da versão atual; `ao_carregar(indice)` é chamado quando ficarem prontas"""
+        self._aviso_pronto = ao_carregar
+        with self._pool.conexao() as conn:
+            versao = self._pool.versao_de(conn) if conn else None
+        if versao is not None:
+            self._agendar(versao)
+
+    def _agendar(self, versao):
+        with self._lock:
+            if versao in (self._carregando, self._sem_facetas) or (self._indice and self._indice.versao == versao):
+                return
+            self._carregando = versao
+        threading.Thread(target=self._carregar, args=(versao,), name="facetas", daemon=True).start()
+
+    def _guardar(self, indice):
+        with self._lock:
+            self._indice = indice
+        print(f"✓ Facetas prontas (versão {indice.versao}): "
+              f"{indice.bytes_usados() / 1024 / 1024:.1f} MB em {indice.tempo_construcao:.1f}s")
+        if self._aviso_pronto is not None:
+            self._aviso_pronto(indice)
+
+    def _carregar(self, versao):
+        try:
+            with self._pool.conexao() as conn:
+                if conn is None or self._pool.versao_de(conn) != versao:
+                    return
+                indice = IndiceFacetas.carregar(conn, versao)
+            if indice is None:
+                self._sem_facetas = versao
+                print("⚠ Aviso: O banco não tem facetas (sincronize de novo para criá-las)")
+                return
+            self._guardar(indice)
+        except Exception as e:
+            self._sem_facetas = versao
+            print(f"⚠ Aviso: Facetas indisponíveis: {e}")
+        finally:
+            with self._lock:
+                if self._carregando == versao:
+                    self._carregando = None
+
+    def indice(self, versao, conn=None):
+        """IndiceFacetas da versão informada (None enquanto não estiver carregado)
+
+        Com `conn` (aberta na mesma versão), as facetas que faltarem são lidas
+        na hora, na thread de quem chamou: é o caso de uma busca com facetas
+        selecionadas logo depois de uma nova versão ser copiada.
+        """
+        indice = self._indice
+        if indice is not None and indice.versao == versao:
+            return indice
+        if conn is None or versao == self._sem_facetas:
+            self._agendar(versao)
+            return None
+        indice = IndiceFacetas.carregar(conn, versao)
+        if indice is None:
+            self._sem_facetas = versao
+        else:
+            self._guardar(indice)
+        return indice
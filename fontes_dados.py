@@ -0,0 +1,426 @@
+import csv
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# Tamanho padrão dos lotes lidos da origem
+TAMANHO_LOTE = 5000
+
+# Coluna usada para dividir a origem em faixas na extração em paralelo
+CHAVE_PARTICAO = 'contrato'
+
+
+def calcular_hash_linha(linha):
+    """Calcula o hash do conteúdo de uma linha (usado para detectar alterações)
+
+    Os valores são convertidos para texto, que é como ficam gravados no SQLite,
+    para que a mesma linha gere o mesmo hash vindo do SQL Server, do SQLite ou de CSV.
+    """
+    partes = ['\x00' if valor is None else str(valor) for valor in linha]
+    return hashlib.blake2b('\x1f'.join(partes).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class Particao:
+    """Faixa (inicio, fim] da chave de partição; None deixa o lado aberto
+
+    A partição com `nulos` reúne as linhas sem valor na chave, que não
+    entram em nenhuma faixa.
+    """
+
+    def __init__(self, numero, inicio=None, fim=None, nulos=False, chave=CHAVE_PARTICAO):
+        self.numero = numero
+        self.inicio = inicio
+        self.fim = fim
+        self.nulos = nulos
+        self.chave = chave
+
+    def condicao(self):
+        """Trecho WHERE e parâmetros que selecionam as linhas da partição"""
+        if self.nulos:
+            return f"{self.chave} IS NULL", ()
+        condicoes, parametros = [f"{self.chave} IS NOT NULL"], ()
+        if self.inicio is not None:
+            condicoes.append(f"{self.chave} > ?")
+            parametros += (self.inicio,)
+        if self.fim is not None:
+            condicoes.append(f"{self.chave} <= ?")
+            parametros += (self.fim,)
+        return ' AND '.join(condicoes), parametros
+
+    def __repr__(self):
+        if self.nulos:
+            return f"Particao({self.numero}, {self.chave} nulo)"
+        return f"Particao({self.numero}, {self.chave} em ({self.inicio!r}, {self.fim!r}])"
+
+
+def tabela_inteira(chave=CHAVE_PARTICAO):
+    """Partições que cobrem a tabela toda sem dividi-la: as chaves preenchidas e as nulas"""
+    return [Particao(0, chave=chave), Particao(1, nulos=True, chave=chave)]
+
+
+def identificar_origem(executar, tabela, colunas):
+    """Identificador do estado atual da origem: quantidade de linhas e maior data de atualização
+
+    Duas leituras com o mesmo identificador são tratadas como leituras dos
+    mesmos dados (usado para retomar uma carga interrompida).
+    """
+    if 'data_atualizacao' in colunas:
+        total, ultima = executar(f"SELECT COUNT(*), MAX(data_atualizacao) FROM {tabela}", ())[0]
+    else:
+        total, ultima = executar(f"SELECT COUNT(*) FROM {tabela}", ())[0][0], None
+    return f"{total}|{ultima}"
+
+
+def calcular_impressao(executar, tabela, particoes, colunas, agregado):
+    """Impressão dos dados da origem por partição, calculada em uma única leitura da tabela
+
+    Para cada partição: quantidade de linhas, maior data de atualização e
+    uma soma de verificação de todas as linhas (`agregado`, a expressão de
+    agregação do banco). Duas impressões iguais numa partição indicam que
+    os dados dela não mudaram. Os valores passam por JSON para ficarem no
+    mesmo formato da impressão guardada no log.
+    """
+    chave = particoes[0].chave
+    casos, parametros, ultima = [], [], None
+    for particao in particoes:
+        if particao.nulos:
+            casos.insert(0, f"WHEN {chave} IS NULL THEN ?")
+            parametros.insert(0, particao.numero)
+        elif particao.fim is None:
+            ultima = particao.numero
+        else:
+            casos.append(f"WHEN {chave} <= ? THEN ?")
+            parametros += [particao.fim, particao.numero]
+    maior_data = "MAX(data_atualizacao)" if 'data_atualizacao' in colunas else "NULL"
+    resultado = {
+        linha[0]: tuple(linha[1:])
+        for linha in executar(f'''
+            SELECT faixa, COUNT(*), {maior_data}, {agregado}
+            FROM (SELECT CASE {' '.join(casos)} ELSE ? END AS faixa, * FROM {tabela}) AS linhas
+            GROUP BY faixa
+        ''', (*parametros, ultima))
+    }
+    faixas = [
+        [particao.numero, particao.inicio, particao.fim, particao.nulos, *resultado.get(particao.numero, (0, None, None))]
+        for particao in particoes
+    ]
+    return json.loads(json.dumps({'chave': chave, 'faixas': faixas}, default=str))
+
+
+def particoes_da_impressao(impressao):
+    """Partições usadas no cálculo de uma impressão"""
+    return [
+        Particao(numero, inicio, fim, nulos, impressao['chave'])
+        for numero, inicio, fim, nulos, *_ in impressao['faixas']
+    ]
+
+
+def faixas_alteradas(anterior, atual):
+    """Números das partições cuja impressão mudou (None se as partições não forem as mesmas)"""
+    limites_anteriores = [faixa[:4] for faixa in anterior['faixas']]
+    if anterior['chave'] != atual['chave'] or limites_anteriores != [faixa[:4] for faixa in atual['faixas']]:
+        return None
+    return [nova[0] for velha, nova in zip(anterior['faixas'], atual['faixas']) if velha[4:] != nova[4:]]
+
+
+class _SomaHashes:
+    """Agregação do SQLite no papel do CHECKSUM_AGG: soma dos hashes das linhas, módulo 2^64"""
+
+    def __init__(self):
+        self.soma = 0
+
+    def step(self, *valores):
+        self.soma = (self.soma + int(calcular_hash_linha(valores), 16)) % 2 ** 64
+
+    def finalize(self):
+        return str(self.soma)
+
+
+def dividir_em_particoes(executar, tabela, quantidade, chave=CHAVE_PARTICAO):
+    """Divide a tabela em até `quantidade` faixas da chave com quantidades parecidas de linhas
+
+    `executar(sql, parametros)` roda a consulta na origem e retorna as
+    linhas. Os limites vêm do NTILE (SQL Server e SQLite); valores repetidos
+    da chave nunca ficam em duas faixas, e a última faixa fica aberta para
+    cima, para incluir chaves gravadas depois do cálculo.
+    """
+    limites = [linha[0] for linha in executar(f'''
+        SELECT MAX({chave}) FROM (
+            SELECT {chave}, NTILE(?) OVER (ORDER BY {chave}) AS parte
+            FROM {tabela}
+            WHERE {chave} IS NOT NULL
+        ) AS faixas
+        GROUP BY parte
+        ORDER BY parte
+    ''', (quantidade,))]
+    limites = sorted(set(limites))[:-1]
+    particoes = []
+    inicio = None
+    for fim in limites + [None]:
+        particoes.append(Particao(len(particoes), inicio, fim, chave=chave))
+        inicio = fim
+    particoes.append(Particao(len(particoes), nulos=True, chave=chave))
+    return particoes
+
+
+class FonteDados:
+    """Interface das fontes de dados da sincronização
+
+    Uma fonte expõe os nomes das colunas e entrega as linhas em lotes, sem
+    carregar a tabela inteira em memória. A origem real é o SQL Server; as
+    fontes SQLite e CSV servem de substitutas locais para testes.
+
+    Fontes que aceitam extração em paralelo também dividem a tabela em
+    partições (faixas da chave), contam e leem cada uma, e abrem cópias de si
+    mesmas com conexões independentes (uma por thread). As linhas de uma
+    partição vêm em ordem da chave, o que permite retomar a leitura a partir
+    da última chave gravada.
+    """
+
+    def colunas(self):
+        """Retorna a lista com os nomes das colunas da origem"""
+        raise NotImplementedError
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        """Gera listas de tuplas com no máximo `tamanho_lote` linhas (só da partição, se informada)"""
+        raise NotImplementedError
+
+    def particoes(self, quantidade, chave=CHAVE_PARTICAO):
+        """Divide a origem em partições (NotImplementedError se a fonte não permitir)"""
+        raise NotImplementedError
+
+    def contar(self, particao=None):
+        """Quantidade de linhas da origem, ou só da partição"""
+        raise NotImplementedError
+
+    def identificador(self):
+        """Identificador do estado atual dos dados da origem (NotImplementedError se não houver)"""
+        raise NotImplementedError
+
+    def impressao(self, particoes):
+        """Impressão dos dados de cada partição (ver calcular_impressao; NotImplementedError se não houver)"""
+        raise NotImplementedError
+
+    def copia(self):
+        """Nova fonte para a mesma origem, com conexão própria"""
+        raise NotImplementedError
+
+    def fechar(self):
+        """Libera os recursos da fonte"""
+
+
+def _consulta_particao(tabela, particao, colunas='*'):
+    if particao is None:
+        return f"SELECT {colunas} FROM {tabela}", ()
+    condicao, parametros = particao.condicao()
+    sql = f"SELECT {colunas} FROM {tabela} WHERE {condicao}"
+    if colunas == '*' and not particao.nulos:
+        sql += f" ORDER BY {particao.chave}"
+    return sql, parametros
+
+
+class FonteSqlServer(FonteDados):
+    """Lê a tabela de uma conexão pyodbc aberta com o SQL Server
+
+    `conectar` abre novas conexões para as cópias usadas na extração em paralelo.
+    """
+
+    def __init__(self, conn, tabela, conectar=None):
+        self.conn = conn
+        self.tabela = tabela
+        self.conectar = conectar
+        self._colunas = None
+
+    def colunas(self):
+        if self._colunas is None:
+            cursor = self.conn.cursor()
+            cursor.execute(f"SELECT TOP 0 * FROM {self.tabela}")
+            self._colunas = [column[0] for column in cursor.description]
+            cursor.close()
+        return self._colunas
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(*_consulta_particao(self.tabela, particao))
+            self._colunas = [column[0] for column in cursor.description]
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                yield [tuple(linha) for linha in linhas]
+        finally:
+            cursor.close()
+
+    def _executar(self, sql, parametros=()):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, parametros)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def particoes(self, quantidade, chave=CHAVE_PARTICAO):
+        return dividir_em_particoes(self._executar, self.tabela, quantidade, chave)
+
+    def contar(self, particao=None):
+        return self._executar(*_consulta_particao(self.tabela, particao, 'COUNT(*)'))[0][0]
+
+    def identificador(self):
+        return identificar_origem(self._executar, self.tabela, self.colunas())
+
+    def impressao(self, particoes):
+        # BINARY_CHECKSUM ignora colunas text/ntext/image; a tabela não tem colunas desses tipos
+        return calcular_impressao(
+            self._executar, self.tabela, particoes, self.colunas(), "CHECKSUM_AGG(BINARY_CHECKSUM(*))"
+        )
+
+    def copia(self):
+        if self.conectar is None:
+            raise NotImplementedError("fonte sem função para abrir novas conexões")
+        conn = self.conectar()
+        if conn is None:
+            raise ConnectionError("não foi possível abrir outra conexão com o SQL Server")
+        return FonteSqlServer(conn, self.tabela, self.conectar)
+
+    def fechar(self):
+        self.conn.close()
+
+
+class FonteSqlite(FonteDados):
+    """Lê a tabela de um arquivo SQLite (substituta local do SQL Server)"""
+
+    def __init__(self, caminho, tabela):
+        self.caminho = caminho
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.create_aggregate('soma_hashes', -1, _SomaHashes)
+        self.tabela = tabela
+
+    def colunas(self):
+        cursor = self.conn.execute(f"SELECT * FROM {self.tabela} LIMIT 0")
+        return [column[0] for column in cursor.description]
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        cursor = self.conn.execute(*_consulta_particao(self.tabela, particao))
+        try:
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                yield linhas
+        finally:
+            cursor.close()
+
+    def particoes(self, quantidade, chave=CHAVE_PARTICAO):
+        return dividir_em_particoes(
+            lambda sql, parametros: self.conn.execute(sql, parametros).fetchall(), self.tabela, quantidade, chave
+        )
+
+    def contar(self, particao=None):
+        return self.conn.execute(*_consulta_particao(self.tabela, particao, 'COUNT(*)')).fetchone()[0]
+
+    def identificador(self):
+        return identificar_origem(
+            lambda sql, parametros: self.conn.execute(sql, parametros).fetchall(), self.tabela, self.colunas()
+        )
+
+    def impressao(self, particoes):
+        colunas = self.colunas()
+        return calcular_impressao(
+            lambda sql, parametros: self.conn.execute(sql, parametros).fetchall(),
+            self.tabela, particoes, colunas, f"soma_hashes({', '.join(colunas)})",
+        )
+
+    def copia(self):
+        return FonteSqlite(self.caminho, self.tabela)
+
+    def fechar(self):
+        self.conn.close()
+
+
+class FonteCsv(FonteDados):
+    """Lê um arquivo CSV com cabeçalho (substituta local do SQL Server)
+
+    Campos vazios são tratados como NULL.
+    """
+
+    def __init__(self, caminho, delimitador=';', encoding='utf-8'):
+        self.caminho = caminho
+        self.delimitador = delimitador
+        self.encoding = encoding
+
+    def colunas(self):
+        with open(self.caminho, newline='', encoding=self.encoding) as arquivo:
+            return next(csv.reader(arquivo, delimiter=self.delimitador))
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        if particao is not None:
+            raise NotImplementedError("o CSV não pode ser lido por partição")
+        with open(self.caminho, newline='', encoding=self.encoding) as arquivo:
+            leitor = csv.reader(arquivo, delimiter=self.delimitador)
+            next(leitor)
+            lote = []
+            for registro in leitor:
+                lote.append(tuple(valor if valor != '' else None for valor in registro))
+                if len(lote) >= tamanho_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+
+
+class FonteRedeSimulada(FonteDados):
+    """Envolve outra fonte acrescentando a demora de uma origem remota (para testes)
+
+    Cada lote espera `atraso_lote` segundos antes de ser entregue e cada
+    conexão nova (cópia) espera `atraso_conexao`, simulando a latência da
+    rede até o SQL Server com uma fonte local. Com `falhar_apos`, depois de
+    entregar essa quantidade de lotes (somando todas as cópias) a leitura
+    passa a falhar com ConnectionError, como numa queda da VPN.
+    """
+
+    def __init__(self, fonte, atraso_lote=0.05, atraso_conexao=0.2, falhar_apos=None, _entregues=None):
+        self.fonte = fonte
+        self.atraso_lote = atraso_lote
+        self.atraso_conexao = atraso_conexao
+        self.falhar_apos = falhar_apos
+        # Contagem de lotes entregues, compartilhada com as cópias
+        self._entregues = _entregues if _entregues is not None else {'lotes': 0, 'lock': threading.Lock()}
+
+    def _entregar(self):
+        with self._entregues['lock']:
+            if self.falhar_apos is not None and self._entregues['lotes'] >= self.falhar_apos:
+                raise ConnectionError(f"conexão com a origem perdida após {self.falhar_apos} lotes (falha simulada)")
+            self._entregues['lotes'] += 1
+
+    def colunas(self):
+        return self.fonte.colunas()
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        for lote in self.fonte.lotes(tamanho_lote, particao):
+            time.sleep(self.atraso_lote)
+            self._entregar()
+            yield lote
+
+    def particoes(self, quantidade, chave=CHAVE_PARTICAO):
+        return self.fonte.particoes(quantidade, chave)
+
+    def contar(self, particao=None):
+        return self.fonte.contar(particao)
+
+    def identificador(self):
+        return self.fonte.identificador()
+
+    def impressao(self, particoes):
+        return self.fonte.impressao(particoes)
+
+    def copia(self):
+        time.sleep(self.atraso_conexao)
+        return FonteRedeSimulada(
+            self.fonte.copia(), self.atraso_lote, self.atraso_conexao, self.falhar_apos, self._entregues
+        )
+
+    def fechar(self):
+        self.fonte.fechar()
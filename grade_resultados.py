@@ -0,0 +1,95 @@
+import flet as ft
+
+# Colunas da grade: título e proporção da largura
+COLUNAS_GRADE = [
+    ("ID", 4),
+    ("Contrato", 7),
+    ("Razão Social", 16),
+    ("CNPJ", 10),
+    ("Raiz CNPJ", 6),
+    ("Consultor", 12),
+    ("Contato", 8),
+    ("E-mail", 14),
+    ("Cidade", 9),
+    ("Estado", 4),
+    ("Produto", 8),
+]
+
+# Altura fixa das linhas (permite à lista calcular a rolagem sem medir cada linha)
+ALTURA_LINHA = 36
+
+
+def _celula_id(rowid, proporcao, abrir_detalhe):
+    return ft.Container(
+        content=ft.Row(
+            spacing=2,
+            controls=[
+                ft.Icon(ft.Icons.OPEN_IN_NEW, size=14, color=ft.Colors.BLUE),
+                ft.Text(str(rowid), no_wrap=True, size=13, color=ft.Colors.BLUE),
+            ],
+        ),
+        expand=proporcao,
+        padding=ft.padding.symmetric(horizontal=4, vertical=4),
+        on_click=lambda e: abrir_detalhe(rowid),
+    )
+
+
+def criar_linha(row, copiar, abrir_detalhe=None):
+    """Linha da grade; clicar em uma célula chama copiar(e, valor)
+
+    Com `abrir_detalhe`, a célula do ID abre o registro completo (abrir_detalhe(rowid)).
+    """
+    return ft.Container(
+        height=ALTURA_LINHA,
+        border=ft.border.only(bottom=ft.BorderSide(0.5, ft.Colors.BLACK38)),
+        content=ft.Row(
+            spacing=0,
+            controls=[
+                _celula_id(col, proporcao, abrir_detalhe) if posicao == 0 and abrir_detalhe else ft.Container(
+                    content=ft.Text(str(col) if col else "", no_wrap=True, size=13, overflow=ft.TextOverflow.ELLIPSIS),
+                    expand=proporcao,
+                    padding=ft.padding.symmetric(horizontal=4, vertical=4),
+                    on_click=lambda e, v=col: copiar(e, v) if v else None,
+                )
+                for posicao, (col, (_, proporcao)) in enumerate(zip(row, COLUNAS_GRADE))
+            ],
+        ),
+    )
+
+
+def criar_lista(dados, copiar, ao_rolar=None, abrir_detalhe=None):
+    """Lista virtualizada das linhas: o cliente só constrói as que aparecem na tela"""
+    return ft.ListView(
+        controls=[criar_linha(row, copiar, abrir_detalhe) for row in dados],
+        item_extent=ALTURA_LINHA,
+        build_controls_on_demand=True,
+        expand=True,
+        on_scroll_interval=100,
+        on_scroll=ao_rolar,
+    )
+
+
+def criar_grade(lista):
+    """Cabeçalho fixo e a lista de linhas, com a borda da tabela"""
+    cabecalho = ft.Container(
+        height=50,
+        bgcolor=ft.Colors.BLUE_50,
+        border=ft.border.only(bottom=ft.BorderSide(0.5, ft.Colors.BLACK38)),
+        tooltip="Clique em uma célula para copiar, ou no ID para ver todos os campos",
+        content=ft.Row(
+            spacing=0,
+            controls=[
+                ft.Container(
+                    content=ft.Text(titulo, weight="bold", no_wrap=True),
+                    expand=proporcao,
+                    padding=ft.padding.symmetric(horizontal=4),
+                )
+                for titulo, proporcao in COLUNAS_GRADE
+            ],
+        ),
+    )
+    return ft.Container(
+        border=ft.border.all(0.5, ft.Colors.BLACK38),
+        border_radius=10,
+        content=ft.Column(spacing=0, expand=True, controls=[cabecalho, lista]),
+    )
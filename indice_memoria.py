@@ -0,0 +1,228 @@
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import metricas
+from consulta_dados import (
+    CAMPOS_MAP,
+    CHAVES_NUMERICAS,
+    buscar_por_rowids,
+    faixa_prefixo,
+    faixas_numericas,
+)
+from normalizacao import somente_digitos
+
+# Bytes guardados de cada valor de texto. Filtros mais longos que isso (raros
+# na caixa de busca) são respondidos pelo SQLite
+LARGURA_MAXIMA = 32
+
+# Linhas lidas do banco por vez durante a construção
+TAMANHO_LOTE = 50000
+
+
+def disponivel():
+    """Indica se o NumPy está instalado (sem ele as buscas usam só o SQLite)"""
+    return np is not None
+
+
+def _ler_colunas(conn, sql, tipo):
+    ids, chaves = [], []
+    cursor = conn.execute(sql)
+    while True:
+        linhas = cursor.fetchmany(TAMANHO_LOTE)
+        if not linhas:
+            break
+        ids.append(np.fromiter((linha[0] for linha in linhas), dtype=np.int64, count=len(linhas)))
+        chaves.append(np.array([linha[1] for linha in linhas], dtype=tipo))
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=tipo)
+    return np.concatenate(ids), np.concatenate(chaves)
+
+
+class IndiceMemoria:
+    """Chaves dos campos pesquisáveis em arrays ordenados do NumPy, com o ROWID de cada uma
+
+    Os textos são guardados como na collation NOCASE (letras ASCII em
+    minúsculas, em UTF-8) e cortados em LARGURA_MAXIMA bytes; a ordem dos
+    bytes é a mesma do índice NOCASE, então a busca pelo prefixo é a mesma
+    faixa [início, fim) do SQL, resolvida com duas buscas binárias
+    (searchsorted). CNPJ, raiz e contrato também têm a chave numérica.
+    O SQLite só é usado para ler as colunas da grade das linhas encontradas.
+    """
+
+    def __init__(self, versao):
+        self.versao = versao
+        self.textos = {}
+        self.numeros = {}
+        self.tempo_construcao = 0.0
+
+    @classmethod
+    def construir(cls, conn, versao):
+        """Lê as chaves da versão aberta em `conn` (já em ordem, pelos índices do banco)"""
+        inicio = time.perf_counter()
+        indice = cls(versao)
+        for campo_db in CAMPOS_MAP.values():
+            indice.textos[campo_db] = _ler_colunas(
+                conn,
+                f'''
+                SELECT ROWID, CAST(substr(CAST(lower({campo_db}) AS BLOB), 1, {LARGURA_MAXIMA}) AS BLOB)
+                FROM tb_busca_grade
+                WHERE {campo_db} IS NOT NULL
+                ORDER BY {campo_db} COLLATE NOCASE
+                ''',
+                f'S{LARGURA_MAXIMA}',
+            )
+        for campo, (coluna, _) in CHAVES_NUMERICAS.items():
+            indice.numeros[campo] = _ler_colunas(
+                conn,
+                f'''
+                SELECT ROWID, {coluna}
+                FROM tb_busca_grade
+                WHERE {coluna} IS NOT NULL
+                ORDER BY {coluna}
+                ''',
+                np.int64,
+            )
+        indice.tempo_construcao = time.perf_counter() - inicio
+        return indice
+
+    def bytes_usados(self):
+        return sum(ids.nbytes + chaves.nbytes for ids, chaves in [*self.textos.values(), *self.numeros.values()])
+
+    def _faixa_texto(self, campo_db, inicio, fim):
+        ids, chaves = self.textos[campo_db]
+        return ids[np.searchsorted(chaves, inicio, 'left'):np.searchsorted(chaves, fim, 'left')]
+
+    def _faixas_numero(self, campo, digitos):
+        ids, chaves = self.numeros[campo]
+        largura = CHAVES_NUMERICAS[campo][1]
+        return [
+            ids[np.searchsorted(chaves, inicio, 'left'):np.searchsorted(chaves, fim, 'left')]
+            for inicio, fim in faixas_numericas(digitos, largura) if fim > inicio
+        ]
+
+    def rowids(self, filtro, campo_filtro):
+        """ROWIDs (ordenados, sem repetição) das linhas que atendem ao filtro
+
+        Retorna None quando a busca não pode ser respondida pelo índice em
+        memória (busca por trecho ou filtro mais longo que LARGURA_MAXIMA).
+        """
+        if not filtro or campo_filtro == 'contem':
+            return None
+        if campo_filtro not in CAMPOS_MAP and campo_filtro != 'todos':
+            campo_filtro = 'contrato'
+        campos = CAMPOS_MAP if campo_filtro == 'todos' else {campo_filtro: CAMPOS_MAP[campo_filtro]}
+
+        digitos = somente_digitos(filtro)
+        inicio, fim = (parte.encode('utf-8') for parte in faixa_prefixo(filtro))
+        if len(inicio) > LARGURA_MAXIMA or len(fim) > LARGURA_MAXIMA:
+            return None
+
+        partes = []
+        for campo, campo_db in campos.items():
+            if digitos is not None and campo in CHAVES_NUMERICAS:
+                partes += self._faixas_numero(campo, digitos)
+            else:
+                partes.append(self._faixa_texto(campo_db, inicio, fim))
+        return np.unique(np.concatenate(partes)) if partes else np.empty(0, dtype=np.int64)
+
+    def buscar_pagina(self, conn, filtro, campo_filtro, apos=None, limite=100):
+        """Mesmo resultado de consulta_dados.buscar_pagina, ou None para usar o SQL"""
+        with metricas.medir('busca.indice_memoria'):
+            encontrados = self.rowids(filtro, campo_filtro)
+        if encontrados is None:
+            return None
+        posicao = np.searchsorted(encontrados, apos or 0, 'right')
+        pagina = encontrados[posicao:posicao + limite]
+        linhas = buscar_por_rowids(conn, pagina.tolist())
+        proximo = int(pagina[-1]) if posicao + limite < len(encontrados) else None
+        return linhas, proximo
+
+
+class MotorIndiceMemoria:
+    """Constrói e mantém o IndiceMemoria da versão atual do banco
+
+    A construção acontece em segundo plano, na primeira busca (ou ao chamar
+    iniciar) e de novo a cada nova versão copiada. Enquanto o índice da
+    versão da conexão não está pronto, as buscas seguem pelo SQLite.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._indice = None
+        self._lock = threading.Lock()
+        self._construindo = None
+        self._falhou = None
+        self.atendidas = 0
+        self.pelo_sql = 0
+
+    def iniciar(self):
+        with self._pool.conexao() as conn:
+            versao = self._pool.versao_de(conn) if conn else None
+        if versao is not None:
+            self._agendar(versao)
+
+    def _agendar(self, versao):
+        with self._lock:
+            if versao in (self._construindo, self._falhou) or (self._indice and self._indice.versao == versao):
+                return
+            self._construindo = versao
+        threading.Thread(target=self._construir, args=(versao,), name="indice-memoria", daemon=True).start()
+
+    def _construir(self, versao):
+        try:
+            with self._pool.conexao() as conn:
+                if conn is None or self._pool.versao_de(conn) != versao:
+                    return
+                indice = IndiceMemoria.construir(conn, versao)
+            with self._lock:
+                self._indice = indice
+            print(f"✓ Índice em memória pronto (versão {versao}): "
+                  f"{indice.bytes_usados() / 1024 / 1024:.1f} MB em {indice.tempo_construcao:.1f}s")
+        except Exception as e:
+            # Não tenta de novo para esta versão (por exemplo, falta de memória)
+            self._falhou = versao
+            print(f"⚠ Aviso: Índice em memória indisponível, buscas seguem pelo banco: {e}")
+        finally:
+            with self._lock:
+                if self._construindo == versao:
+                    self._construindo = None
+
+    def indice(self, versao):
+        """IndiceMemoria da versão informada (None enquanto não estiver pronto)"""
+        indice = self._indice
+        if indice is None or indice.versao != versao:
+            self._agendar(versao)
+            return None
+        return indice
+
+    def buscar_pagina(self, conn, versao, filtro, campo_filtro, apos=None, limite=100):
+        """Busca pelo índice da mesma versão de `conn`; None quando a busca deve ir pelo SQL"""
+        indice = self._indice
+        if indice is None or indice.versao != versao:
+            self._agendar(versao)
+            resultado = None
+        else:
+            resultado = indice.buscar_pagina(conn, filtro, campo_filtro, apos, limite)
+        with self._lock:
+            if resultado is None:
+                self.pelo_sql += 1
+            else:
+                self.atendidas += 1
+        return resultado
+
+    def estatisticas(self):
+        """Memória e uso do índice"""
+        indice = self._indice
+        with self._lock:
+            return {
+                'indice_versao': indice.versao if indice else None,
+                'indice_bytes': indice.bytes_usados() if indice else 0,
+                'indice_tempo_construcao_s': round(indice.tempo_construcao, 3) if indice else None,
+                'indice_buscas_atendidas': self.atendidas,
+                'indice_buscas_pelo_sql': self.pelo_sql,
+            }
@@ -4,9 +4,39 @@ import sqlite3
 import sys
 import atexit
 import asyncio
+import threading
+from datetime import datetime
+
+import carteira_usuario
+import consulta_dados
+import consulta_lote
+import detalhe_registro
+import exportacao
+import facetas
+import grade_resultados
+import indice_memoria
+import metricas
+import painel_carteira
+import planilhas
+from cache_resultados import CacheResultados
+from pool_conexoes import PoolConexoes
+from replica_local import GerenciadorReplica
 
 usuario = os.getlogin()
 
+# Responde as buscas por prefixo com o índice em memória (NumPy), quando instalado
+USAR_INDICE_MEMORIA = True
+
+# Valores listados em cada faceta (os mais frequentes); o filtro do campo
+# procura só entre eles
+LIMITE_OPCOES_FACETA = 500
+
+# Chave da opção "Todos" das facetas (nenhum valor selecionado)
+FACETA_TODOS = '__todos__'
+
+# Espera após a última tecla antes de buscar, na busca ao digitar (segundos)
+ATRASO_DIGITACAO = 0.3
+
 # Lista global para controlar conexões ativas
 _conexoes_globais = []
 
@@ -50,6 +80,9 @@ def main(page: ft.Page):
     def limpar_recursos(e=None):
         """Limpa todas as conexões ativas antes de fechar"""
         try:
+            replica.parar()
+            pool.fechar()
+            metricas.encerrar()
             for conn in _conexoes_globais:
                 try:
                     conn.close()
@@ -68,17 +101,25 @@ def main(page: ft.Page):
     page.window.on_event = lambda e: limpar_recursos() if e.data == "close" else None
     page.window.prevent_close = False
 
+    # Pasta onde a sincronização publica o banco (a mesma do executável)
+    if getattr(sys, 'frozen', False):
+        diretorio_raiz = os.path.dirname(sys.executable)
+    else:
+        diretorio_raiz = os.path.dirname(os.path.abspath(__file__))
+
+    # As consultas usam uma cópia local do banco, atualizada em segundo plano
+    # sempre que uma nova versão é publicada na rede
+    replica = GerenciadorReplica(diretorio_raiz)
+    replica.iniciar()
+
     # Função para conectar ao banco de dados
     def conectar_banco():
         try:
-            if getattr(sys, 'frozen', False):
-                diretorio_raiz = os.path.dirname(sys.executable)
-            else:
-                diretorio_raiz = os.path.dirname(os.path.abspath(__file__))
+            # A cópia local é somente leitura: sem WAL, que não é seguro em
+            # pastas de rede, e sem locks
+            conn = replica.conectar()
 
-            caminho_banco = os.path.join(diretorio_raiz, "consultor.db")
-
-            if not os.path.exists(caminho_banco):
+            if conn is None:
                 page.snack_bar = ft.SnackBar(
                     content=ft.Text("⚠ Banco de dados não encontrado!", color=ft.Colors.WHITE),
                     bgcolor=ft.Colors.RED_700,
@@ -87,17 +128,6 @@ def main(page: ft.Page):
                 page.update()
                 return None
             
-            conn = sqlite3.connect(
-                caminho_banco,
-                timeout=30.0,
-                check_same_thread=False,
-            )
-            
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA synchronous=NORMAL")
-            conn.execute("PRAGMA temp_store=MEMORY")
-            conn.execute("PRAGMA cache_size=10000")
-            
             _conexoes_globais.append(conn)
             return conn
             
@@ -110,111 +140,90 @@ def main(page: ft.Page):
             page.update()
             return None
 
-    # Função para buscar dados do banco com filtro específico
-    def buscar_dados(filtro='', campo_filtro='todos'):
-        conn = conectar_banco()
-        if not conn:
-            return []
-        
-        try:
-            cursor = conn.cursor()
-            if filtro:
-                # Mapeamento dos campos
-                campos_map = {
-                    'contrato': 'contrato',
-                    'cnpj': 'cnpj',
-                    'raiz': 'raiz',
-                    'razao_social': 'razao_social',
-                    'consultor': 'consultor',
-                    'email': 'email'
-                }
-                
-                if campo_filtro == 'todos':
-                    # Busca em todos os campos (comportamento antigo)
-                    query = '''
-                        SELECT 
-                            ROWID as id,
-                            contrato,
-                            razao_social,
-                            cnpj,
-                            raiz,
-                            consultor,
-                            contato,
-                            email,
-                            municipio,
-                            estado,
-                            produto
-                        FROM tb_base_contrato_consultor
-                        WHERE contrato LIKE ? 
-                           OR cnpj LIKE ? 
-                           OR consultor LIKE ?
-                           OR razao_social LIKE ? 
-                           OR email LIKE ?
-                           OR raiz LIKE ?
-                        LIMIT 1000
-                    '''
-                    filtro_like = f'{filtro}%'
-                    cursor.execute(query, tuple([filtro_like]*6))
-                else:
-                    # Busca específica no campo selecionado
-                    campo_db = campos_map.get(campo_filtro, 'contrato')
-                    query = f'''
-                        SELECT 
-                            ROWID as id,
-                            contrato,
-                            razao_social,
-                            cnpj,
-                            raiz,
-                            consultor,
-                            contato,
-                            email,
-                            municipio,
-                            estado,
-                            produto
-                        FROM tb_base_contrato_consultor
-                        WHERE {campo_db} LIKE ?
-                        LIMIT 1000
-                    '''
-                    filtro_like = f'{filtro}%'
-                    cursor.execute(query, (filtro_like,))
-            else:
-                query = '''
-                    SELECT 
-                        ROWID as id,
-                        contrato,
-                        razao_social,
-                        cnpj,
-                        raiz,
-                        consultor,
-                        contato,
-                        email,
-                        municipio,
-                        estado,
-                        produto
-                    FROM tb_base_contrato_consultor
-                    LIMIT 100
-                '''
-                cursor.execute(query)
-            
-            dados = cursor.fetchall()
-            return dados
+    def fechar_conexao(conn):
+        conn.close()
+        if conn in _conexoes_globais:
+            _conexoes_globais.remove(conn)
+
+    # Conexões de leitura mantidas abertas enquanto o app estiver aberto;
+    # uma conexão de uma versão antiga do banco é trocada na próxima consulta
+    pool = PoolConexoes(conectar_banco, versao_atual=replica.versao_local, fechar=fechar_conexao)
+
+    # Índice em memória, construído em segundo plano para cada versão do banco
+    motor_indice = None
+    if USAR_INDICE_MEMORIA and indice_memoria.disponivel():
+        motor_indice = indice_memoria.MotorIndiceMemoria(pool)
+        threading.Thread(target=motor_indice.iniciar, daemon=True).start()
+
+    # Facetas (diretor, gerente, consultor, estado...) lidas das tabelas que
+    # a sincronização monta; precisam do NumPy, como o índice em memória
+    motor_facetas = facetas.MotorFacetas(pool) if facetas.disponivel() else None
+
+    # Valores escolhidos na barra de facetas, {faceta: valor}
+    selecao_facetas = {}
+
+    # Carteira do usuário logado (contratos em que o e-mail é o dele), lida em
+    # segundo plano para as buscas dele serem respondidas da memória
+    motor_carteira = carteira_usuario.MotorCarteira(pool, usuario)
+
+    # Páginas das buscas recentes; o conteúdo é descartado quando uma nova
+    # versão do banco é copiada
+    cache = CacheResultados(versao_atual=replica.versao_local)
+
+    # Função para buscar dados do banco com filtro específico. Retorna uma
+    # página de resultados e o cursor da próxima (None quando não há mais)
+    def buscar_dados(filtro='', campo_filtro='todos', apos=None, selecao=None, carteira=False):
+        selecao = selecao or {}
+        chave = (
+            campo_filtro, consulta_dados.normalizar_filtro(filtro, campo_filtro),
+            facetas.chave_selecao(selecao), carteira, apos,
+        )
+        # O marcador da cópia local é lido uma vez por busca; cache e pool
+        # recebem a versão já lida
+        versao = replica.versao_local()
+        with metricas.medir('busca.cache'):
+            resultado = cache.obter(chave, versao)
+        if resultado is not None:
+            return resultado
+
+        with pool.conexao(versao) as conn:
+            if not conn:
+                return [], None
             
-        except sqlite3.Error as e:
-            page.snack_bar = ft.SnackBar(
-                content=ft.Text(f"✗ Erro ao buscar dados: {e}", color=ft.Colors.WHITE),
-                bgcolor=ft.Colors.RED_700,
-            )
-            page.snack_bar.open = True
-            page.update()
-            return []
-        finally:
-            if conn:
-                try:
-                    conn.close()
-                    if conn in _conexoes_globais:
-                        _conexoes_globais.remove(conn)
-                except:
-                    pass
+            try:
+                resultado = None
+                versao_conn = pool.versao_de(conn)
+                indice_facetas = None
+                if selecao and motor_facetas is not None:
+                    indice_facetas = motor_facetas.indice(versao_conn, conn)
+                # Primeiro os contratos da carteira do usuário, em memória, e
+                # depois os demais da base; sem nada na carteira, a base inteira
+                minha_carteira = motor_carteira.carteira(versao_conn) if carteira else None
+                if minha_carteira is not None:
+                    resultado = minha_carteira.buscar_pagina(
+                        conn, filtro, campo_filtro, apos, consulta_dados.TAMANHO_PAGINA,
+                        indice_facetas.permitido(selecao) if indice_facetas is not None else None,
+                    )
+                if resultado is None and indice_facetas is not None:
+                    indice_texto = motor_indice.indice(versao_conn) if motor_indice is not None else None
+                    resultado = indice_facetas.buscar_pagina(
+                        conn, selecao, filtro, campo_filtro, apos, consulta_dados.TAMANHO_PAGINA, indice_texto
+                    )
+                if resultado is None and motor_indice is not None:
+                    resultado = motor_indice.buscar_pagina(conn, versao_conn, filtro, campo_filtro, apos)
+                if resultado is None:
+                    resultado = consulta_dados.buscar_pagina(conn, filtro, campo_filtro, apos)
+                cache.guardar(chave, resultado, versao)
+                return resultado
+                
+            except sqlite3.Error as e:
+                page.snack_bar = ft.SnackBar(
+                    content=ft.Text(f"✗ Erro ao buscar dados: {e}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.RED_700,
+                )
+                page.snack_bar.open = True
+                page.update()
+                return [], None
 
     # Dropdown para seleção do campo de filtro
     filtro_dropdown = ft.Dropdown(
@@ -228,6 +237,8 @@ def main(page: ft.Page):
             ft.dropdown.Option("razao_social", "Razão Social"),
             ft.dropdown.Option("consultor", "Consultor"),
             ft.dropdown.Option("email", "E-mail"),
+            ft.dropdown.Option("contem", "Contém (qualquer parte)"),
+            ft.dropdown.Option("todos", "Todos os campos"),
         ],
         text_size=14,
         border_color=ft.Colors.BLUE,
@@ -242,9 +253,25 @@ def main(page: ft.Page):
         border_color=ft.Colors.BLUE,
         focused_border_color=ft.Colors.BLUE,
         border_radius=10,
-        on_submit=lambda e: asyncio.run(atualizar_tabela_async(e.control.value, filtro_dropdown.value)),
+        on_submit=lambda e: agendar_busca(e.control.value, filtro_dropdown.value),
+        on_change=lambda e: agendar_busca(e.control.value, filtro_dropdown.value, ATRASO_DIGITACAO, aguardar=False)
+        if buscar_ao_digitar.value else None,
+    )
+
+    buscar_ao_digitar = ft.Checkbox(label="Buscar ao digitar", value=True)
+
+    # Aparece quando a carteira do usuário é encontrada: as buscas mostram
+    # primeiro os contratos dele e depois os demais da base
+    so_carteira = ft.Checkbox(
+        label="Minha carteira primeiro",
+        value=True,
+        visible=False,
+        on_change=lambda e: agendar_busca(anchor.value, filtro_dropdown.value, aguardar=False),
     )
 
+    # Indicador discreto da busca ao digitar (o diálogo de espera tiraria o foco do campo)
+    indicador_busca = ft.ProgressBar(height=2, visible=False)
+
     # AppBar
     page.appbar = ft.Container(
         height=60,
@@ -283,7 +310,7 @@ def main(page: ft.Page):
         page.update()
 
     # Container tabela
-    table_container = ft.Container()
+    table_container = ft.Container(expand=True)
 
     # Dialog de loading
     loading_dialog = ft.AlertDialog(
@@ -302,69 +329,88 @@ def main(page: ft.Page):
         ),
     )
 
-    # Criar tabela
+    # Busca exibida na grade, usada para carregar as próximas páginas ao rolar
+    # e para descartar resultados de buscas que já foram substituídas por outra
+    busca_atual = {'filtro': '', 'campo': 'todos', 'selecao': {}, 'carteira': False, 'proximo': None, 'lista': None, 'ids': [], 'geracao': 0, 'agendada': None}
+    carregando_pagina = threading.Lock()
+
+    # Carrega a próxima página quando a rolagem chega perto do fim da lista
+    def carregar_mais(e):
+        if e.pixels is None or e.max_scroll_extent is None:
+            return
+        if e.max_scroll_extent - e.pixels > grade_resultados.ALTURA_LINHA * 20 or busca_atual['proximo'] is None:
+            return
+        if not carregando_pagina.acquire(blocking=False):
+            return
+        try:
+            with metricas.rastrear('pagina', filtro=busca_atual['filtro'], campo=busca_atual['campo']):
+                lista = busca_atual['lista']
+                dados, proximo = buscar_dados(
+                    busca_atual['filtro'], busca_atual['campo'], busca_atual['proximo'],
+                    busca_atual['selecao'], busca_atual['carteira'],
+                )
+                if lista is not busca_atual['lista']:
+                    # Uma nova busca substituiu a grade enquanto a página carregava
+                    return
+                busca_atual['proximo'] = proximo
+                busca_atual['ids'].extend(row[0] for row in dados)
+                with metricas.medir('pagina.criar_linhas'):
+                    lista.controls.extend(grade_resultados.criar_linha(row, copiar_celula, abrir_detalhe) for row in dados)
+                with metricas.medir('pagina.update'):
+                    lista.update()
+        finally:
+            carregando_pagina.release()
+
+    # Criar tabela: grade virtualizada, com apenas as páginas já carregadas
+    # materializadas e as linhas construídas pelo cliente conforme aparecem
     def criar_tabela(dados):
+        busca_atual['ids'] = [row[0] for row in dados]
         if not dados:
+            busca_atual['lista'] = None
             return ft.Container(
                 content=ft.Text("Nenhum registro encontrado", size=16, color=ft.Colors.GREY_600, text_align=ft.TextAlign.CENTER),
                 alignment=ft.alignment.center,
                 padding=10
             )
-        return ft.DataTable(
-            border=ft.border.all(0.5, ft.Colors.BLACK38),
-            border_radius=10,
-            vertical_lines=ft.border.BorderSide(0.5, ft.Colors.BLACK38),
-            horizontal_lines=ft.border.BorderSide(0.5, ft.Colors.BLACK38),
-            show_checkbox_column=True,
-            heading_row_height=50,
-            data_row_max_height=60,
-            data_row_min_height=40,
-            column_spacing=10,
-            horizontal_margin=5,
-            columns=[
-                ft.DataColumn(ft.Text("ID", weight="bold", no_wrap=True), numeric=True),
-                ft.DataColumn(ft.Text("Contrato", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Razão Social", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("CNPJ", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Raiz CNPJ", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Consultor", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Contato", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("E-mail", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Cidade", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Estado", weight="bold", no_wrap=True)),
-                ft.DataColumn(ft.Text("Produto", weight="bold", no_wrap=True)),
-            ],
-            rows=[
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(
-                            ft.Container(
-                                content=ft.Text(str(col) if col else "", no_wrap=True, size=13),
-                                padding=ft.padding.symmetric(horizontal=4, vertical=4),
-                                tooltip="Clique para copiar"
-                            ),
-                            on_tap=lambda e, v=col: copiar_celula(e, v) if v else None
-                        )
-                        for col in row
-                    ],
-                    selected=False,
-                ) for row in dados
-            ]
-        )
+        lista = grade_resultados.criar_lista(dados, copiar_celula, carregar_mais, abrir_detalhe)
+        busca_atual['lista'] = lista
+        return grade_resultados.criar_grade(lista)
 
-    # Função assíncrona para atualizar tabela
-    async def atualizar_tabela_async(filtro='', campo_filtro='todos'):
-        page.dialog = loading_dialog
-        loading_dialog.open = True
+    # Função assíncrona para atualizar tabela. Roda no loop de eventos da
+    # página; a consulta em si vai para uma thread. Só exibe o resultado se
+    # nenhuma busca mais nova tiver sido agendada enquanto esta rodava
+    async def atualizar_tabela_async(filtro='', campo_filtro='todos', geracao=None, aguardar=True):
+        with metricas.rastrear('busca', filtro=filtro, campo=campo_filtro):
+            await exibir_busca(filtro, campo_filtro, geracao, aguardar)
+        atualizar_painel_metricas()
+
+    async def exibir_busca(filtro, campo_filtro, geracao, aguardar):
+        if aguardar:
+            page.dialog = loading_dialog
+            loading_dialog.open = True
+        else:
+            indicador_busca.visible = True
         page.update()
         try:
-            loop = asyncio.get_event_loop()
-            dados = await loop.run_in_executor(None, lambda: buscar_dados(filtro, campo_filtro))
-            table_container.content = criar_tabela(dados)
+            # to_thread leva junto o contexto, e com ele o rastro das métricas
+            selecao = dict(selecao_facetas)
+            carteira = so_carteira.visible and so_carteira.value
+            dados, proximo = await asyncio.to_thread(buscar_dados, filtro, campo_filtro, None, selecao, carteira)
+            if geracao is not None and geracao != busca_atual['geracao']:
+                return
+            busca_atual.update(filtro=filtro, campo=campo_filtro, selecao=selecao, carteira=carteira, proximo=proximo)
+            with metricas.medir('busca.criar_tabela'):
+                table_container.content = criar_tabela(dados)
+            if not aguardar:
+                # Ao digitar, a grade já mostra o resultado: sem aviso a cada tecla
+                return
             if dados:
                 campo_texto = filtro_dropdown.options[[opt.key for opt in filtro_dropdown.options].index(campo_filtro)].text
+                mensagem = f"✓ {len(dados)} registro(s) encontrado(s) em '{campo_texto}'"
+                if proximo is not None:
+                    mensagem = f"✓ Mais de {len(dados)} registros encontrados em '{campo_texto}' (role para carregar mais)"
                 page.snack_bar = ft.SnackBar(
-                    content=ft.Text(f"✓ {len(dados)} registro(s) encontrado(s) em '{campo_texto}'", color=ft.Colors.WHITE),
+                    content=ft.Text(mensagem, color=ft.Colors.WHITE),
                     bgcolor=ft.Colors.BLUE_700,
                 )
             else:
@@ -374,12 +420,522 @@ def main(page: ft.Page):
                 )
             page.snack_bar.open = True
         finally:
-            loading_dialog.open = False
+            if geracao is None or geracao == busca_atual['geracao']:
+                loading_dialog.open = False
+                indicador_busca.visible = False
+            with metricas.medir('busca.page_update'):
+                page.update()
+
+    async def buscar_apos_atraso(geracao, filtro, campo_filtro, atraso, aguardar):
+        if atraso:
+            await asyncio.sleep(atraso)
+        if geracao == busca_atual['geracao']:
+            await atualizar_tabela_async(filtro, campo_filtro, geracao, aguardar)
+
+    # Agenda a busca no loop da página. Cada nova busca cancela a espera da
+    # anterior e torna obsoleto o resultado que ela ainda estiver buscando
+    def agendar_busca(filtro, campo_filtro, atraso=0, aguardar=True):
+        busca_atual['geracao'] += 1
+        anterior = busca_atual['agendada']
+        if anterior is not None:
+            anterior.cancel()
+        busca_atual['agendada'] = page.run_task(
+            buscar_apos_atraso, busca_atual['geracao'], filtro, campo_filtro, atraso, aguardar
+        )
+
+    # Painel de detalhes: o registro completo (todas as colunas) só é lido do
+    # banco quando o ID de uma linha é clicado; os registros vizinhos na grade
+    # são lidos em seguida, em segundo plano, para a navegação ser imediata
+    cache_registros = CacheResultados(versao_atual=replica.versao_local, limite_bytes=4 * 1024 * 1024)
+    detalhe_atual = {'rowid': None}
+    registros_vizinhos = 10
+
+    def obter_registro(rowid):
+        versao = replica.versao_local()
+        resultado = cache_registros.obter(rowid, versao)
+        if resultado is not None:
+            return resultado[0]
+        with pool.conexao(versao) as conn:
+            if not conn:
+                return None
+            registro = consulta_dados.buscar_registros(conn, [rowid]).get(rowid)
+        if registro is not None:
+            cache_registros.guardar(rowid, (registro, None), versao)
+        return registro
+
+    def pre_carregar_registros(rowids):
+        versao = replica.versao_local()
+        faltando = [rowid for rowid in rowids if not cache_registros.contem(rowid, versao)]
+        if not faltando:
+            return
+        with pool.conexao(versao) as conn:
+            if not conn:
+                return
+            registros = consulta_dados.buscar_registros(conn, faltando)
+        for rowid, registro in registros.items():
+            cache_registros.guardar(rowid, (registro, None), versao)
+
+    def vizinhos(rowid):
+        ids = busca_atual['ids']
+        if rowid not in ids:
+            return []
+        posicao = ids.index(rowid)
+        return ids[max(0, posicao - registros_vizinhos):posicao + registros_vizinhos + 1]
+
+    titulo_detalhe = ft.Text("", size=15, weight="bold", expand=True, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+    conteudo_detalhe = ft.ListView(expand=True, spacing=0, padding=ft.padding.only(right=10))
+
+    async def exibir_detalhe(rowid):
+        detalhe_atual['rowid'] = rowid
+        painel_detalhe.visible = True
+        titulo_detalhe.value = f"Registro {rowid}"
+        if not cache_registros.contem(rowid):
+            conteudo_detalhe.controls = [ft.Container(ft.ProgressRing(width=30, height=30), alignment=ft.alignment.center, padding=20)]
+        page.update()
+
+        with metricas.rastrear('detalhe', rowid=rowid):
+            try:
+                registro = await asyncio.to_thread(obter_registro, rowid)
+            except sqlite3.Error as e:
+                registro = None
+                page.snack_bar = ft.SnackBar(
+                    content=ft.Text(f"✗ Erro ao buscar o registro: {e}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.RED_700,
+                )
+                page.snack_bar.open = True
+            if detalhe_atual['rowid'] != rowid:
+                # Outro registro foi aberto enquanto este carregava
+                return
+            if registro is None:
+                conteudo_detalhe.controls = [ft.Text("Registro não encontrado", color=ft.Colors.GREY_600)]
+            else:
+                titulo_detalhe.value = f"{registro.get('contrato') or rowid} — {registro.get('razao_social') or ''}"
+                with metricas.medir('detalhe.criar_conteudo'):
+                    conteudo_detalhe.controls = detalhe_registro.criar_conteudo(registro, copiar_celula)
+            with metricas.medir('detalhe.update'):
+                page.update()
+
+        try:
+            await asyncio.to_thread(pre_carregar_registros, vizinhos(rowid))
+        except sqlite3.Error:
+            pass
+
+    def abrir_detalhe(rowid):
+        page.run_task(exibir_detalhe, rowid)
+
+    def navegar_detalhe(passo):
+        ids = busca_atual['ids']
+        if detalhe_atual['rowid'] in ids:
+            posicao = ids.index(detalhe_atual['rowid']) + passo
+            if 0 <= posicao < len(ids):
+                abrir_detalhe(ids[posicao])
+
+    def fechar_detalhe(e):
+        detalhe_atual['rowid'] = None
+        painel_detalhe.visible = False
+        page.update()
+
+    painel_detalhe = ft.Container(
+        width=detalhe_registro.LARGURA_PAINEL,
+        visible=False,
+        padding=10,
+        border=ft.border.all(0.5, ft.Colors.BLACK38),
+        border_radius=10,
+        content=ft.Column(
+            expand=True,
+            controls=[
+                ft.Row(
+                    spacing=0,
+                    controls=[
+                        ft.IconButton(ft.Icons.CHEVRON_LEFT, tooltip="Registro anterior", on_click=lambda e: navegar_detalhe(-1)),
+                        ft.IconButton(ft.Icons.CHEVRON_RIGHT, tooltip="Próximo registro", on_click=lambda e: navegar_detalhe(1)),
+                        titulo_detalhe,
+                        ft.IconButton(ft.Icons.CLOSE, tooltip="Fechar", on_click=fechar_detalhe),
+                    ],
+                ),
+                conteudo_detalhe,
+            ],
+        ),
+    )
+
+    # Consulta em lote: uma lista colada ou um arquivo com milhares de CNPJs,
+    # raízes ou contratos, resolvida em uma única consulta e gravada em arquivo
+    lote_atual = {'arquivo': None, 'cancelar': threading.Event(), 'rodando': False}
+
+    tipo_lote = ft.Dropdown(
+        width=200,
+        label="Tipo de valor",
+        value="cnpj",
+        options=[ft.dropdown.Option(tipo, rotulo) for tipo, rotulo in consulta_lote.TIPOS_CHAVE.items()],
+        text_size=14,
+        border_radius=10,
+    )
+    lista_lote = ft.TextField(
+        hint_text="Cole os valores aqui, um por linha",
+        multiline=True,
+        min_lines=8,
+        max_lines=12,
+        text_size=13,
+        border_radius=10,
+    )
+    arquivo_lote = ft.Text("", size=12, color=ft.Colors.GREY_700, expand=True, no_wrap=True, overflow=ft.TextOverflow.ELLIPSIS)
+    progresso_lote = ft.ProgressBar(value=0, visible=False)
+    status_lote = ft.Text("", size=13)
+
+    def escolher_arquivo_lote(e):
+        if e.files:
+            lote_atual['arquivo'] = e.files[0].path
+            arquivo_lote.value = f"Arquivo: {e.files[0].name}"
+            lista_lote.disabled = True
+        page.update()
+
+    def limpar_arquivo_lote(e):
+        lote_atual['arquivo'] = None
+        arquivo_lote.value = ""
+        lista_lote.disabled = False
+        page.update()
+
+    seletor_entrada_lote = ft.FilePicker(on_result=escolher_arquivo_lote)
+    seletor_saida_lote = ft.FilePicker(on_result=lambda e: page.run_task(executar_lote, e.path) if e.path else None)
+    page.overlay.extend([seletor_entrada_lote, seletor_saida_lote])
+
+    def avisar_progresso_lote(processados, total):
+        # Chamado pela thread da consulta
+        progresso_lote.value = processados / total if total else 1
+        status_lote.value = f"Gravando... {processados} de {total} valores"
+        progresso_lote.update()
+        status_lote.update()
+
+    def processar_lote(caminho):
+        tipo = tipo_lote.value
+        if lote_atual['arquivo']:
+            valores = consulta_lote.valores_de_arquivo(lote_atual['arquivo'], tipo)
+        else:
+            valores = consulta_lote.valores_de_texto(lista_lote.value)
+        escritor = planilhas.abrir_escritor(caminho)
+        try:
+            with pool.conexao() as conn:
+                if not conn:
+                    raise sqlite3.OperationalError("banco de dados não encontrado")
+                return consulta_lote.resolver_lote(
+                    conn, valores, tipo, escritor, avisar_progresso_lote, lote_atual['cancelar'].is_set
+                )
+        finally:
+            escritor.fechar()
+
+    async def executar_lote(caminho):
+        if not os.path.splitext(caminho)[1]:
+            caminho += '.csv'
+        lote_atual['rodando'] = True
+        lote_atual['cancelar'].clear()
+        botao_processar_lote.disabled = True
+        botao_fechar_lote.text = "Cancelar"
+        progresso_lote.value = None
+        progresso_lote.visible = True
+        status_lote.value = "Consultando..."
+        status_lote.color = None
+        page.update()
+        try:
+            with metricas.rastrear('lote', tipo=tipo_lote.value):
+                resumo = await asyncio.to_thread(processar_lote, caminho)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            status_lote.value = f"✗ Erro na consulta em lote: {e}"
+            status_lote.color = ft.Colors.RED_700
+        else:
+            if resumo['cancelado']:
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+                status_lote.value = "Consulta cancelada"
+            else:
+                progresso_lote.value = 1
+                status_lote.value = (
+                    f"✓ {resumo['valores']} valores: {resumo['encontrados']} encontrados "
+                    f"({resumo['registros']} registros), {resumo['nao_encontrados']} não encontrados, "
+                    f"{resumo['invalidos']} inválidos. Arquivo salvo em {caminho}"
+                )
+                status_lote.color = ft.Colors.GREEN_800
+        finally:
+            lote_atual['rodando'] = False
+            botao_processar_lote.disabled = False
+            botao_fechar_lote.text = "Fechar"
+            page.update()
+
+    def processar_lote_clique(e):
+        if not lote_atual['arquivo'] and not consulta_lote.valores_de_texto(lista_lote.value):
+            status_lote.value = "⚠ Cole uma lista de valores ou escolha um arquivo"
+            status_lote.color = ft.Colors.ORANGE_800
+            page.update()
+            return
+        extensoes = planilhas.EXTENSOES_GRAVACAO if planilhas.xlsx_disponivel() else ['csv']
+        seletor_saida_lote.save_file(
+            dialog_title="Salvar resultado da consulta em lote",
+            file_name=f"consulta_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            allowed_extensions=extensoes,
+        )
+
+    def fechar_lote(e):
+        if lote_atual['rodando']:
+            lote_atual['cancelar'].set()
+            return
+        page.close(dialogo_lote)
+
+    def abrir_lote(e):
+        progresso_lote.visible = False
+        status_lote.value = ""
+        page.open(dialogo_lote)
+
+    extensoes_entrada = planilhas.EXTENSOES_LEITURA if planilhas.xlsx_disponivel() else ['csv', 'txt']
+    botao_processar_lote = ft.ElevatedButton("Processar e salvar...", icon=ft.Icons.SAVE_ALT, on_click=processar_lote_clique)
+    botao_fechar_lote = ft.TextButton("Fechar", on_click=fechar_lote)
+    dialogo_lote = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("Consulta em lote"),
+        content=ft.Container(
+            width=600,
+            content=ft.Column(
+                tight=True,
+                controls=[
+                    tipo_lote,
+                    lista_lote,
+                    ft.Row(
+                        controls=[
+                            ft.OutlinedButton(
+                                "Abrir arquivo (CSV/XLSX)...",
+                                icon=ft.Icons.UPLOAD_FILE,
+                                on_click=lambda e: seletor_entrada_lote.pick_files(
+                                    dialog_title="Arquivo com os valores",
+                                    allowed_extensions=extensoes_entrada,
+                                ),
+                            ),
+                            arquivo_lote,
+                            ft.IconButton(ft.Icons.CLOSE, tooltip="Usar a lista colada", on_click=limpar_arquivo_lote),
+                        ],
+                    ),
+                    progresso_lote,
+                    status_lote,
+                ],
+            ),
+        ),
+        actions=[botao_fechar_lote, botao_processar_lote],
+    )
+
+    # Painel da carteira: totais por consultor, estado, produto, safra e
+    # indicadores, lidos só dos resumos que a sincronização grava (nenhum
+    # agrupamento da base é feito ao abrir)
+    conteudo_painel = ft.Column(scroll=ft.ScrollMode.AUTO, spacing=8, expand=True)
+    dialogo_painel = ft.AlertDialog(
+        title=ft.Text("Painel da carteira"),
+        content=ft.Container(width=900, height=600, content=conteudo_painel),
+        actions=[ft.TextButton("Fechar", on_click=lambda e: page.close(dialogo_painel))],
+    )
+
+    def ler_painel():
+        with pool.conexao() as conn:
+            if not conn:
+                return None
+            return painel_carteira.ler_resumo(conn)
+
+    async def abrir_painel(e):
+        conteudo_painel.controls = [ft.ProgressRing(width=40, height=40)]
+        page.open(dialogo_painel)
+        try:
+            with metricas.rastrear('painel'):
+                resumo = await asyncio.to_thread(ler_painel)
+        except sqlite3.Error as erro:
+            conteudo_painel.controls = [ft.Text(f"✗ Erro ao ler o painel: {erro}", color=ft.Colors.RED_700)]
+        else:
+            if resumo is None:
+                conteudo_painel.controls = [
+                    ft.Text("⚠ O banco ainda não tem os resumos da carteira (aguarde a próxima sincronização)")
+                ]
+            else:
+                conteudo_painel.controls = painel_carteira.criar_conteudo(resumo)
+        page.update()
+
+    # Exportação da busca exibida na grade: roda em segundo plano, com uma
+    # conexão própria, e mostra o andamento em um painel que não bloqueia a tela
+    exportacao_atual = {'rodando': False, 'completo': False, 'cancelar': threading.Event()}
+
+    texto_exportacao = ft.Text("", size=13, color=ft.Colors.WHITE)
+    progresso_exportacao = ft.ProgressBar(width=260, color=ft.Colors.WHITE, bgcolor=ft.Colors.BLUE_200)
+    painel_exportacao = ft.Container(
+        visible=False,
+        left=10,
+        bottom=60,
+        padding=10,
+        border_radius=10,
+        bgcolor=ft.Colors.BLUE_800,
+        content=ft.Row(
+            tight=True,
+            controls=[
+                ft.Column([texto_exportacao, progresso_exportacao], tight=True, spacing=5),
+                ft.IconButton(
+                    ft.Icons.CANCEL,
+                    icon_color=ft.Colors.WHITE,
+                    tooltip="Cancelar exportação",
+                    on_click=lambda e: exportacao_atual['cancelar'].set(),
+                ),
+            ],
+        ),
+    )
+    page.overlay.append(painel_exportacao)
+
+    def avisar_progresso_exportacao(gravados):
+        # Chamado pela thread da exportação
+        texto_exportacao.value = f"Exportando... {gravados:,} registros".replace(',', '.')
+        texto_exportacao.update()
+
+    def exportar(caminho, filtro, campo_filtro, completo, selecao, carteira):
+        versao = replica.versao_local()
+        conn = conectar_banco()
+        if conn is None:
+            raise sqlite3.OperationalError("banco de dados não encontrado")
+        escritor = None
+        try:
+            # O arquivo traz as mesmas linhas da grade, na mesma ordem: as
+            # facetas selecionadas e, se a grade mostrava a carteira do usuário
+            # primeiro, os contratos dela antes dos demais
+            indice_facetas = motor_facetas.indice(versao, conn) if selecao and motor_facetas is not None else None
+            permitido = indice_facetas.permitido(selecao) if indice_facetas is not None else None
+            primeiras = None
+            minha_carteira = motor_carteira.carteira(versao) if carteira else None
+            if minha_carteira is not None:
+                primeiras = minha_carteira.encontrados(filtro, campo_filtro)
+            escritor = planilhas.abrir_escritor(caminho)
+            return exportacao.exportar_busca(
+                conn, filtro, campo_filtro, escritor, completo,
+                avisar_progresso_exportacao, exportacao_atual['cancelar'].is_set, permitido, primeiras,
+            )
+        finally:
+            if escritor is not None:
+                escritor.fechar()
+            fechar_conexao(conn)
+
+    async def executar_exportacao(caminho):
+        if not os.path.splitext(caminho)[1]:
+            caminho += '.csv'
+        filtro, campo_filtro, selecao = busca_atual['filtro'], busca_atual['campo'], busca_atual['selecao']
+        carteira = busca_atual['carteira']
+        exportacao_atual['rodando'] = True
+        exportacao_atual['cancelar'].clear()
+        texto_exportacao.value = "Exportando..."
+        painel_exportacao.visible = True
+        page.update()
+        try:
+            with metricas.rastrear('exportacao', filtro=filtro, campo=campo_filtro):
+                gravados, cancelada = await asyncio.to_thread(
+                    exportar, caminho, filtro, campo_filtro, exportacao_atual['completo'], selecao, carteira
+                )
+        except (sqlite3.Error, OSError, ValueError) as e:
+            page.snack_bar = ft.SnackBar(
+                content=ft.Text(f"✗ Erro ao exportar: {e}", color=ft.Colors.WHITE),
+                bgcolor=ft.Colors.RED_700,
+            )
+        else:
+            if cancelada:
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+                page.snack_bar = ft.SnackBar(
+                    content=ft.Text("Exportação cancelada", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.ORANGE_700,
+                )
+            else:
+                page.snack_bar = ft.SnackBar(
+                    content=ft.Text(f"✓ {gravados} registro(s) exportado(s) para {caminho}", color=ft.Colors.WHITE),
+                    bgcolor=ft.Colors.GREEN_700,
+                )
+        finally:
+            exportacao_atual['rodando'] = False
+            painel_exportacao.visible = False
+            page.snack_bar.open = True
             page.update()
 
+    seletor_exportacao = ft.FilePicker(on_result=lambda e: page.run_task(executar_exportacao, e.path) if e.path else None)
+    page.overlay.append(seletor_exportacao)
+
+    def iniciar_exportacao(completo):
+        if exportacao_atual['rodando']:
+            page.snack_bar = ft.SnackBar(
+                content=ft.Text("⚠ Aguarde o fim da exportação em andamento", color=ft.Colors.WHITE),
+                bgcolor=ft.Colors.ORANGE_700,
+            )
+            page.snack_bar.open = True
+            page.update()
+            return
+        exportacao_atual['completo'] = completo
+        seletor_exportacao.save_file(
+            dialog_title="Exportar resultado da busca",
+            file_name=f"busca_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            allowed_extensions=planilhas.EXTENSOES_GRAVACAO if planilhas.xlsx_disponivel() else ['csv'],
+        )
+
+    # Painel de diagnóstico (F12): tempos de cada etapa da última busca
+    texto_metricas = ft.Text("", size=12, color=ft.Colors.WHITE, font_family="Consolas", selectable=True)
+    painel_metricas = ft.Container(
+        content=texto_metricas,
+        visible=False,
+        right=10,
+        bottom=60,
+        padding=10,
+        border_radius=10,
+        bgcolor=ft.Colors.with_opacity(0.85, ft.Colors.BLACK),
+    )
+    page.overlay.append(painel_metricas)
+
+    def descrever_metricas():
+        linhas = []
+        rastro = metricas.ultimo_rastro('busca')
+        if rastro is not None:
+            resumo = rastro.resumo()
+            linhas.append(f"Última busca: '{resumo['filtro']}' em {resumo['campo']} — {resumo['total_ms']:.1f} ms")
+            for etapa, ms in resumo['etapas']:
+                linhas.append(f"  {etapa:<26}{ms:>10.3f} ms")
+        else:
+            linhas.append("Nenhuma busca medida ainda")
+        geral = metricas.resumo().get('busca')
+        if geral and 'p50_ms' in geral:
+            linhas.append(f"Buscas: {geral['quantidade']} | p50 {geral['p50_ms']:.1f} ms | "
+                          f"p95 {geral['p95_ms']:.1f} ms | p99 {geral['p99_ms']:.1f} ms")
+        estatisticas = {**cache.estatisticas(), **pool.estatisticas()}
+        if motor_indice is not None:
+            estatisticas.update(motor_indice.estatisticas())
+        linhas.append(f"Cache: {estatisticas['cache_acertos']} acertos / {estatisticas['cache_falhas']} falhas"
+                      f" ({estatisticas['cache_bytes'] / 1024 / 1024:.1f} MB)")
+        linhas.append(f"Conexões: {estatisticas['conexoes_abertas']} abertas / {estatisticas['conexoes_reutilizadas']} reutilizadas")
+        if motor_indice is not None:
+            linhas.append(f"Índice em memória: {estatisticas['indice_bytes'] / 1024 / 1024:.1f} MB"
+                          f" | {estatisticas['indice_buscas_atendidas']} buscas atendidas")
+        return "\n".join(linhas)
+
+    def atualizar_painel_metricas():
+        if painel_metricas.visible:
+            texto_metricas.value = descrever_metricas()
+            painel_metricas.update()
+
+    # As medições só ficam ligadas com o painel aberto; o arquivo de métricas
+    # (rotativo) fica na pasta da cópia local do banco
+    def alternar_metricas():
+        painel_metricas.visible = not painel_metricas.visible
+        if painel_metricas.visible:
+            metricas.ativar(os.path.join(replica.diretorio_local, 'metricas.jsonl'))
+            texto_metricas.value = descrever_metricas()
+        else:
+            metricas.desativar()
+        page.update()
+
+    page.on_keyboard_event = lambda e: alternar_metricas() if e.key == "F12" else None
+
     # Botão pesquisar
     def pesquisar(e):
-        asyncio.run(atualizar_tabela_async(anchor.value, filtro_dropdown.value))
+        agendar_busca(anchor.value, filtro_dropdown.value)
+
+    # Trocar o campo refaz a busca do texto já digitado
+    filtro_dropdown.on_change = lambda e: agendar_busca(anchor.value, e.control.value, aguardar=False) \
+        if buscar_ao_digitar.value and anchor.value else None
 
     search_row = ft.Row(
         alignment=ft.MainAxisAlignment.CENTER,
@@ -390,6 +946,14 @@ def main(page: ft.Page):
                 content=filtro_dropdown,
                 height=56,
             ),
+            ft.Container(
+                content=buscar_ao_digitar,
+                height=56,
+            ),
+            ft.Container(
+                content=so_carteira,
+                height=56,
+            ),
             ft.Container(
                 content=anchor,
                 expand=True,
@@ -407,20 +971,131 @@ def main(page: ft.Page):
                     ),
                 ),
                 height=48,
-            )
+            ),
+            ft.Container(
+                content=ft.PopupMenuButton(
+                    icon=ft.Icons.DOWNLOAD,
+                    icon_color=ft.Colors.BLUE,
+                    tooltip="Exportar o resultado da busca (CSV/XLSX)",
+                    items=[
+                        ft.PopupMenuItem(text="Exportar colunas da grade", on_click=lambda e: iniciar_exportacao(False)),
+                        ft.PopupMenuItem(text="Exportar registros completos", on_click=lambda e: iniciar_exportacao(True)),
+                    ],
+                ),
+                height=48,
+            ),
+            ft.Container(
+                content=ft.IconButton(
+                    ft.Icons.PLAYLIST_ADD_CHECK,
+                    tooltip="Consulta em lote (lista de CNPJs, raízes ou contratos)",
+                    icon_color=ft.Colors.BLUE,
+                    on_click=abrir_lote,
+                ),
+                height=48,
+            ),
+            ft.Container(
+                content=ft.IconButton(
+                    ft.Icons.DASHBOARD,
+                    tooltip="Painel da carteira",
+                    icon_color=ft.Colors.BLUE,
+                    on_click=abrir_painel,
+                ),
+                height=48,
+            ),
         ]
     )
 
+    # Barra de facetas: um campo por faceta, com a quantidade de contratos de
+    # cada valor dentro das outras facetas selecionadas. As contagens vêm dos
+    # arrays de códigos montados na sincronização (nenhum GROUP BY no banco)
+    campos_faceta = {}
+    texto_facetas = ft.Text("", size=13, color=ft.Colors.GREY_700)
+    contagem_facetas = {'geracao': 0}
+
+    def formatar_quantidade(quantidade):
+        return f"{quantidade:,}".replace(',', '.')
+
+    def atualizar_facetas():
+        # Roda fora do loop da página; só a contagem mais recente é exibida
+        contagem_facetas['geracao'] += 1
+        geracao = contagem_facetas['geracao']
+        selecao = dict(selecao_facetas)
+        # Sem as facetas da versão atual, a leitura fica em segundo plano e
+        # chama esta função de novo quando terminar
+        indice = motor_facetas.indice(replica.versao_local())
+        if indice is None or geracao != contagem_facetas['geracao']:
+            return
+        with metricas.medir('facetas.contagens'):
+            contagens = indice.contagens(selecao)
+        for faceta, campo in campos_faceta.items():
+            if faceta not in contagens:
+                campo.visible = False
+                continue
+            opcoes = indice.opcoes(faceta, contagens, LIMITE_OPCOES_FACETA)
+            selecionado = selecao.get(faceta)
+            if selecionado is not None and selecionado not in (valor for valor, _ in opcoes):
+                # O valor escolhido continua na lista, mesmo sem contratos nas outras facetas
+                opcoes.append((selecionado, 0))
+            campo.options = [ft.dropdown.Option(FACETA_TODOS, "Todos")] + [
+                ft.dropdown.Option(valor, f"{valor} ({formatar_quantidade(quantidade)})") for valor, quantidade in opcoes
+            ]
+            campo.value = selecionado if selecionado is not None else FACETA_TODOS
+        texto_facetas.value = f"{formatar_quantidade(indice.total(selecao))} contrato(s) nas facetas"
+        barra_facetas.visible = True
+        page.update()
+
+    def refazer_busca_facetas():
+        threading.Thread(target=atualizar_facetas, daemon=True).start()
+        agendar_busca(anchor.value, filtro_dropdown.value, aguardar=False)
+
+    def escolher_faceta(faceta, valor):
+        if valor in (None, '', FACETA_TODOS):
+            selecao_facetas.pop(faceta, None)
+        else:
+            selecao_facetas[faceta] = valor
+        refazer_busca_facetas()
+
+    def limpar_facetas(e):
+        if not selecao_facetas:
+            return
+        selecao_facetas.clear()
+        refazer_busca_facetas()
+
+    for faceta, rotulo in facetas.ROTULOS.items():
+        campos_faceta[faceta] = ft.Dropdown(
+            label=rotulo,
+            width=210,
+            dense=True,
+            editable=True,
+            enable_filter=True,
+            menu_height=400,
+            text_size=13,
+            border_color=ft.Colors.BLUE,
+            value=FACETA_TODOS,
+            options=[ft.dropdown.Option(FACETA_TODOS, "Todos")],
+            on_change=lambda e, faceta=faceta: escolher_faceta(faceta, e.control.value),
+        )
+
+    barra_facetas = ft.Row(
+        visible=False,
+        wrap=True,
+        spacing=10,
+        run_spacing=10,
+        vertical_alignment=ft.CrossAxisAlignment.CENTER,
+        controls=[
+            *campos_faceta.values(),
+            ft.TextButton("Limpar filtros", icon=ft.Icons.FILTER_ALT_OFF, on_click=limpar_facetas),
+            texto_facetas,
+        ],
+    )
+
     # Dados iniciais
-    dados_iniciais = buscar_dados()
+    dados_iniciais, busca_atual['proximo'] = buscar_dados()
     table_container.content = criar_tabela(dados_iniciais)
 
+    # A rolagem é feita pela própria grade (ListView)
     scroll_table = ft.Container(
-        content=ft.Column(
-            controls=[table_container],
-            scroll=ft.ScrollMode.AUTO,
-            expand=True,
-        ),
+        content=table_container,
         expand=True,
         padding=5,
     )
@@ -431,7 +1106,29 @@ def main(page: ft.Page):
         content=ft.Text("© MISNEOHYPE2025", size=14, color=ft.Colors.BLACK87)
     )
 
-    page.add(search_row, scroll_table, footer)
+    corpo = ft.Row(
+        expand=True,
+        vertical_alignment=ft.CrossAxisAlignment.STRETCH,
+        controls=[scroll_table, painel_detalhe],
+    )
+
+    page.add(search_row, barra_facetas, indicador_busca, corpo, footer)
+
+    # A barra aparece quando as facetas da versão atual terminam de carregar
+    # (e é recontada a cada nova versão copiada)
+    if motor_facetas is not None:
+        threading.Thread(target=motor_facetas.iniciar, args=(lambda indice: atualizar_facetas(),), daemon=True).start()
+
+    # Com a carteira do usuário pronta, a tela inicial (ainda sem nada
+    # digitado) passa a mostrar os contratos dele no lugar das primeiras
+    # linhas da base
+    def carteira_pronta(carteira):
+        so_carteira.visible = True
+        page.update()
+        if not anchor.value:
+            agendar_busca(anchor.value, filtro_dropdown.value, aguardar=False)
+
+    threading.Thread(target=motor_carteira.iniciar, args=(carteira_pronta,), daemon=True).start()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,222 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# Amostras mais recentes guardadas por etapa (os percentis são calculados sobre elas)
+AMOSTRAS_POR_ETAPA = 1000
+
+# Intervalo entre as gravações do arquivo de métricas (segundos)
+INTERVALO_GRAVACAO = 60
+
+# Rotação do arquivo: tamanho máximo e quantidade de arquivos antigos mantidos
+TAMANHO_MAXIMO_ARQUIVO = 1024 * 1024
+ARQUIVOS_ANTIGOS = 3
+
+_ativo = False
+_lock = threading.Lock()
+_histogramas = {}
+_ultimos_rastros = {}
+_rastro_atual = contextvars.ContextVar('rastro_atual', default=None)
+_logger = None
+_parar = threading.Event()
+
+
+class Histograma:
+    """Tempos mais recentes de uma etapa (janela móvel), com contagem e soma totais"""
+
+    def __init__(self, tamanho=AMOSTRAS_POR_ETAPA):
+        self.amostras = deque(maxlen=tamanho)
+        self.quantidade = 0
+        self.total = 0.0
+
+    def adicionar(self, segundos):
+        self.amostras.append(segundos)
+        self.quantidade += 1
+        self.total += segundos
+
+    def resumo(self):
+        ordenadas = sorted(self.amostras)
+        if not ordenadas:
+            return {'quantidade': self.quantidade}
+
+        def percentil(fracao):
+            return round(ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))] * 1000, 3)
+
+        return {
+            'quantidade': self.quantidade,
+            'total_ms': round(self.total * 1000, 3),
+            'media_ms': round(self.total / self.quantidade * 1000, 3),
+            'p50_ms': percentil(0.50),
+            'p95_ms': percentil(0.95),
+            'p99_ms': percentil(0.99),
+            'max_ms': round(ordenadas[-1] * 1000, 3),
+        }
+
+
+class Rastro:
+    """Tempos das etapas de uma operação (por exemplo, uma busca), na ordem em que terminaram"""
+
+    def __init__(self, nome, **detalhes):
+        self.nome = nome
+        self.detalhes = detalhes
+        self.etapas = []
+        self.total = None
+
+    def resumo(self):
+        return {
+            'nome': self.nome,
+            **self.detalhes,
+            'total_ms': round(self.total * 1000, 3) if self.total is not None else None,
+            'etapas': [(etapa, round(segundos * 1000, 3)) for etapa, segundos in self.etapas],
+        }
+
+
+class _Nulo:
+    """Medição usada com as métricas desativadas: não faz nada"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Medicao:
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class _Rastreamento:
+    def __init__(self, nome, detalhes):
+        self.rastro = Rastro(nome, **detalhes)
+
+    def __enter__(self):
+        self.token = _rastro_atual.set(self.rastro)
+        self.inicio = time.perf_counter()
+        return self.rastro
+
+    def __exit__(self, *excecao):
+        self.rastro.total = time.perf_counter() - self.inicio
+        _rastro_atual.reset(self.token)
+        registrar(self.rastro.nome, self.rastro.total)
+        with _lock:
+            _ultimos_rastros[self.rastro.nome] = self.rastro
+        return False
+
+
+def ativo():
+    return _ativo
+
+
+def medir(nome):
+    """Mede o bloco `with` como a etapa `nome` (sem custo com as métricas desativadas)"""
+    if not _ativo:
+        return _NULO
+    return _Medicao(nome)
+
+
+def rastrear(nome, **detalhes):
+    """Agrupa as etapas medidas dentro do bloco em um Rastro (consultado em ultimo_rastro)
+
+    O rastro acompanha o contexto, inclusive em código executado com
+    asyncio.to_thread, então etapas medidas em outra thread entram nele.
+    """
+    if not _ativo:
+        return _NULO
+    return _Rastreamento(nome, detalhes)
+
+
+def registrar(nome, segundos):
+    """Registra um tempo já medido no histograma da etapa e no rastro atual"""
+    if not _ativo:
+        return
+    with _lock:
+        histograma = _histogramas.get(nome)
+        if histograma is None:
+            histograma = _histogramas[nome] = Histograma()
+        histograma.adicionar(segundos)
+    rastro = _rastro_atual.get()
+    if rastro is not None:
+        rastro.etapas.append((nome, segundos))
+
+
+def ultimo_rastro(nome):
+    with _lock:
+        return _ultimos_rastros.get(nome)
+
+
+def resumo():
+    """Percentis de todas as etapas medidas"""
+    with _lock:
+        return {nome: histograma.resumo() for nome, histograma in sorted(_histogramas.items())}
+
+
+def gravar(**extras):
+    """Grava uma linha JSON com os histogramas no arquivo de métricas (se configurado)"""
+    if _logger is None:
+        return
+    registro = {'data': datetime.now().isoformat(timespec='seconds'), 'etapas': resumo(), **extras}
+    _logger.info(json.dumps(registro, ensure_ascii=False))
+
+
+def ativar(caminho=None, intervalo=INTERVALO_GRAVACAO):
+    """Liga as medições; com `caminho`, grava os histogramas periodicamente nesse arquivo"""
+    global _ativo, _logger
+    if caminho and _logger is None:
+        _logger = logging.getLogger('metricas')
+        _logger.propagate = False
+        _logger.setLevel(logging.INFO)
+        manipulador = RotatingFileHandler(
+            caminho, maxBytes=TAMANHO_MAXIMO_ARQUIVO, backupCount=ARQUIVOS_ANTIGOS, encoding='utf-8'
+        )
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(manipulador)
+        if intervalo:
+            _parar.clear()
+            threading.Thread(target=_gravar_periodicamente, args=(intervalo,), name="metricas", daemon=True).start()
+    _ativo = True
+
+
+def desativar(**extras):
+    """Desliga as medições, gravando os histogramas uma última vez"""
+    global _ativo
+    if _ativo:
+        gravar(**extras)
+    _ativo = False
+
+
+def encerrar(**extras):
+    """Para a gravação periódica e fecha o arquivo de métricas"""
+    global _logger
+    desativar(**extras)
+    _parar.set()
+    if _logger is not None:
+        for manipulador in list(_logger.handlers):
+            manipulador.close()
+            _logger.removeHandler(manipulador)
+        _logger = None
+
+
+def _gravar_periodicamente(intervalo):
+    while not _parar.wait(intervalo):
+        if _ativo:
+            try:
+                gravar()
+            except OSError as e:
+                print(f"⚠ Aviso: Não foi possível gravar as métricas: {e}")
@@ -0,0 +1,44 @@
+import unicodedata
+
+
+def normalizar_texto(valor):
+    """Converte o texto para a forma usada nos índices de busca
+
+    Remove acentos, converte para maiúsculas e junta espaços repetidos,
+    para que "José da Silva" e "JOSE  DA SILVA" gerem a mesma chave.
+    """
+    if valor is None:
+        return None
+    texto = unicodedata.normalize('NFKD', str(valor))
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return ' '.join(texto.upper().split())
+
+
+# Maior quantidade de dígitos que cabe com folga em um INTEGER do SQLite
+MAX_DIGITOS = 18
+
+
+def somente_digitos(valor):
+    """Dígitos de um CNPJ, raiz ou contrato digitado em qualquer formato
+
+    Aceita pontuação ("12.345.678/0001-90"), mas retorna None se o valor tiver
+    letras ou não tiver dígitos, já que nesse caso ele não é um número.
+    """
+    if valor is None:
+        return None
+    texto = str(valor).strip()
+    if any(caractere.isalpha() for caractere in texto):
+        return None
+    digitos = ''.join(caractere for caractere in texto if '0' <= caractere <= '9')
+    if not digitos or len(digitos) > MAX_DIGITOS:
+        return None
+    return digitos
+
+
+def chave_numerica(valor):
+    """Chave canônica de um CNPJ, raiz ou contrato: somente os dígitos, como inteiro
+
+    Zeros à esquerda deixam de importar: "0012345" e "12345" geram a mesma chave.
+    """
+    digitos = somente_digitos(valor)
+    return int(digitos) if digitos is not None else None
@@ -0,0 +1,124 @@
+import flet as ft
+
+import metricas
+from criar_banco import DIMENSOES_RESUMO
+
+# Títulos das seções do painel, uma por dimensão resumida
+TITULOS_DIMENSAO = {
+    'consultor': "Por consultor",
+    'estado': "Por estado",
+    'produto': "Por produto",
+    'safra': "Por safra",
+    'cancelamento_de_contrato_renegociacao_de_tarifas': "Cancelamento / renegociação de tarifas",
+    'interesse_em_novos_produtos_prospects': "Interesse em novos produtos",
+}
+
+# Linhas exibidas por dimensão (as de mais contratos; a safra, das mais recentes)
+LIMITE_LINHAS = 50
+
+# Dimensões listadas pelo valor, não pela quantidade de contratos
+ORDEM_POR_VALOR = {'safra'}
+
+
+def ler_resumo(conn, limite=LIMITE_LINHAS):
+    """Lê os resumos da carteira montados na sincronização
+
+    Retorna {'total': (contratos, com_cancelamento, com_interesse), dimensão:
+    [(valor, contratos, com_cancelamento, com_interesse), ...]}. Só lê
+    tb_resumo_carteira, pela chave: o tempo não depende do tamanho da base.
+    Sem resumos no banco (sincronizado por uma versão anterior), retorna None.
+    """
+    with metricas.medir('painel.sql'):
+        total = conn.execute('''
+            SELECT contratos, com_cancelamento, com_interesse
+            FROM tb_resumo_carteira
+            WHERE dimensao = 'total' AND valor = ''
+        ''').fetchone()
+        if total is None:
+            return None
+        resumo = {'total': total}
+        for dimensao in DIMENSOES_RESUMO:
+            ordem = 'valor DESC' if dimensao in ORDEM_POR_VALOR else 'contratos DESC, valor'
+            resumo[dimensao] = conn.execute(f'''
+                SELECT valor, contratos, com_cancelamento, com_interesse
+                FROM tb_resumo_carteira
+                WHERE dimensao = ?
+                ORDER BY {ordem}
+                LIMIT ?
+            ''', (dimensao, limite)).fetchall()
+    return resumo
+
+
+def _numero(valor):
+    return f"{valor:,}".replace(',', '.')
+
+
+def _percentual(parte, total):
+    return f"{100 * parte / total:.1f}%".replace('.', ',') if total else "—"
+
+
+def _cartao(titulo, valor, detalhe=""):
+    return ft.Container(
+        width=220,
+        padding=12,
+        border_radius=10,
+        border=ft.border.all(0.5, ft.Colors.BLUE_200),
+        bgcolor=ft.Colors.BLUE_50,
+        content=ft.Column(
+            spacing=2,
+            controls=[
+                ft.Text(titulo, size=12, color=ft.Colors.GREY_700),
+                ft.Text(valor, size=22, weight="bold", color=ft.Colors.BLUE_800),
+                ft.Text(detalhe, size=11, color=ft.Colors.GREY_700),
+            ],
+        ),
+    )
+
+
+def _tabela(linhas):
+    return ft.DataTable(
+        heading_row_height=32,
+        data_row_min_height=28,
+        data_row_max_height=28,
+        column_spacing=24,
+        columns=[
+            ft.DataColumn(ft.Text("Valor", weight="bold")),
+            ft.DataColumn(ft.Text("Contratos", weight="bold"), numeric=True),
+            ft.DataColumn(ft.Text("Cancelamento", weight="bold"), numeric=True),
+            ft.DataColumn(ft.Text("Interesse", weight="bold"), numeric=True),
+        ],
+        rows=[
+            ft.DataRow(cells=[
+                ft.DataCell(ft.Text(valor or "(sem valor)", size=12)),
+                ft.DataCell(ft.Text(_numero(contratos), size=12)),
+                ft.DataCell(ft.Text(f"{_numero(cancelamento)} ({_percentual(cancelamento, contratos)})", size=12)),
+                ft.DataCell(ft.Text(f"{_numero(interesse)} ({_percentual(interesse, contratos)})", size=12)),
+            ])
+            for valor, contratos, cancelamento, interesse in linhas
+        ],
+    )
+
+
+def criar_conteudo(resumo):
+    """Controles do painel: totais da carteira e uma tabela por dimensão"""
+    contratos, cancelamento, interesse = resumo['total']
+    controles = [
+        ft.Row(
+            wrap=True,
+            spacing=10,
+            controls=[
+                _cartao("Contratos", _numero(contratos)),
+                _cartao("Cancelamento / renegociação", _numero(cancelamento), _percentual(cancelamento, contratos)),
+                _cartao("Interesse em novos produtos", _numero(interesse), _percentual(interesse, contratos)),
+            ],
+        ),
+        ft.Divider(height=10),
+    ]
+    for dimensao in DIMENSOES_RESUMO:
+        linhas = resumo.get(dimensao)
+        if not linhas:
+            continue
+        controles.append(ft.Text(TITULOS_DIMENSAO[dimensao], size=14, weight="bold", color=ft.Colors.BLUE_800))
+        controles.append(_tabela(linhas))
+        controles.append(ft.Divider(height=10))
+    return controles
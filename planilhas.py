@@ -0,0 +1,101 @@
+import csv
+import os
+
+try:
+    import openpyxl
+except ImportError:
+    # Sem o openpyxl, só arquivos CSV/TXT são lidos e gravados
+    openpyxl = None
+
+# Formato dos CSV gravados: separador e codificação que o Excel em português abre direto
+DELIMITADOR_CSV = ';'
+ENCODING_CSV = 'utf-8-sig'
+
+EXTENSOES_LEITURA = ['csv', 'txt', 'xlsx']
+EXTENSOES_GRAVACAO = ['csv', 'xlsx']
+
+
+def xlsx_disponivel():
+    return openpyxl is not None
+
+
+def _extensao(caminho):
+    return os.path.splitext(caminho)[1].lower().lstrip('.')
+
+
+def _detectar_delimitador(amostra):
+    try:
+        return csv.Sniffer().sniff(amostra, delimiters=';,\t|').delimiter
+    except csv.Error:
+        return DELIMITADOR_CSV
+
+
+def _texto_celula(valor):
+    # Números digitados no Excel (um CNPJ sem pontuação, por exemplo) chegam como float
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def ler_linhas(caminho):
+    """Lê as linhas de um arquivo CSV, TXT ou XLSX (primeira planilha), uma a uma
+
+    Cada linha é uma lista de valores; células vazias viram ''. O separador
+    do CSV é detectado pelo conteúdo.
+    """
+    if _extensao(caminho) == 'xlsx':
+        if openpyxl is None:
+            raise ValueError("para ler arquivos XLSX instale o openpyxl (pip install openpyxl)")
+        livro = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            for linha in livro.worksheets[0].iter_rows(values_only=True):
+                yield [_texto_celula(valor) for valor in linha]
+        finally:
+            livro.close()
+        return
+
+    with open(caminho, newline='', encoding=ENCODING_CSV, errors='replace') as arquivo:
+        delimitador = _detectar_delimitador(arquivo.read(4096))
+        arquivo.seek(0)
+        yield from csv.reader(arquivo, delimiter=delimitador)
+
+
+class EscritorCsv:
+    """Grava as linhas direto no arquivo, sem guardá-las em memória"""
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'w', newline='', encoding=ENCODING_CSV)
+        self._escritor = csv.writer(self._arquivo, delimiter=DELIMITADOR_CSV)
+
+    def escrever_linhas(self, linhas):
+        self._escritor.writerows(linhas)
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class EscritorXlsx:
+    """Grava a planilha no modo de escrita sequencial do openpyxl (memória constante)"""
+
+    def __init__(self, caminho):
+        if openpyxl is None:
+            raise ValueError("para gravar arquivos XLSX instale o openpyxl (pip install openpyxl)")
+        self.caminho = caminho
+        self._livro = openpyxl.Workbook(write_only=True)
+        self._planilha = self._livro.create_sheet()
+
+    def escrever_linhas(self, linhas):
+        for linha in linhas:
+            self._planilha.append(linha)
+
+    def fechar(self):
+        self._livro.save(self.caminho)
+
+
+def abrir_escritor(caminho):
+    """Escritor de CSV ou XLSX, conforme a extensão do arquivo (CSV para as demais)"""
+    if _extensao(caminho) == 'xlsx':
+        return EscritorXlsx(caminho)
+    return EscritorCsv(caminho)
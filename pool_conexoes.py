@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import metricas
+
+# Versão não informada pelo chamador: é lida com versao_atual (None é uma versão válida)
+_LER_VERSAO = object()
+
+
+class PoolConexoes:
+    """Mantém conexões de leitura abertas durante toda a vida do app
+
+    Cada conexão é emprestada a uma thread por vez (o executor usado em
+    atualizar_tabela_async pode ter várias buscas em paralelo) e devolvida
+    ao final, mantendo o cache de páginas do SQLite e o cache de comandos
+    preparados do módulo sqlite3, que reaproveita o comando compilado
+    sempre que o mesmo texto SQL é executado na mesma conexão.
+
+    Quando a versão do banco muda (novo snapshot copiado), as conexões da
+    versão anterior são descartadas ao serem devolvidas ou emprestadas, e a
+    próxima consulta já abre o arquivo novo.
+    """
+
+    def __init__(self, abrir, versao_atual=None, fechar=None, tamanho=4):
+        self._abrir = abrir
+        self._versao_atual = versao_atual or (lambda: None)
+        self._fechar = fechar or (lambda conn: conn.close())
+        self._livres = queue.LifoQueue()
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._lock = threading.Lock()
+        self._versoes = {}
+        self.tamanho = tamanho
+        self.reutilizadas = 0
+        self.aberturas = 0
+        self.descartadas = 0
+        self.tempo_espera = 0.0
+
+    @contextmanager
+    def conexao(self, versao=_LER_VERSAO):
+        """Empresta uma conexão (None se o banco não puder ser aberto)
+
+        `versao` é a versão do banco já lida por quem pede (uma busca lê o
+        marcador uma vez só); sem ela, a versão é lida no empréstimo e de
+        novo na devolução.
+        """
+        inicio = time.perf_counter()
+        self._vagas.acquire()
+        espera = time.perf_counter() - inicio
+
+        lida = versao is _LER_VERSAO
+        conn = None
+        try:
+            if lida:
+                versao = self._versao_atual()
+            conn = self._emprestar(versao)
+            with self._lock:
+                self.tempo_espera += espera
+            metricas.registrar('busca.conexao', time.perf_counter() - inicio)
+            yield conn
+        finally:
+            if conn is not None:
+                self._devolver(conn, _LER_VERSAO if lida else versao)
+            self._vagas.release()
+
+    def _emprestar(self, versao):
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            if self._versoes.get(id(conn)) == versao:
+                with self._lock:
+                    self.reutilizadas += 1
+                return conn
+            self._descartar(conn)
+
+        conn = self._abrir()
+        if conn is not None:
+            with self._lock:
+                self.aberturas += 1
+                self._versoes[id(conn)] = versao
+        return conn
+
+    def _devolver(self, conn, versao):
+        if versao is _LER_VERSAO:
+            versao = self._versao_atual()
+        if self._versoes.get(id(conn)) == versao:
+            self._livres.put(conn)
+        else:
+            self._descartar(conn)
+
+    def _descartar(self, conn):
+        with self._lock:
+            self._versoes.pop(id(conn), None)
+            self.descartadas += 1
+        try:
+            self._fechar(conn)
+        except Exception:
+            pass
+
+    def versao_de(self, conn):
+        """Versão do banco com que `conn` foi aberta"""
+        return self._versoes.get(id(conn))
+
+    def estatisticas(self):
+        """Contadores de uso do pool"""
+        with self._lock:
+            return {
+                'conexoes_reutilizadas': self.reutilizadas,
+                'conexoes_abertas': self.aberturas,
+                'conexoes_descartadas': self.descartadas,
+                'tempo_espera_s': round(self.tempo_espera, 6),
+                'conexoes_livres': self._livres.qsize(),
+                'tamanho': self.tamanho,
+            }
+
+    def fechar(self):
+        """Fecha todas as conexões livres"""
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
@@ -0,0 +1,197 @@
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+
+from criar_banco import atualizar_estrutura, garantir_indices_busca
+from versao_banco import (
+    ARQUIVO_BANCO,
+    PREFIXO_SNAPSHOT,
+    arquivo_inalterado,
+    caminho_banco_atual,
+    ler_versao,
+    publicar_versao,
+    remover_snapshots_antigos,
+)
+
+# Intervalo entre as verificações de nova versão em segundo plano (segundos)
+INTERVALO_VERIFICACAO = 300
+
+# Tamanho máximo do mapeamento em memória do arquivo local (bytes)
+MMAP_SIZE = 1024 * 1024 * 1024
+
+
+def diretorio_local_padrao():
+    """Pasta local onde a cópia do banco é mantida (fora da rede)"""
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'AppConsultor')
+
+
+class GerenciadorReplica:
+    """Mantém uma cópia local, somente leitura, do banco publicado na rede
+
+    A origem é a pasta compartilhada (onde a sincronização publica o banco) e
+    o destino é uma pasta no disco local. A cópia só é refeita quando a versão
+    publicada muda, e cada versão local recebe um arquivo próprio que nunca é
+    alterado depois de copiado; por isso ela pode ser aberta como imutável,
+    sem locks nem journal, e com leitura mapeada em memória.
+    """
+
+    def __init__(self, diretorio_origem, diretorio_local=None, intervalo=INTERVALO_VERIFICACAO):
+        self.diretorio_origem = diretorio_origem
+        self.diretorio_local = diretorio_local or diretorio_local_padrao()
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        os.makedirs(self.diretorio_local, exist_ok=True)
+
+    def _publicada(self):
+        # (versão, caminho do banco, se é um snapshot inalterado) publicados na
+        # origem, lidos de uma só vez do marcador. Um snapshot alterado depois
+        # de publicado (fora da sincronização) ganha uma versão com o tamanho
+        # e a data do arquivo e é copiado pela API de backup; no consultor.db
+        # tradicional a versão também vem da data de modificação e do tamanho
+        versao = ler_versao(self.diretorio_origem)
+        if versao and arquivo_inalterado(self.diretorio_origem, versao):
+            return versao['versao'], os.path.join(self.diretorio_origem, versao['arquivo']), True
+        if versao:
+            caminho = os.path.join(self.diretorio_origem, versao['arquivo'])
+            prefixo = f"{versao['versao']}_"
+            print(f"⚠ Aviso: O snapshot {versao['arquivo']} foi alterado depois de publicado")
+        else:
+            caminho = os.path.join(self.diretorio_origem, ARQUIVO_BANCO)
+            prefixo = ''
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            return None, None, False
+        return f"{prefixo}{int(info.st_mtime)}_{info.st_size}", caminho, False
+
+    def versao_origem(self):
+        """Identifica a versão publicada na origem (None se não houver banco)
+
+        Com snapshot publicado, usa o marcador de versão; no consultor.db
+        tradicional, usa a data de modificação e o tamanho do arquivo.
+        """
+        return self._publicada()[0]
+
+    def versao_local(self):
+        """Versão da cópia local atual (None se ainda não houver cópia)"""
+        versao = ler_versao(self.diretorio_local)
+        if versao and os.path.exists(os.path.join(self.diretorio_local, versao['arquivo'])):
+            return versao['versao']
+        return None
+
+    def atualizar(self):
+        """Copia a versão publicada para o disco local, se ela tiver mudado
+
+        Retorna True quando uma nova versão foi copiada.
+        """
+        with self._lock:
+            # O marcador é lido uma vez só: se a sincronização publicar outra
+            # versão durante a cópia, o nome local continua sendo o do arquivo copiado
+            versao, origem, inalterado = self._publicada()
+            if versao is None or versao == self.versao_local():
+                return False
+
+            nome_local = f'{PREFIXO_SNAPSHOT}{versao}.db'
+            caminho_local = os.path.join(self.diretorio_local, nome_local)
+            temporario = caminho_local + '.tmp'
+            try:
+                if inalterado:
+                    # Snapshots publicados não mudam depois de criados: cópia direta
+                    shutil.copyfile(origem, temporario)
+                else:
+                    # O consultor.db tradicional (ou um snapshot alterado) pode estar
+                    # sendo gravado: usa a API de backup do SQLite para obter uma
+                    # cópia consistente
+                    self._copiar_com_backup(origem, temporario)
+                self._completar_estrutura(temporario)
+                os.replace(temporario, caminho_local)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠ Aviso: Não foi possível copiar o banco da rede: {e}")
+                try:
+                    os.remove(temporario)
+                except OSError:
+                    pass
+                return False
+
+            publicar_versao(self.diretorio_local, nome_local, versao=versao)
+            remover_snapshots_antigos(self.diretorio_local)
+            print(f"✓ Cópia local atualizada para a versão {versao}")
+            return True
+
+    def _copiar_com_backup(self, origem, destino):
+        conn_origem = sqlite3.connect(f'{Path(origem).absolute().as_uri()}?mode=ro', uri=True)
+        conn_destino = sqlite3.connect(destino)
+        try:
+            conn_origem.backup(conn_destino)
+            conn_destino.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            conn_destino.close()
+            conn_origem.close()
+
+    def _completar_estrutura(self, caminho):
+        # Bancos publicados por versões anteriores da sincronização não têm a
+        # projeção de busca, as facetas ou os resumos: eles são criados na
+        # cópia, antes de virar imutável
+        conn = sqlite3.connect(caminho)
+        try:
+            existentes = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('tb_busca_grade', 'tb_faceta_codigos', 'tb_resumo_carteira')"
+            ).fetchone()[0]
+            if existentes < 3:
+                print("Criando a projeção de busca, as facetas e os resumos na cópia local...")
+                atualizar_estrutura(conn)
+                garantir_indices_busca(conn)
+        finally:
+            conn.close()
+
+    def caminho_banco(self):
+        """Caminho do arquivo local da versão atual (None se ainda não houver cópia)"""
+        if self.versao_local() is None:
+            return None
+        return caminho_banco_atual(self.diretorio_local)
+
+    def conectar(self):
+        """Abre a cópia local em modo somente leitura, imutável e com mmap"""
+        caminho = self.caminho_banco()
+        if caminho is None:
+            return None
+        conn = sqlite3.connect(
+            f'{Path(caminho).absolute().as_uri()}?mode=ro&immutable=1',
+            uri=True,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=10000")
+        return conn
+
+    def iniciar(self):
+        """Prepara a cópia local e inicia a verificação em segundo plano
+
+        Na primeira execução (sem cópia local) a cópia é feita antes de
+        retornar; nas seguintes o app abre com a cópia que já existe e a
+        atualização acontece em segundo plano.
+        """
+        if self.versao_local() is None:
+            self.atualizar()
+        else:
+            threading.Thread(target=self.atualizar, name="replica-inicial", daemon=True).start()
+
+        self._thread = threading.Thread(target=self._verificar_periodicamente, name="replica", daemon=True)
+        self._thread.start()
+
+    def _verificar_periodicamente(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.atualizar()
+            except Exception as e:
+                print(f"⚠ Aviso: Falha ao verificar nova versão do banco: {e}")
+
+    def parar(self):
+        """Interrompe a verificação em segundo plano"""
+        self._parar.set()
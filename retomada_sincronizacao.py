@@ -0,0 +1,207 @@
+from esquema_compacto import tabela_contratos
+from fontes_dados import Particao
+
+# Marca "nenhuma chave lida ainda" (None é a chave das linhas sem contrato)
+_SEM_CHAVE = object()
+
+
+def execucao_mais_recente(conn, modo='completo'):
+    """Última execução registrada do modo, como dicionário (None se não houver)"""
+    cursor = conn.execute('''
+        SELECT id, identificador_origem, colunas, registros, iniciada_em, concluida_em
+        FROM tb_sincronizacao_execucao
+        WHERE modo = ?
+        ORDER BY id DESC
+        LIMIT 1
+    ''', (modo,))
+    linha = cursor.fetchone()
+    if linha is None:
+        return None
+    return dict(zip([descricao[0] for descricao in cursor.description], linha))
+
+
+def execucao_concluida(conn, execucao_id):
+    """Indica, só pelos pontos de retomada, se a execução carregou a origem inteira
+
+    A execução precisa estar marcada como concluída, com todas as partições
+    concluídas e a soma das linhas das partições igual ao total registrado.
+    """
+    linha = conn.execute('''
+        SELECT execucao.concluida_em IS NOT NULL,
+               execucao.registros,
+               COUNT(particao.numero),
+               SUM(particao.concluida),
+               SUM(particao.registros)
+        FROM tb_sincronizacao_execucao AS execucao
+        LEFT JOIN tb_sincronizacao_particao AS particao ON particao.execucao = execucao.id
+        WHERE execucao.id = ?
+        GROUP BY execucao.id
+    ''', (execucao_id,)).fetchone()
+    if linha is None:
+        return False
+    marcada, registros, particoes, concluidas, lidas = linha
+    return bool(marcada) and particoes > 0 and concluidas == particoes and lidas == registros
+
+
+def execucao_pendente(conn, modo='completo'):
+    """Última execução do modo, se ela foi interrompida antes de terminar"""
+    execucao = execucao_mais_recente(conn, modo)
+    if execucao is None or execucao_concluida(conn, execucao['id']):
+        return None
+    return execucao
+
+
+def iniciar_execucao(conn, modo, identificador, colunas, particoes):
+    """Registra uma execução nova com suas partições e descarta os pontos das anteriores
+
+    Retorna o id da execução. Não confirma a transação.
+    """
+    conn.execute("DELETE FROM tb_sincronizacao_particao")
+    conn.execute("DELETE FROM tb_sincronizacao_execucao")
+    cursor = conn.execute(
+        "INSERT INTO tb_sincronizacao_execucao (modo, identificador_origem, colunas) VALUES (?, ?, ?)",
+        (modo, identificador, ','.join(colunas)),
+    )
+    execucao_id = cursor.lastrowid
+    conn.executemany('''
+        INSERT INTO tb_sincronizacao_particao (execucao, numero, inicio, fim, nulos)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(execucao_id, particao.numero, particao.inicio, particao.fim, int(particao.nulos)) for particao in particoes])
+    return execucao_id
+
+
+def descartar_execucao(conn, execucao_id):
+    """Apaga os pontos de retomada da execução (a próxima carga começa do zero). Não confirma a transação."""
+    conn.execute("DELETE FROM tb_sincronizacao_particao WHERE execucao = ?", (execucao_id,))
+    conn.execute("DELETE FROM tb_sincronizacao_execucao WHERE id = ?", (execucao_id,))
+
+
+def particoes_execucao(conn, execucao_id, chave):
+    """Todas as partições da execução, com os limites com que ela começou"""
+    return [
+        Particao(numero, inicio, fim, bool(nulos), chave)
+        for numero, inicio, fim, nulos in conn.execute('''
+            SELECT numero, inicio, fim, nulos
+            FROM tb_sincronizacao_particao
+            WHERE execucao = ?
+            ORDER BY numero
+        ''', (execucao_id,))
+    ]
+
+
+def preparar_retomada(conn, execucao_id, chave):
+    """Descarta as linhas gravadas depois do último ponto e retorna as partições que faltam ler
+
+    Cada partição pendente recomeça logo depois da última chave gravada com
+    segurança (todas as linhas dela já estão no banco). As linhas gravadas
+    depois desse ponto são apagadas e lidas de novo. Confirma a transação.
+
+    Retorna (partições pendentes, registros já gravados).
+    """
+    limite, gravados = conn.execute('''
+        SELECT COALESCE(MAX(ultimo_rowid), 0), COALESCE(SUM(registros), 0)
+        FROM tb_sincronizacao_particao
+        WHERE execucao = ?
+    ''', (execucao_id,)).fetchone()
+    tabela = tabela_contratos(conn)
+    conn.execute(f'''
+        DELETE FROM tb_hash_contrato
+        WHERE contrato IN (SELECT contrato FROM {tabela} WHERE ROWID > ?)
+    ''', (limite,))
+    conn.execute(f"DELETE FROM {tabela} WHERE ROWID > ?", (limite,))
+    conn.commit()
+
+    pendentes = []
+    for numero, inicio, fim, nulos, ultima_chave in conn.execute('''
+        SELECT numero, inicio, fim, nulos, ultima_chave
+        FROM tb_sincronizacao_particao
+        WHERE execucao = ? AND NOT concluida
+        ORDER BY numero
+    ''', (execucao_id,)):
+        if ultima_chave is not None:
+            inicio = ultima_chave
+        pendentes.append(Particao(numero, inicio, fim, bool(nulos), chave))
+    return pendentes, gravados
+
+
+class PontoRetomada:
+    """Grava o avanço da carga a cada lote, na mesma transação das linhas do lote
+
+    Usado com um LeitorParticionado, que entrega as partições em ordem e as
+    linhas de cada partição em ordem da chave. O ponto guardado é a maior
+    chave cujas linhas já foram todas gravadas (a chave do fim do lote pode
+    continuar no lote seguinte) e o ROWID da última dessas linhas.
+    """
+
+    def __init__(self, conn, execucao_id, leitor, posicao_chave):
+        self.execucao_id = execucao_id
+        self.leitor = leitor
+        self.posicao_chave = posicao_chave
+        self.tabela = tabela_contratos(conn)
+        self._concluidas = set()
+        self._lidas = dict(conn.execute(
+            "SELECT numero, registros FROM tb_sincronizacao_particao WHERE execucao = ?", (execucao_id,)
+        ))
+        self._particao = None
+        self._ultima = _SEM_CHAVE
+        self._cauda = 0
+
+    def _concluir_particoes(self, cursor, ultimo_rowid):
+        # Partições que o leitor já terminou de entregar (e cuja contagem conferiu)
+        for numero in sorted(self.leitor.contagens.keys() - self._concluidas):
+            cursor.execute('''
+                UPDATE tb_sincronizacao_particao
+                SET concluida = 1, registros = ?, ultimo_rowid = MAX(COALESCE(ultimo_rowid, 0), ?)
+                WHERE execucao = ? AND numero = ?
+            ''', (self._lidas.get(numero, 0), ultimo_rowid, self.execucao_id, numero))
+            self._concluidas.add(numero)
+
+    def registrar(self, cursor, lote):
+        """Atualiza o ponto da partição do lote (chamado depois de inserir o lote, antes do commit)"""
+        ultimo_rowid = cursor.execute(f"SELECT MAX(ROWID) FROM {self.tabela}").fetchone()[0]
+        self._concluir_particoes(cursor, ultimo_rowid - len(lote))
+
+        numero = self.leitor.particao_atual.numero
+        if numero != self._particao:
+            self._particao, self._ultima, self._cauda = numero, _SEM_CHAVE, 0
+        self._lidas[numero] = self._lidas.get(numero, 0) + len(lote)
+
+        # Linhas do fim do lote com a mesma chave da última linha (podem continuar no próximo lote)
+        chaves = [linha[self.posicao_chave] for linha in lote]
+        ultima = chaves[-1]
+        iguais = len(chaves)
+        for posicao in range(len(chaves) - 1, -1, -1):
+            if chaves[posicao] != ultima:
+                iguais = len(chaves) - 1 - posicao
+                break
+        if iguais < len(chaves):
+            segura = chaves[-iguais - 1]
+        elif self._ultima is not _SEM_CHAVE and ultima != self._ultima:
+            # O lote inteiro tem uma chave só: a do fim do lote anterior terminou
+            segura = self._ultima
+        else:
+            segura = _SEM_CHAVE
+        self._cauda = iguais if segura is not _SEM_CHAVE or self._ultima is _SEM_CHAVE else self._cauda + iguais
+        self._ultima = ultima
+
+        if segura is not _SEM_CHAVE:
+            cursor.execute('''
+                UPDATE tb_sincronizacao_particao
+                SET ultima_chave = ?, ultimo_rowid = ?, registros = ?
+                WHERE execucao = ? AND numero = ?
+            ''', (segura, ultimo_rowid - self._cauda, self._lidas[numero] - self._cauda,
+                  self.execucao_id, numero))
+
+    def concluir(self, cursor):
+        """Marca a execução como concluída (chamado depois que o leitor entregou tudo)
+
+        Retorna o total de registros da tabela.
+        """
+        total, ultimo_rowid = cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(ROWID), 0) FROM {self.tabela}").fetchone()
+        self._concluir_particoes(cursor, ultimo_rowid)
+        cursor.execute('''
+            UPDATE tb_sincronizacao_execucao
+            SET registros = ?, concluida_em = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (total, self.execucao_id))
+        return total
@@ -1,8 +1,62 @@
-import pyodbc
+import argparse
+import itertools
+import json
+import queue
+import shutil
 import sqlite3
 import os
+import tempfile
+import threading
+import time
 from datetime import datetime
 
+try:
+    import pyodbc
+except ImportError:
+    # Permite usar a sincronização com fontes locais (SQLite/CSV) sem o driver ODBC
+    pyodbc = None
+
+from criar_banco import (
+    CHAVES_NUMERICAS,
+    LAYOUT_COMPACTO,
+    atualizar_estrutura,
+    atualizar_indices_busca,
+    converter_para_layout_compacto,
+    criar_indices,
+    criar_tabelas,
+    garantir_indices_busca,
+    reconstruir_facetas,
+    reconstruir_indices_busca,
+    reconstruir_resumos,
+    remover_indices_busca,
+)
+from esquema_compacto import GravadorContratos, layout_compacto, limpar_contratos
+import metricas
+from fontes_dados import (
+    CHAVE_PARTICAO,
+    FonteSqlServer,
+    calcular_hash_linha,
+    faixas_alteradas,
+    particoes_da_impressao,
+    tabela_inteira,
+)
+from normalizacao import chave_numerica
+from retomada_sincronizacao import (
+    PontoRetomada,
+    descartar_execucao,
+    execucao_pendente,
+    iniciar_execucao,
+    particoes_execucao,
+    preparar_retomada,
+)
+from versao_banco import (
+    PREFIXO_SNAPSHOT,
+    caminho_banco_atual,
+    ler_versao,
+    publicar_versao,
+    remover_snapshots_antigos,
+)
+
 # Configurações do SQL Server
 SQL_SERVER = '10.223.141.20'  # Ex: 'localhost' ou '192.168.1.100'
 SQL_DATABASE = 'DB_ALELO'
@@ -10,9 +64,31 @@ SQL_TABLE = 'tb_base_contrato_consultor'
 
 # Configurações do SQLite
 SQLITE_DB = 'consultor.db'
+DIRETORIO_SQLITE = r'\\fileserver\Operacoes\Alelo\Alelo_PAT\MIS' #os.path.dirname(os.path.abspath(__file__))
+
+# Um snapshot com menos registros que esta fração do anterior não é publicado
+LIMITE_QUEDA_REGISTROS = 0.5
+
+# Configurações da transferência (registros por lote e lotes em memória)
+TAMANHO_LOTE = 5000
+TAMANHO_FILA = 8
+INTERVALO_PROGRESSO = 2.0  # segundos entre as mensagens de progresso
+
+# Extração em paralelo: a origem é dividida em faixas de CHAVE_PARTICAO, lidas
+# por CONEXOES_ORIGEM conexões ao mesmo tempo (0 partições = uma única leitura)
+PARTICOES_ORIGEM = 0
+CONEXOES_ORIGEM = 4
+
+# Faixas de CHAVE_PARTICAO em que a impressão da origem é calculada (sem --particoes):
+# só as faixas cuja impressão mudou são lidas de novo na sincronização incremental
+FAIXAS_IMPRESSAO = 32
 
 def conectar_sqlserver():
     """Conecta ao SQL Server usando Windows Authentication (Trusted Connection)"""
+    if pyodbc is None:
+        print("✗ Erro: o pacote pyodbc não está instalado.")
+        return None
+    
     try:
         connection_string = (
             f'DRIVER={{SQL Server}};'
@@ -29,11 +105,16 @@ def conectar_sqlserver():
         print(f"✗ Erro ao conectar ao SQL Server: {e}")
         return None
 
-def conectar_sqlite():
-    """Conecta ao banco SQLite local"""
+def conectar_sqlite(caminho=None):
+    """Conecta ao banco SQLite (por padrão, o consultor.db tradicional)
+    
+    Nunca abre o snapshot publicado: ele não muda depois de publicado (as
+    réplicas o copiam sem a API de backup). Com um snapshot publicado, as
+    sincronizações gravam numa cópia (copiar_versao_publicada) que é
+    publicada como nova versão.
+    """
     try:
-        diretorio_raiz = r'\\fileserver\Operacoes\Alelo\Alelo_PAT\MIS' #os.path.dirname(os.path.abspath(__file__))
-        caminho_banco = os.path.join(diretorio_raiz, SQLITE_DB)
+        caminho_banco = caminho or os.path.join(DIRETORIO_SQLITE, SQLITE_DB)
         
         if not os.path.exists(caminho_banco):
             print(f"✗ Erro: Banco de dados '{SQLITE_DB}' não encontrado!")
@@ -48,88 +129,873 @@ def conectar_sqlite():
         print(f"✗ Erro ao conectar ao SQLite: {e}")
         return None
 
-def buscar_dados_sqlserver(conn):
-    """Busca todos os dados da tabela no SQL Server"""
-    try:
-        cursor = conn.cursor()
-        query = f"SELECT * FROM {SQL_TABLE}"
-        
-        print(f"\nBuscando dados de [{SQL_TABLE}]...")
-        cursor.execute(query)
-        
-        # Obtém os nomes das colunas
-        colunas = [column[0] for column in cursor.description]
-        
-        # Busca todos os registros
-        dados = cursor.fetchall()
-        
-        print(f"✓ {len(dados)} registros encontrados")
-        print(f"✓ {len(colunas)} colunas")
-        
-        return colunas, dados
-    except pyodbc.Error as e:
-        print(f"✗ Erro ao buscar dados: {e}")
-        return None, None
+class LeitorEmSegundoPlano:
+    """Lê os lotes de uma fonte em uma thread própria, com fila limitada
+    
+    A thread leitora (produtora) busca os lotes com fetchmany enquanto a thread
+    que itera sobre o leitor (consumidora) grava no SQLite. Como a fila tem
+    tamanho máximo, no máximo `tamanho_fila` lotes ficam em memória ao mesmo
+    tempo, independentemente do total de registros da origem.
+    """
+    
+    _FIM = object()
+    
+    def __init__(self, fonte, tamanho_lote=TAMANHO_LOTE, tamanho_fila=TAMANHO_FILA):
+        self.fonte = fonte
+        self.tamanho_lote = tamanho_lote
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.particao_atual = None
+        self._parar = threading.Event()
+        self._erro = None
+        self._thread = None
+    
+    def _produzir(self):
+        try:
+            lotes = iter(self.fonte.lotes(self.tamanho_lote))
+            while True:
+                with metricas.medir('sync.leitura_lote'):
+                    lote = next(lotes, None)
+                if lote is None:
+                    break
+                if not self._colocar(lote):
+                    return
+        except Exception as e:
+            self._erro = e
+        finally:
+            self._colocar(self._FIM)
+    
+    def _colocar(self, item):
+        # Tenta periodicamente para não ficar presa se a consumidora desistir
+        while not self._parar.is_set():
+            try:
+                self.fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def __iter__(self):
+        self._thread = threading.Thread(target=self._produzir, name="leitor-origem", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                lote = self.fila.get()
+                if lote is self._FIM:
+                    break
+                yield lote
+            if self._erro is not None:
+                raise self._erro
+        finally:
+            self.parar()
+    
+    def profundidade_fila(self):
+        """Quantidade de lotes lidos aguardando gravação"""
+        return self.fila.qsize()
+    
+    def capacidade_fila(self):
+        return self.fila.maxsize
+    
+    def parar(self):
+        """Interrompe a leitura e aguarda a thread produtora terminar"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+class ContagemDivergente(ValueError):
+    """Uma partição entregou uma quantidade de linhas diferente da contada na origem"""
+
+class LeitorParticionado:
+    """Lê as partições da origem em paralelo e entrega os lotes na ordem das partições
+    
+    Cada thread leitora abre a própria conexão (fonte.copia()) e pega a
+    próxima partição ainda não lida: conta as linhas da faixa, lê os lotes e
+    confere se a quantidade lida bate com a contagem. Quem itera sobre o
+    leitor (o único gravador do SQLite) recebe todos os lotes da partição 0,
+    depois os da 1 e assim por diante; as partições seguintes vão sendo lidas
+    enquanto isso, cada uma com uma fila limitada a `tamanho_fila` lotes. Uma
+    thread só pega outra partição quando há menos de `conexoes` partições
+    lidas esperando a gravação, então no máximo `conexoes * tamanho_fila`
+    lotes ficam em memória, qualquer que seja a quantidade de partições.
+    
+    Durante a iteração, `particao_atual` é a partição do último lote
+    entregue; ao final, `contagens` tem as linhas lidas de cada partição.
+    """
+    
+    _FIM = object()
+    
+    def __init__(self, fonte, particoes, conexoes=CONEXOES_ORIGEM, tamanho_lote=TAMANHO_LOTE, tamanho_fila=TAMANHO_FILA):
+        self.fonte = fonte
+        self.particoes = list(particoes)
+        self.conexoes = max(1, min(conexoes, len(self.particoes)))
+        self.tamanho_lote = tamanho_lote
+        self.tamanho_fila = tamanho_fila
+        self.filas = {particao.numero: queue.Queue(maxsize=tamanho_fila) for particao in self.particoes}
+        self.contagens = {}
+        self.particao_atual = None
+        self._pendentes = queue.Queue()
+        for particao in self.particoes:
+            self._pendentes.put(particao)
+        # Vagas para partições lidas e ainda não gravadas inteiras
+        self._vagas = threading.Semaphore(self.conexoes)
+        self._parar = threading.Event()
+        self._erro = None
+        self._threads = []
+    
+    def _ler(self):
+        fonte = None
+        try:
+            fonte = self.fonte.copia()
+            while self._reservar_vaga():
+                try:
+                    particao = self._pendentes.get_nowait()
+                except queue.Empty:
+                    self._vagas.release()
+                    return
+                fila = self.filas[particao.numero]
+                esperadas = fonte.contar(particao)
+                lidas = 0
+                lotes = fonte.lotes(self.tamanho_lote, particao)
+                try:
+                    while True:
+                        with metricas.medir('sync.leitura_lote'):
+                            lote = next(lotes, None)
+                        if lote is None:
+                            break
+                        lidas += len(lote)
+                        if not self._colocar(fila, lote):
+                            return
+                finally:
+                    lotes.close()
+                if lidas != esperadas:
+                    raise ContagemDivergente(
+                        f"partição {particao.numero}: {lidas} linhas lidas, {esperadas} contadas na origem"
+                    )
+                self._colocar(fila, (self._FIM, lidas))
+        except Exception as e:
+            if self._erro is None:
+                self._erro = e
+            self._parar.set()
+        finally:
+            if fonte is not None:
+                fonte.fechar()
+    
+    def _reservar_vaga(self):
+        while not self._parar.is_set():
+            if self._vagas.acquire(timeout=0.5):
+                return True
+        return False
+    
+    def _colocar(self, fila, item):
+        while not self._parar.is_set():
+            try:
+                fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _retirar(self, fila):
+        # Espera em intervalos curtos para perceber o erro de qualquer thread leitora
+        while True:
+            try:
+                return fila.get(timeout=0.5)
+            except queue.Empty:
+                if self._erro is not None:
+                    raise self._erro
+    
+    def __iter__(self):
+        for posicao in range(self.conexoes):
+            thread = threading.Thread(target=self._ler, name=f"leitor-origem-{posicao}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        try:
+            for particao in self.particoes:
+                fila = self.filas[particao.numero]
+                self.particao_atual = particao
+                while True:
+                    item = self._retirar(fila)
+                    if isinstance(item, tuple) and item[0] is self._FIM:
+                        self.contagens[particao.numero] = item[1]
+                        self._vagas.release()
+                        break
+                    yield item
+        finally:
+            self.parar()
+    
+    def profundidade_fila(self):
+        """Quantidade de lotes lidos aguardando gravação (somando as partições)"""
+        return sum(fila.qsize() for fila in self.filas.values())
+    
+    def capacidade_fila(self):
+        return self.conexoes * self.tamanho_fila
+    
+    def parar(self):
+        """Interrompe a leitura e aguarda as threads leitoras terminarem"""
+        self._parar.set()
+        for thread in self._threads:
+            thread.join()
+
+def particao_do_lote(leitor):
+    """Número da partição do último lote entregue (None se a leitura não for por partições)"""
+    if leitor is None or leitor.particao_atual is None:
+        return None
+    return leitor.particao_atual.numero
+
+def conexoes_leitura():
+    """Conexões usadas para ler uma lista de partições já definida"""
+    return CONEXOES_ORIGEM if PARTICOES_ORIGEM > 1 else 1
+
+def criar_leitor(fonte, tamanho_lote=TAMANHO_LOTE, particoes=None, conexoes=None):
+    """Leitor em segundo plano da fonte: particionado quando configurado e aceito pela fonte"""
+    particoes = PARTICOES_ORIGEM if particoes is None else particoes
+    conexoes = CONEXOES_ORIGEM if conexoes is None else conexoes
+    if particoes > 1 and conexoes > 1:
+        try:
+            faixas = fonte.particoes(particoes, CHAVE_PARTICAO)
+        except NotImplementedError:
+            print("⚠ Aviso: a origem não pode ser lida por partição; usando uma única leitura")
+        else:
+            print(f"✓ Origem dividida em {len(faixas)} partições por {CHAVE_PARTICAO}, {conexoes} conexões")
+            return LeitorParticionado(fonte, faixas, conexoes, tamanho_lote)
+    return LeitorEmSegundoPlano(fonte, tamanho_lote)
 
 def truncar_tabela_sqlite(conn):
     """Trunca (limpa) a tabela no SQLite"""
     try:
         cursor = conn.cursor()
         print(f"\nLimpando tabela {SQL_TABLE} no SQLite...")
-        cursor.execute(f"DELETE FROM {SQL_TABLE}")
-        conn.commit()
+        with metricas.medir('sync.truncar'):
+            limpar_contratos(cursor)
+            cursor.execute("DELETE FROM tb_hash_contrato")
+            cursor.execute("DELETE FROM tb_busca_texto")
+            cursor.execute("DELETE FROM tb_busca_grade")
+            conn.commit()
         print("✓ Tabela truncada com sucesso!")
         return True
     except sqlite3.Error as e:
         print(f"✗ Erro ao truncar tabela: {e}")
         return False
 
-def inserir_dados_sqlite(conn, colunas, dados):
-    """Insere os dados no SQLite"""
+def sincronizar_completo(fonte, conn_sqlite, tamanho_lote=TAMANHO_LOTE, particoes=None):
+    """Trunca e recarrega a tabela, gravando um ponto de retomada a cada lote
+    
+    A origem é lida por partições, em ordem da chave, e o avanço de cada
+    partição é gravado na mesma transação das linhas do lote. Se a carga
+    anterior foi interrompida (queda da VPN, por exemplo) e o identificador da
+    origem não mudou, a tabela não é truncada: a carga continua do último
+    ponto gravado. Fontes sem identificador (CSV) são carregadas do zero, sem
+    pontos de retomada. `particoes` são as faixas de uma carga nova (as da
+    impressão da origem); sem elas, a origem é dividida aqui.
+    
+    Retorna o total de registros da tabela, ou None em caso de erro.
+    """
+    print(f"\nBuscando dados de [{SQL_TABLE}]...")
+    colunas = fonte.colunas()
+    print(f"✓ {len(colunas)} colunas")
+    try:
+        identificador = fonte.identificador() if CHAVE_PARTICAO in colunas else None
+    except NotImplementedError:
+        identificador = None
+    
+    execucao = execucao_pendente(conn_sqlite)
+    if execucao is not None and (execucao['identificador_origem'], execucao['colunas']) != (identificador, ','.join(colunas)):
+        print("⚠ Aviso: a origem mudou desde a carga interrompida; recomeçando do zero")
+        descartar_execucao(conn_sqlite, execucao['id'])
+        conn_sqlite.commit()
+        execucao = None
+    
+    conexoes = conexoes_leitura()
+    convertido = False
+    if execucao is not None:
+        particoes, gravados = preparar_retomada(conn_sqlite, execucao['id'], CHAVE_PARTICAO)
+        print(f"✓ Retomando a carga interrompida: {gravados} registros já gravados, {len(particoes)} partições a ler")
+        leitor = LeitorParticionado(fonte, particoes, conexoes, tamanho_lote)
+        lotes = iter(leitor)
+        primeiro_lote = None
+    else:
+        if identificador is None:
+            leitor = criar_leitor(fonte, tamanho_lote)
+        else:
+            if particoes is None:
+                particoes = fonte.particoes(PARTICOES_ORIGEM, CHAVE_PARTICAO) if PARTICOES_ORIGEM > 1 else tabela_inteira()
+            print(f"✓ Origem dividida em {len(particoes)} partições por {CHAVE_PARTICAO}, {conexoes} conexões")
+            leitor = LeitorParticionado(fonte, particoes, conexoes, tamanho_lote)
+        lotes = iter(leitor)
+        
+        # Só limpa a tabela depois que a origem entregar o primeiro lote
+        primeiro_lote = next(lotes, None)
+        if primeiro_lote is None:
+            print("✗ Nenhum registro retornado pela origem; tabela local mantida.")
+            leitor.parar()
+            return None
+        
+        # Bancos ainda no layout antigo passam ao compacto nesta carga, que
+        # regrava todas as linhas de qualquer forma
+        convertido = LAYOUT_COMPACTO and not layout_compacto(conn_sqlite)
+        if convertido:
+            print("Convertendo o banco para o layout compacto...")
+            converter_para_layout_compacto(conn_sqlite.cursor())
+        
+        # A execução nova é registrada na mesma transação que limpa a tabela
+        criar_indices(conn_sqlite.cursor())
+        if identificador is not None:
+            execucao = {'id': iniciar_execucao(conn_sqlite, 'completo', identificador, colunas, particoes)}
+        if not truncar_tabela_sqlite(conn_sqlite):
+            leitor.parar()
+            return None
+    
+    ponto = None
+    if execucao is not None:
+        ponto = PontoRetomada(conn_sqlite, execucao['id'], leitor, colunas.index(CHAVE_PARTICAO))
+    try:
+        if primeiro_lote is not None:
+            lotes = itertools.chain([primeiro_lote], lotes)
+        total = inserir_dados_sqlite(conn_sqlite, colunas, lotes, leitor, ponto_retomada=ponto)
+        if total is None:
+            return None
+        if ponto is not None:
+            total = ponto.concluir(conn_sqlite.cursor())
+            conn_sqlite.commit()
+    except Exception:
+        if ponto is not None:
+            print("⚠ Carga interrompida: a próxima execução continua do último lote gravado")
+        raise
+    finally:
+        # Interrompe a leitura antes que a conexão usada por ela seja fechada
+        leitor.parar()
+    
+    print("Atualizando índices de busca...")
+    with metricas.medir('sync.indice_texto'):
+        reconstruir_indices_busca(conn_sqlite)
+        conn_sqlite.commit()
+    if convertido:
+        # Devolve ao sistema as páginas da tabela antiga
+        print("Compactando o arquivo do banco...")
+        with metricas.medir('sync.vacuum'):
+            conn_sqlite.execute("VACUUM")
+    return total
+
+def colunas_com_chaves(colunas):
+    """Acrescenta às colunas da origem as chaves numéricas de busca do SQLite
+    
+    Retorna as colunas gravadas e uma função que completa cada linha da origem
+    com as chaves calculadas (somente dígitos de contrato, cnpj e raiz).
+    """
+    origens = [(chave, colunas.index(origem)) for chave, origem in CHAVES_NUMERICAS.items() if origem in colunas]
+    colunas_destino = list(colunas) + [chave for chave, _ in origens]
+    
+    def completar(linha):
+        return tuple(linha) + tuple(chave_numerica(linha[posicao]) for _, posicao in origens)
+    
+    return colunas_destino, completar
+
+def inserir_dados_sqlite(conn, colunas, lotes, leitor=None, commit_por_lote=True, ponto_retomada=None):
+    """Insere no SQLite os lotes de dados recebidos
+    
+    `lotes` é qualquer iterável de listas de linhas (normalmente um
+    LeitorEmSegundoPlano, que também é usado para mostrar a profundidade da fila).
+    Com commit_por_lote=False a carga inteira fica em uma única transação,
+    confirmada por quem chamou. Com um `ponto_retomada`, o avanço da carga é
+    gravado junto com cada lote.
+    Retorna o total de registros inseridos, ou None em caso de erro.
+    """
     try:
         cursor = conn.cursor()
         
         # Monta o SQL de inserção
-        placeholders = ','.join(['?' for _ in colunas])
-        colunas_str = ','.join(colunas)
-        insert_sql = f"INSERT INTO {SQL_TABLE} ({colunas_str}) VALUES ({placeholders})"
+        colunas_destino, completar = colunas_com_chaves(colunas)
+        gravador = GravadorContratos(conn, colunas_destino)
+        hash_sql = "INSERT OR REPLACE INTO tb_hash_contrato (contrato, hash_linha, particao) VALUES (?, ?, ?)"
+        posicao_contrato = colunas.index('contrato') if 'contrato' in colunas else None
         
-        print(f"\nInserindo {len(dados)} registros no SQLite...")
+        print(f"\nInserindo registros no SQLite...")
         
-        # Insere em lotes para melhor performance
-        batch_size = 1000
+        inicio = time.perf_counter()
+        ultimo_aviso = inicio
         total_inserido = 0
         
-        for i in range(0, len(dados), batch_size):
-            batch = dados[i:i + batch_size]
-            cursor.executemany(insert_sql, batch)
-            conn.commit()
+        for batch in lotes:
+            with metricas.medir('sync.inserir_lote'):
+                cursor.executemany(gravador.sql_inserir, [gravador.converter(completar(linha)) for linha in batch])
+                if posicao_contrato is not None:
+                    # Guarda o hash de cada contrato para as próximas sincronizações incrementais
+                    particao = particao_do_lote(leitor)
+                    cursor.executemany(hash_sql, [
+                        (linha[posicao_contrato], calcular_hash_linha(gravador.forma_lida(linha)), particao)
+                        for linha in batch
+                    ])
+                if ponto_retomada is not None:
+                    ponto_retomada.registrar(cursor, batch)
+                if commit_por_lote:
+                    conn.commit()
             total_inserido += len(batch)
-            print(f"  Progresso: {total_inserido}/{len(dados)} registros ({(total_inserido/len(dados)*100):.1f}%)")
+            
+            agora = time.perf_counter()
+            if agora - ultimo_aviso >= INTERVALO_PROGRESSO:
+                ultimo_aviso = agora
+                imprimir_progresso(total_inserido, agora - inicio, leitor)
         
+        imprimir_progresso(total_inserido, time.perf_counter() - inicio, leitor)
         print(f"✓ {total_inserido} registros inseridos com sucesso!")
-        return True
+        return total_inserido
     except sqlite3.Error as e:
         print(f"✗ Erro ao inserir dados: {e}")
         conn.rollback()
-        return False
+        return None
+
+def imprimir_progresso(total, segundos, leitor=None):
+    """Mostra o total processado, a vazão em registros/s e a ocupação da fila"""
+    vazao = total / segundos if segundos > 0 else 0
+    linha = f"  Progresso: {total} registros | {vazao:,.0f} reg/s"
+    if leitor is not None:
+        linha += f" | fila: {leitor.profundidade_fila()}/{leitor.capacidade_fila()} lotes"
+    print(linha)
 
-def registrar_log(conn_sqlite, total_registros):
-    """Registra o log da sincronização"""
+def carregar_hashes_sqlite(conn, colunas, particoes=None):
+    """Carrega o hash e a partição de cada contrato gravado na última carga do SQLite
+    
+    Retorna {contrato: (hash, partição)}; com `particoes` (números), só os
+    contratos dessas partições. Se a tabela de controle ainda estiver vazia
+    (banco carregado antes da sincronização incremental existir), os hashes
+    são calculados a partir das linhas da réplica e gravados na mesma transação.
+    Todos os hashes são da linha na forma em que volta do banco
+    (GravadorContratos.forma_lida): no layout compacto as datas lidas estão em
+    ISO e as da origem podem vir como DD/MM/AAAA.
+    """
+    cursor = conn.cursor()
+    sql = "SELECT contrato, hash_linha, particao FROM tb_hash_contrato"
+    if particoes is not None:
+        sql += f" WHERE particao IN ({','.join('?' for _ in particoes)})"
+    hashes = {contrato: (hash_linha, particao) for contrato, hash_linha, particao in cursor.execute(sql, particoes or ())}
+    if hashes or particoes is not None:
+        return hashes
+    
+    total = cursor.execute(f"SELECT COUNT(*) FROM {SQL_TABLE}").fetchone()[0]
+    if total == 0:
+        return hashes
+    
+    print(f"Calculando hashes de {total} registros da réplica (primeira execução incremental)...")
+    posicao_contrato = colunas.index('contrato')
+    gravador = GravadorContratos(conn, colunas)
+    leitura = conn.execute(f"SELECT {','.join(colunas)} FROM {SQL_TABLE}")
+    for linha in leitura:
+        hashes[linha[posicao_contrato]] = (calcular_hash_linha(gravador.forma_lida(linha)), None)
+    cursor.executemany(
+        "INSERT OR REPLACE INTO tb_hash_contrato (contrato, hash_linha) VALUES (?, ?)",
+        ((contrato, hash_linha) for contrato, (hash_linha, _) in hashes.items()),
+    )
+    return hashes
+
+def hashes_por_particao(conn):
+    """Indica se todos os contratos da tabela de controle têm a partição de origem gravada"""
+    return conn.execute('''
+        SELECT EXISTS (SELECT 1 FROM tb_hash_contrato)
+           AND NOT EXISTS (SELECT 1 FROM tb_hash_contrato WHERE particao IS NULL)
+    ''').fetchone()[0] == 1
+
+def sincronizar_incremental(fonte, conn_sqlite, tamanho_lote=TAMANHO_LOTE, particoes=None, alteradas=None):
+    """Aplica no SQLite apenas as diferenças em relação à fonte
+    
+    Compara a fonte e a réplica pelo `contrato` e pelo hash do conteúdo de cada
+    linha: contratos novos são inseridos, os alterados são atualizados e os que
+    sumiram da fonte são removidos. Tudo é aplicado em uma única transação, então
+    quem estiver consultando nunca vê a tabela pela metade.
+    
+    Com `particoes` (as faixas da impressão da origem) a fonte é lida por
+    partição e cada contrato guarda a partição de onde veio. Com `alteradas`
+    (números das partições cuja impressão mudou), só essas partições são lidas
+    e comparadas; os contratos das demais ficam como estão.
+    
+    Retorna a tupla (inseridos, atualizados, removidos), ou None em caso de erro.
+    """
     try:
+        colunas = fonte.colunas()
+        if 'contrato' not in colunas:
+            print("✗ Erro: a fonte não possui a coluna 'contrato'.")
+            return None
+        posicao_contrato = colunas.index('contrato')
+        
         cursor = conn_sqlite.cursor()
-        cursor.execute('''
-            INSERT INTO log_importacoes (arquivo, registros_inseridos, registros_atualizados)
-            VALUES (?, ?, ?)
-        ''', (f'SQL Server - {SQL_TABLE}', total_registros, 0))
-        conn_sqlite.commit()
+        pendente = execucao_pendente(conn_sqlite)
+        if pendente is not None:
+            # A comparação completa a tabela; os pontos da carga interrompida deixam de valer
+            print("⚠ Aviso: carga completa interrompida encontrada; a sincronização incremental vai completar a tabela")
+            descartar_execucao(conn_sqlite, pendente['id'])
+        hashes = carregar_hashes_sqlite(conn_sqlite, colunas, alteradas)
+        if alteradas is not None:
+            particoes = [particao for particao in particoes if particao.numero in alteradas]
+            print(f"\nLendo {len(particoes)} faixas alteradas na origem...")
+        print(f"\nComparando fonte com {len(hashes)} registros da réplica...")
+        
+        colunas_destino, completar = colunas_com_chaves(colunas)
+        gravador = GravadorContratos(conn_sqlite, colunas_destino)
+        hash_sql = "INSERT OR REPLACE INTO tb_hash_contrato (contrato, hash_linha, particao) VALUES (?, ?, ?)"
+        
+        vistos = set()
+        contratos_alterados = []
+        inseridos = atualizados = lidos = 0
+        inicio = ultimo_aviso = time.perf_counter()
+        
+        if particoes is not None:
+            leitor = LeitorParticionado(fonte, particoes, conexoes_leitura(), tamanho_lote)
+        else:
+            leitor = criar_leitor(fonte, tamanho_lote)
+        for lote in leitor:
+            inicio_lote = time.perf_counter()
+            particao = particao_do_lote(leitor)
+            novos, alterados, hashes_lote = [], [], []
+            for linha in lote:
+                contrato = linha[posicao_contrato]
+                if contrato is None or contrato in vistos:
+                    raise ValueError(
+                        f"contrato nulo ou repetido na fonte ({contrato!r}); use a sincronização completa"
+                    )
+                vistos.add(contrato)
+                
+                hash_linha = calcular_hash_linha(gravador.forma_lida(linha))
+                hash_anterior, particao_anterior = hashes.pop(contrato, (None, None))
+                if hash_anterior is None:
+                    novos.append(gravador.converter(completar(linha)))
+                elif hash_anterior != hash_linha:
+                    alterados.append(gravador.converter(completar(linha)) + (contrato,))
+                else:
+                    if particao_anterior != particao:
+                        # Linha igual, só passa a ter a partição de origem gravada
+                        hashes_lote.append((contrato, hash_linha, particao))
+                    continue
+                hashes_lote.append((contrato, hash_linha, particao))
+                contratos_alterados.append(contrato)
+            
+            cursor.executemany(gravador.sql_inserir, novos)
+            cursor.executemany(gravador.sql_atualizar, alterados)
+            cursor.executemany(hash_sql, hashes_lote)
+            metricas.registrar('sync.comparar_lote', time.perf_counter() - inicio_lote)
+            inseridos += len(novos)
+            atualizados += len(alterados)
+            lidos += len(lote)
+            
+            agora = time.perf_counter()
+            if agora - ultimo_aviso >= INTERVALO_PROGRESSO:
+                ultimo_aviso = agora
+                imprimir_progresso(lidos, agora - inicio, leitor)
+                print(f"    {inseridos} novos | {atualizados} alterados")
+        
+        # O que sobrou no dicionário não existe mais na fonte
+        removidos = [(contrato,) for contrato in hashes]
+        with metricas.medir('sync.remover'):
+            remover_indices_busca(conn_sqlite, hashes)
+            cursor.executemany(gravador.sql_remover, removidos)
+            cursor.executemany("DELETE FROM tb_hash_contrato WHERE contrato = ?", removidos)
+        
+        # Reflete na projeção e no índice de texto apenas os contratos novos e alterados
+        with metricas.medir('sync.indice_texto'):
+            atualizar_indices_busca(conn_sqlite, contratos_alterados)
+        if contratos_alterados or removidos:
+            with metricas.medir('sync.facetas'):
+                reconstruir_facetas(conn_sqlite)
+            with metricas.medir('sync.resumos'):
+                reconstruir_resumos(conn_sqlite)
+        
+        with metricas.medir('sync.commit'):
+            conn_sqlite.commit()
+        imprimir_progresso(lidos, time.perf_counter() - inicio)
+        print(f"✓ {inseridos} inseridos, {atualizados} atualizados, {len(removidos)} removidos")
+        return inseridos, atualizados, len(removidos)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"✗ Erro na sincronização incremental: {e}")
+        conn_sqlite.rollback()
+        return None
+
+def construir_snapshot(fonte, caminho, particoes=None):
+    """Carrega a fonte em um arquivo SQLite novo, com configurações de carga em massa
+    
+    Sem journal e sem fsync, em uma única transação, e com os índices criados
+    só depois da carga. Se algo falhar o arquivo é descartado, então essas
+    configurações não colocam em risco o banco que está em uso. Com
+    `particoes` (as faixas da impressão da origem), a fonte é lida por elas.
+    Retorna o total de registros carregados, ou None em caso de erro.
+    """
+    conn = sqlite3.connect(caminho)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-200000")
+        
+        cursor = conn.cursor()
+        criar_tabelas(cursor)
+        
+        if particoes is not None:
+            leitor = LeitorParticionado(fonte, particoes, conexoes_leitura())
+        else:
+            leitor = criar_leitor(fonte)
+        total = inserir_dados_sqlite(conn, fonte.colunas(), leitor, leitor, commit_por_lote=False)
+        if total is None:
+            return None
+        
+        print("Criando índices...")
+        with metricas.medir('sync.indices'):
+            criar_indices(cursor)
+        with metricas.medir('sync.indice_texto'):
+            reconstruir_indices_busca(conn)
+            conn.commit()
+        with metricas.medir('sync.analyze'):
+            cursor.execute("ANALYZE")
+        
+        # Volta ao journal padrão para quem for abrir o arquivo depois
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return total
+    finally:
+        conn.close()
+
+def verificar_snapshot(caminho, total_esperado, total_anterior=None):
+    """Confere a integridade e a quantidade de registros de um snapshot antes de publicá-lo"""
+    conn = sqlite3.connect(caminho)
+    try:
+        resultado = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if resultado != 'ok':
+            print(f"✗ Falha na verificação de integridade: {resultado}")
+            return False
+        
+        total = conn.execute(f"SELECT COUNT(*) FROM {SQL_TABLE}").fetchone()[0]
+        if total != total_esperado:
+            print(f"✗ Contagem divergente: {total} no snapshot, {total_esperado} lidos da origem")
+            return False
+        
+        if total_anterior and total < total_anterior * LIMITE_QUEDA_REGISTROS:
+            print(f"✗ Snapshot com {total} registros contra {total_anterior} da versão atual; publicação cancelada")
+            return False
+        
+        print(f"✓ Integridade ok, {total} registros")
+        return True
+    finally:
+        conn.close()
+
+def copiar_historico_log(caminho_novo, caminho_anterior):
+    """Copia o histórico de log_importacoes da versão atual para o novo snapshot"""
+    if not os.path.exists(caminho_anterior):
+        return
+    conn = sqlite3.connect(caminho_novo)
+    try:
+        conn.execute("ATTACH DATABASE ? AS anterior", (caminho_anterior,))
+        colunas_anteriores = [linha[1] for linha in conn.execute("PRAGMA anterior.table_info(log_importacoes)")]
+        colunas = ', '.join(
+            coluna for coluna in ['id', 'arquivo', 'registros_inseridos', 'registros_atualizados',
+                                  'registros_removidos', 'impressao_origem', 'data_importacao']
+            if coluna in colunas_anteriores
+        )
+        conn.execute(f'''
+            INSERT INTO log_importacoes ({colunas})
+            SELECT {colunas}
+            FROM anterior.log_importacoes
+        ''')
+        conn.commit()
+        conn.execute("DETACH DATABASE anterior")
+    except sqlite3.Error as e:
+        print(f"⚠ Aviso: Não foi possível copiar o histórico de importações: {e}")
+    finally:
+        conn.close()
+
+def nova_versao(diretorio):
+    """Nome da próxima versão publicada (data e hora, sem repetir um snapshot existente)"""
+    versao = base = datetime.now().strftime('%Y%m%d_%H%M%S')
+    sequencia = 1
+    while os.path.exists(os.path.join(diretorio, f'{PREFIXO_SNAPSHOT}{versao}.db')):
+        sequencia += 1
+        versao = f'{base}_{sequencia}'
+    return versao
+
+def publicar_banco(caminho_local, diretorio, versao, total):
+    """Copia um banco já pronto para `diretorio` como consultor_<versao>.db e o publica
+    
+    Retorna o marcador publicado.
+    """
+    nome_arquivo = f'{PREFIXO_SNAPSHOT}{versao}.db'
+    
+    # Copia com nome temporário e renomeia: o arquivo final só aparece completo
+    caminho_final = os.path.join(diretorio, nome_arquivo)
+    print(f"Copiando snapshot para {diretorio}...")
+    with metricas.medir('sync.copiar_snapshot'):
+        shutil.copyfile(caminho_local, caminho_final + '.tmp')
+        os.replace(caminho_final + '.tmp', caminho_final)
+    
+    marcador = publicar_versao(
+        diretorio,
+        nome_arquivo,
+        versao=versao,
+        registros=total,
+        publicado_em=datetime.now().isoformat(timespec='seconds'),
+    )
+    print(f"✓ Versão {versao} publicada")
+    
+    for caminho in remover_snapshots_antigos(diretorio):
+        print(f"  Snapshot antigo removido: {os.path.basename(caminho)}")
+    return marcador
+
+def copiar_versao_publicada(diretorio):
+    """Copia o snapshot publicado para uma pasta temporária local, onde a sincronização pode gravar
+    
+    Retorna (pasta temporária, caminho da cópia); quem chamou apaga a pasta.
+    """
+    pasta_temporaria = tempfile.mkdtemp(prefix='consultor_sync_')
+    caminho = os.path.join(pasta_temporaria, SQLITE_DB)
+    print("Snapshot publicado: a sincronização grava em uma cópia, publicada depois como nova versão")
+    with metricas.medir('sync.copiar_publicado'):
+        shutil.copyfile(caminho_banco_atual(diretorio), caminho)
+    return pasta_temporaria, caminho
+
+def publicar_copia(caminho, diretorio):
+    """Publica como nova versão a cópia gravada (copiar_versao_publicada). Retorna o marcador."""
+    conn = sqlite3.connect(caminho)
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM {SQL_TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+    return publicar_banco(caminho, diretorio, nova_versao(diretorio), total)
+
+def sincronizar_snapshot(fonte, diretorio, impressao=None):
+    """Gera um snapshot completo em arquivo novo e o publica de forma atômica
+    
+    O banco em uso nunca é alterado: o snapshot é construído em uma pasta
+    temporária local, verificado, copiado para `diretorio` com o nome
+    consultor_<versao>.db e só então o marcador de versão passa a apontar
+    para ele. Leitores abertos continuam na versão anterior até a próxima
+    consulta. A `impressao` da origem, se houver, fica no log do snapshot.
+    Retorna o marcador publicado, ou None em caso de erro.
+    """
+    versao = nova_versao(diretorio)
+    pasta_temporaria = tempfile.mkdtemp(prefix='consultor_snapshot_')
+    caminho_local = os.path.join(pasta_temporaria, f'{PREFIXO_SNAPSHOT}{versao}.db')
+    
+    try:
+        print(f"\nConstruindo snapshot {os.path.basename(caminho_local)}...")
+        total = construir_snapshot(fonte, caminho_local, particoes_da_impressao(impressao) if impressao else None)
+        if total is None:
+            return None
+        
+        versao_atual = ler_versao(diretorio)
+        total_anterior = versao_atual.get('registros') if versao_atual else None
+        with metricas.medir('sync.verificar'):
+            if not verificar_snapshot(caminho_local, total, total_anterior):
+                return None
+        
+        copiar_historico_log(caminho_local, caminho_banco_atual(diretorio))
+        conn = sqlite3.connect(caminho_local)
+        registrar_log(conn, total, modo='snapshot', impressao=impressao)
+        conn.close()
+        
+        return publicar_banco(caminho_local, diretorio, versao, total)
+    except (OSError, sqlite3.Error) as e:
+        print(f"✗ Erro ao gerar snapshot: {e}")
+        return None
+    finally:
+        shutil.rmtree(pasta_temporaria, ignore_errors=True)
+
+def registrar_log(conn_sqlite, total_registros, registros_atualizados=0, registros_removidos=0, modo='completo', impressao=None):
+    """Registra o log da sincronização, com a impressão da origem lida (se houver)"""
+    try:
+        arquivo = f'SQL Server - {SQL_TABLE}'
+        if modo != 'completo':
+            arquivo += f' ({modo})'
+        with metricas.medir('sync.log'):
+            cursor = conn_sqlite.cursor()
+            cursor.execute('''
+                INSERT INTO log_importacoes (arquivo, registros_inseridos, registros_atualizados, registros_removidos, impressao_origem)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (arquivo, total_registros, registros_atualizados, registros_removidos,
+                  json.dumps(impressao) if impressao is not None else None))
+            conn_sqlite.commit()
     except sqlite3.Error as e:
         print(f"⚠ Aviso: Não foi possível registrar log: {e}")
 
-def sincronizar():
-    """Função principal de sincronização"""
+def ler_impressao_anterior(conn_sqlite):
+    """Impressão da origem gravada pela última sincronização (None se ela não gravou nenhuma)"""
+    try:
+        linha = conn_sqlite.execute(
+            "SELECT impressao_origem FROM log_importacoes ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+    except sqlite3.Error:
+        # Banco anterior à coluna impressao_origem
+        return None
+    return json.loads(linha[0]) if linha and linha[0] else None
+
+def impressao_publicada(diretorio):
+    """Impressão da origem gravada no banco publicado atualmente"""
+    caminho = caminho_banco_atual(diretorio)
+    if not os.path.exists(caminho):
+        return None
+    conn = sqlite3.connect(caminho)
+    try:
+        return ler_impressao_anterior(conn)
+    finally:
+        conn.close()
+
+def conferir_origem(fonte, anterior, particoes=None):
+    """Calcula a impressão atual da origem e as faixas alteradas desde a impressão `anterior`
+    
+    A impressão é calculada nas faixas da anterior (ou em `particoes`, ou
+    numa divisão nova da origem), em uma única consulta e sem transferir as
+    linhas. Retorna (impressão, números das faixas alteradas): as faixas
+    alteradas são None quando não há impressão anterior nas mesmas faixas, e
+    a impressão é None quando a fonte não a calcula.
+    """
+    if CHAVE_PARTICAO not in fonte.colunas():
+        return None, None
+    try:
+        if particoes is None:
+            if anterior is not None:
+                particoes = particoes_da_impressao(anterior)
+            else:
+                particoes = fonte.particoes(PARTICOES_ORIGEM if PARTICOES_ORIGEM > 1 else FAIXAS_IMPRESSAO, CHAVE_PARTICAO)
+        print("\nCalculando a impressão da origem...")
+        inicio = time.perf_counter()
+        with metricas.medir('sync.impressao'):
+            impressao = fonte.impressao(particoes)
+    except NotImplementedError:
+        return None, None
+    print(f"✓ Impressão de {len(particoes)} faixas calculada em {time.perf_counter() - inicio:.1f} s")
+    if anterior is None:
+        return impressao, None
+    alteradas = faixas_alteradas(anterior, impressao)
+    if alteradas is not None:
+        print(f"✓ {len(alteradas)} de {len(particoes)} faixas alteradas desde a última sincronização")
+    return impressao, alteradas
+
+def imprimir_sem_alteracoes():
+    print("\n" + "="*70)
+    print("  ✓ ORIGEM SEM ALTERAÇÕES DESDE A ÚLTIMA SINCRONIZAÇÃO")
     print("="*70)
-    print("  SINCRONIZAÇÃO SQL SERVER → SQLite")
+    print("Nada foi lido nem gravado.")
+    print(f"Término: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print("="*70 + "\n")
+
+def imprimir_metricas():
+    """Mostra o tempo total e os percentis de cada etapa medida"""
+    print("\nTempos por etapa:")
+    for nome, tempos in metricas.resumo().items():
+        if 'p50_ms' not in tempos:
+            continue
+        print(f"  {nome:<22} {tempos['quantidade']:>6}x | total {tempos['total_ms'] / 1000:>9.2f} s"
+              f" | p50 {tempos['p50_ms']:>9.2f} ms | p95 {tempos['p95_ms']:>9.2f} ms | máx {tempos['max_ms']:>9.2f} ms")
+
+def sincronizar(modo='completo', forcar=False):
+    """Função principal de sincronização
+    
+    modo='completo' trunca e recarrega a tabela inteira;
+    modo='incremental' aplica apenas as inserções, alterações e exclusões;
+    modo='snapshot' gera um banco novo e o publica sem interromper as consultas.
+    
+    Depois que um snapshot é publicado, o arquivo dele não é mais alterado:
+    a carga completa passa a gerar um snapshot novo e a incremental grava em
+    uma cópia, publicada como nova versão quando algo mudou.
+    
+    Antes de ler as linhas, a impressão da origem é comparada com a gravada
+    na última sincronização: sem alterações, nada é lido nem gravado (a não
+    ser com `forcar`); no modo incremental, só as faixas alteradas são lidas.
+    """
+    print("="*70)
+    print(f"  SINCRONIZAÇÃO SQL SERVER → SQLite ({modo.upper()})")
     print("="*70)
     print(f"Início: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
     
@@ -138,31 +1004,104 @@ def sincronizar():
     if not conn_sqlserver:
         return
     
-    # Conecta ao SQLite
-    conn_sqlite = conectar_sqlite()
+    fonte = FonteSqlServer(conn_sqlserver, SQL_TABLE, conectar_sqlserver)
+    publicado = ler_versao(DIRETORIO_SQLITE) is not None
+    if modo == 'completo' and publicado:
+        print("⚠ Há um snapshot publicado: a carga completa gera um snapshot novo")
+        modo = 'snapshot'
+    if modo == 'snapshot':
+        try:
+            impressao, alteradas = conferir_origem(fonte, impressao_publicada(DIRETORIO_SQLITE))
+            if alteradas == [] and not forcar:
+                imprimir_sem_alteracoes()
+                return
+            marcador = sincronizar_snapshot(fonte, DIRETORIO_SQLITE, impressao)
+            if marcador:
+                print("\n" + "="*70)
+                print("  ✓ SINCRONIZAÇÃO CONCLUÍDA COM SUCESSO!")
+                print("="*70)
+                print(f"Versão publicada: {marcador['versao']} ({marcador['registros']} registros)")
+                print(f"Término: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+                print("="*70 + "\n")
+        except Exception as e:
+            print(f"\n✗ Erro durante a sincronização: {e}")
+        finally:
+            conn_sqlserver.close()
+            print("Conexões fechadas.")
+        return
+    
+    # Conecta ao SQLite (com snapshot publicado, a uma cópia dele)
+    pasta_copia = caminho_copia = None
+    if publicado:
+        try:
+            pasta_copia, caminho_copia = copiar_versao_publicada(DIRETORIO_SQLITE)
+        except OSError as e:
+            print(f"✗ Erro ao copiar o snapshot publicado: {e}")
+            conn_sqlserver.close()
+            return
+    conn_sqlite = conectar_sqlite(caminho_copia)
     if not conn_sqlite:
         conn_sqlserver.close()
+        if pasta_copia is not None:
+            shutil.rmtree(pasta_copia, ignore_errors=True)
         return
     
     try:
-        # Busca dados do SQL Server
-        colunas, dados = buscar_dados_sqlserver(conn_sqlserver)
-        if dados is None:
+        # Garante as tabelas de controle em bancos criados por versões anteriores
+        atualizar_estrutura(conn_sqlite)
+        
+        if modo == 'incremental':
+            impressao, alteradas = conferir_origem(fonte, ler_impressao_anterior(conn_sqlite))
+            if alteradas == [] and not forcar:
+                imprimir_sem_alteracoes()
+                return
+            # Só dá para ler parte das faixas se cada contrato da réplica souber de qual faixa veio
+            if forcar or not hashes_por_particao(conn_sqlite):
+                alteradas = None
+            garantir_indices_busca(conn_sqlite)
+            resultado = sincronizar_incremental(
+                fonte, conn_sqlite,
+                particoes=particoes_da_impressao(impressao) if impressao else None,
+                alteradas=alteradas,
+            )
+            if resultado is None:
+                return
+            inseridos, atualizados, removidos = resultado
+            registrar_log(conn_sqlite, inseridos, atualizados, removidos, modo=modo, impressao=impressao)
+            if caminho_copia is not None and (inseridos or atualizados or removidos):
+                conn_sqlite.close()
+                publicar_copia(caminho_copia, DIRETORIO_SQLITE)
+            
+            print("\n" + "="*70)
+            print("  ✓ SINCRONIZAÇÃO CONCLUÍDA COM SUCESSO!")
+            print("="*70)
+            print(f"Inseridos: {inseridos} | Atualizados: {atualizados} | Removidos: {removidos}")
+            print(f"Término: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+            print("="*70 + "\n")
             return
         
-        # Trunca a tabela no SQLite
-        if not truncar_tabela_sqlite(conn_sqlite):
+        # Uma carga interrompida continua nas faixas em que começou, mesmo sem alterações na origem
+        pendente = execucao_pendente(conn_sqlite)
+        impressao, alteradas = conferir_origem(
+            fonte, ler_impressao_anterior(conn_sqlite),
+            particoes_execucao(conn_sqlite, pendente['id'], CHAVE_PARTICAO) if pendente else None,
+        )
+        if alteradas == [] and pendente is None and not forcar:
+            imprimir_sem_alteracoes()
             return
         
-        # Insere os dados no SQLite
-        if inserir_dados_sqlite(conn_sqlite, colunas, dados):
+        # Lê o SQL Server em segundo plano enquanto grava no SQLite
+        total = sincronizar_completo(
+            fonte, conn_sqlite, particoes=particoes_da_impressao(impressao) if impressao else None
+        )
+        if total is not None:
             # Registra log
-            registrar_log(conn_sqlite, len(dados))
+            registrar_log(conn_sqlite, total, impressao=impressao)
             
             print("\n" + "="*70)
             print("  ✓ SINCRONIZAÇÃO CONCLUÍDA COM SUCESSO!")
             print("="*70)
-            print(f"Total de registros sincronizados: {len(dados)}")
+            print(f"Total de registros sincronizados: {total}")
             print(f"Término: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
             print("="*70 + "\n")
     
@@ -173,19 +1112,73 @@ def sincronizar():
         # Fecha as conexões
         conn_sqlserver.close()
         conn_sqlite.close()
+        if pasta_copia is not None:
+            shutil.rmtree(pasta_copia, ignore_errors=True)
         print("Conexões fechadas.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza o SQL Server com o SQLite")
+    parser.add_argument(
+        "--modo",
+        choices=["completo", "incremental", "snapshot"],
+        default="completo",
+        help=(
+            "completo: trunca e recarrega; incremental: aplica apenas as diferenças; "
+            "snapshot: gera um banco novo e troca a versão publicada"
+        ),
+    )
+    parser.add_argument(
+        "--particoes",
+        type=int,
+        default=PARTICOES_ORIGEM,
+        metavar="N",
+        help=f"divide a origem em N faixas de {CHAVE_PARTICAO} lidas em paralelo (0: uma única leitura)",
+    )
+    parser.add_argument(
+        "--conexoes",
+        type=int,
+        default=CONEXOES_ORIGEM,
+        metavar="N",
+        help="conexões simultâneas com o SQL Server na leitura por partições",
+    )
+    parser.add_argument(
+        "--forcar",
+        action="store_true",
+        help="sincroniza mesmo se a impressão da origem não mudou desde a última sincronização",
+    )
+    parser.add_argument(
+        "--metricas",
+        metavar="ARQUIVO",
+        help="mede o tempo de cada etapa e grava os percentis neste arquivo (rotativo)",
+    )
+    args = parser.parse_args()
+    PARTICOES_ORIGEM = args.particoes
+    CONEXOES_ORIGEM = args.conexoes
+    
+    if args.metricas:
+        metricas.ativar(args.metricas, intervalo=0)
+    
     # Pergunta confirmação antes de executar
     print("\n⚠ ATENÇÃO: Este script irá:")
     print("  1. Conectar ao SQL Server (Trusted Connection)")
     print("  2. Buscar todos os dados de tb_base_contrato_consultor")
-    print("  3. TRUNCAR (limpar) a tabela no SQLite")
-    print("  4. Inserir os dados atualizados\n")
+    if args.modo == "incremental":
+        print("  3. Comparar com o SQLite por contrato e hash do conteúdo")
+        print("  4. Aplicar apenas as inserções, alterações e exclusões\n")
+    elif args.modo == "snapshot":
+        print("  3. Gerar e verificar um banco SQLite novo")
+        print("  4. Publicar a nova versão sem alterar o banco em uso\n")
+    else:
+        print("  3. TRUNCAR (limpar) a tabela no SQLite")
+        print("  4. Inserir os dados atualizados\n")
     
     #resposta = input("Deseja continuar? (S/N): ").strip().upper()
     
     #if resposta == 'S':
-    sincronizar()
+    with metricas.medir('sync.total'):
+        sincronizar(args.modo, args.forcar)
+    if args.metricas:
+        imprimir_metricas()
+        metricas.encerrar(modo=args.modo)
     #else:
     #    print("\n✗ Operação cancelada pelo usuário.\n")
\ No newline at end of file
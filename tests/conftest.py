@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import GeradorDados
+from criar_banco import criar_indices, criar_tabelas, reconstruir_indices_busca
+from fontes_dados import FonteSqlite
+from sincronizar_dados import SQL_TABLE, LeitorEmSegundoPlano, inserir_dados_sqlite
+
+# Registros gerados para os bancos de teste
+TOTAL_REGISTROS = 2000
+
+# E-mails colocados no início da origem para os casos de limite das buscas
+# por prefixo: logins que começam com outro login seguido de '_', '.', '-'
+EMAILS_LIMITE = [
+    'joao@alelo.com.br',
+    'JOAO@ALELO.COM.BR',
+    'joao_pereira@alelo.com.br',
+    'joao.silva@alelo.com.br',
+    'joao-lima@alelo.com.br',
+    'joao[1]@alelo.com.br',
+    'joaoa@alelo.com.br',
+    'joão@alelo.com.br',
+]
+
+
+def gravar_origem(caminho, total=TOTAL_REGISTROS):
+    """Origem gerada pelo benchmark, com EMAILS_LIMITE nas primeiras linhas"""
+    GeradorDados(total).gravar(caminho)
+    conn = sqlite3.connect(caminho)
+    for rowid, email in enumerate(EMAILS_LIMITE, start=1):
+        conn.execute(f"UPDATE {SQL_TABLE} SET email = ? WHERE ROWID = ?", (email, rowid))
+    conn.commit()
+    conn.close()
+
+
+def carregar_banco(caminho_fonte, caminho_destino):
+    """Carrega a origem em um banco novo, como a construção do snapshot"""
+    fonte = FonteSqlite(caminho_fonte, SQL_TABLE)
+    conn = sqlite3.connect(caminho_destino)
+    try:
+        cursor = conn.cursor()
+        criar_tabelas(cursor)
+        leitor = LeitorEmSegundoPlano(fonte)
+        inserir_dados_sqlite(conn, fonte.colunas(), leitor, leitor, commit_por_lote=False)
+        criar_indices(cursor)
+        reconstruir_indices_busca(conn)
+        conn.commit()
+        cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+        fonte.fechar()
+
+
+@pytest.fixture(scope='session')
+def caminho_origem(tmp_path_factory):
+    caminho = str(tmp_path_factory.mktemp('origem') / 'origem.db')
+    gravar_origem(caminho)
+    return caminho
+
+
+@pytest.fixture(scope='session')
+def caminho_banco(tmp_path_factory, caminho_origem):
+    caminho = str(tmp_path_factory.mktemp('banco') / 'consultor.db')
+    carregar_banco(caminho_origem, caminho)
+    return caminho
+
+
+@pytest.fixture
+def banco(caminho_banco):
+    conn = sqlite3.connect(caminho_banco)
+    yield conn
+    conn.close()
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import carteira_usuario
+from carteira_usuario import CarteiraUsuario
+from consulta_dados import buscar_pagina
+from indice_memoria import IndiceMemoria
+
+# Filtros nos limites da faixa de prefixo: '@' (sucessor 'A'), letras
+# maiúsculas, caracteres entre 'Z' e 'a', não ASCII e números
+FILTROS = [
+    'joao@', 'JOAO@', 'joao', 'JoAo', 'joao_', 'joao.', 'joao-', 'joao[', 'joaoa',
+    'joão', 'JOÃO', '@', 'Z', 'z', '[', '`', 'a', '12.345', '1000', '0001',
+]
+MODOS = ['todos', 'contrato', 'cnpj', 'raiz', 'razao_social', 'consultor', 'email']
+
+
+def _rowids_sql(conn, filtro, modo):
+    linhas, proximo = buscar_pagina(conn, filtro, modo, limite=1_000_000)
+    assert proximo is None
+    return [linha[0] for linha in linhas]
+
+
+@pytest.fixture(scope='module')
+def conn_modulo(caminho_banco):
+    conn = sqlite3.connect(caminho_banco)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope='module')
+def indice(conn_modulo):
+    return IndiceMemoria.construir(conn_modulo, versao=1)
+
+
+@pytest.fixture(scope='module')
+def carteira_inteira(conn_modulo):
+    # Carteira com todos os e-mails da base: os filtros dela devem achar as
+    # mesmas linhas que a busca na base
+    emails = [email for (email,) in conn_modulo.execute(
+        "SELECT DISTINCT email FROM tb_busca_grade WHERE email IS NOT NULL"
+    )]
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(carteira_usuario, 'identificar', lambda conn, usuario: emails)
+        carteira = CarteiraUsuario.construir(conn_modulo, 1, 'todos')
+    total = conn_modulo.execute("SELECT COUNT(*) FROM tb_busca_grade WHERE email IS NOT NULL").fetchone()[0]
+    assert len(carteira.linhas) == total
+    return carteira
+
+
+@pytest.mark.parametrize('modo', MODOS)
+@pytest.mark.parametrize('filtro', FILTROS)
+def test_indice_carteira_e_sql_concordam(banco, indice, carteira_inteira, filtro, modo):
+    esperado = _rowids_sql(banco, filtro, modo)
+    assert indice.rowids(filtro, modo).tolist() == esperado
+    assert [linha[0] for linha in carteira_inteira.encontrados(filtro, modo)] == esperado
+
+
+def test_email_exato_nao_inclui_logins_mais_longos(banco, indice):
+    esperado = _rowids_sql(banco, 'joao@', 'email')
+    assert len(esperado) == 2
+    assert indice.rowids('joao@', 'email').tolist() == esperado
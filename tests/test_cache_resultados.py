@@ -0,0 +1,79 @@
+from cache_resultados import CacheResultados, tamanho_estimado
+
+
+class VersaoContada:
+    """Versão do banco trocada pelo teste, contando quantas vezes foi lida"""
+
+    def __init__(self, versao='v1'):
+        self.versao = versao
+        self.leituras = 0
+
+    def __call__(self):
+        self.leituras += 1
+        return self.versao
+
+
+def _pagina(texto, linhas=3):
+    return [(numero, texto) for numero in range(linhas)], None
+
+
+def test_versao_nova_descarta_o_conteudo():
+    versao = VersaoContada()
+    cache = CacheResultados(versao_atual=versao)
+    cache.guardar('a', _pagina('a'), cache.versao())
+    assert cache.obter('a') == _pagina('a')
+
+    versao.versao = 'v2'
+    assert cache.obter('a') is None
+    estatisticas = cache.estatisticas()
+    assert estatisticas['cache_invalidacoes'] == 1
+    assert estatisticas['cache_itens'] == 0 and estatisticas['cache_bytes'] == 0
+
+
+def test_resultado_da_versao_anterior_nao_e_guardado():
+    versao = VersaoContada()
+    cache = CacheResultados(versao_atual=versao)
+    lida = cache.versao()
+
+    # Outra busca já viu a versão nova enquanto esta consultava a anterior
+    versao.versao = 'v2'
+    assert cache.obter('b') is None
+    cache.guardar('a', _pagina('a'), lida)
+    assert not cache.contem('a')
+
+
+def test_versao_informada_nao_e_lida_de_novo():
+    versao = VersaoContada()
+    cache = CacheResultados(versao_atual=versao)
+    assert cache.obter('a', 'v1') is None
+    cache.guardar('a', _pagina('a'), 'v1')
+    assert cache.obter('a', 'v1') == _pagina('a')
+    assert cache.contem('a', 'v1')
+    assert versao.leituras == 0
+
+    # A versão informada também invalida o conteúdo
+    assert cache.obter('a', 'v2') is None
+    assert cache.estatisticas()['cache_invalidacoes'] == 1
+
+
+def test_paginas_usadas_ha_mais_tempo_saem_primeiro():
+    tamanho = tamanho_estimado(_pagina('a')[0])
+    cache = CacheResultados(limite_bytes=tamanho * 2)
+    cache.guardar('a', _pagina('a'))
+    cache.guardar('b', _pagina('b'))
+    assert cache.obter('a') is not None
+    cache.guardar('c', _pagina('c'))
+    assert cache.contem('a') and cache.contem('c')
+    assert not cache.contem('b')
+    assert cache.estatisticas()['cache_removidos'] == 1
+
+
+def test_buscas_vazias_guardadas_conforme_configuracao():
+    cache = CacheResultados()
+    cache.guardar('vazia', ([], None))
+    assert cache.obter('vazia') == ([], None)
+    assert cache.estatisticas()['cache_acertos_vazios'] == 1
+
+    sem_vazios = CacheResultados(guardar_vazios=False)
+    sem_vazios.guardar('vazia', ([], None))
+    assert not sem_vazios.contem('vazia')
@@ -0,0 +1,81 @@
+import pytest
+
+from carteira_usuario import CarteiraUsuario, identificar
+from consulta_dados import buscar_pagina
+from exportacao import exportar_busca
+
+
+class EscritorLista:
+    def __init__(self):
+        self.linhas = []
+
+    def escrever_linhas(self, linhas):
+        self.linhas.extend(linhas)
+
+
+def _maior_carteira(conn):
+    email, = conn.execute('''
+        SELECT email FROM tb_busca_grade GROUP BY email ORDER BY COUNT(*) DESC LIMIT 1
+    ''').fetchone()
+    return email.split('@')[0]
+
+
+def _todas_as_paginas(buscar, limite):
+    linhas, apos = [], None
+    while True:
+        pagina, apos = buscar(apos, limite)
+        linhas += pagina
+        if apos is None:
+            return linhas
+
+
+@pytest.mark.parametrize('usuario, esperado', [
+    ('joao', ['JOAO@ALELO.COM.BR', 'joao@alelo.com.br']),
+    ('JOAO', ['JOAO@ALELO.COM.BR', 'joao@alelo.com.br']),
+    ('joao_pereira', ['joao_pereira@alelo.com.br']),
+    ('joao.silva', ['joao.silva@alelo.com.br']),
+    ('joao-lima', ['joao-lima@alelo.com.br']),
+    ('joão', ['joão@alelo.com.br']),
+    ('joa', []),
+])
+def test_identificar_compara_o_login_inteiro(banco, usuario, esperado):
+    assert sorted(identificar(banco, usuario)) == esperado
+
+
+@pytest.mark.parametrize('filtro, campo', [('', 'todos'), ('a', 'razao_social'), ('1', 'todos'), ('alelo', 'contem')])
+@pytest.mark.parametrize('limite', [7, 100, None])
+def test_carteira_primeiro_continua_pela_base(banco, filtro, campo, limite):
+    carteira = CarteiraUsuario.construir(banco, 1, _maior_carteira(banco))
+    da_carteira = carteira.encontrados(filtro, campo)
+    assert da_carteira
+    # None: a carteira enche exatamente a primeira página
+    limite = limite or len(da_carteira)
+
+    grade = _todas_as_paginas(
+        lambda apos, limite: carteira.buscar_pagina(banco, filtro, campo, apos, limite), limite
+    )
+    ids = {linha[0] for linha in da_carteira}
+    base = [linha for linha in buscar_pagina(banco, filtro, campo, limite=1_000_000)[0] if linha[0] not in ids]
+    assert grade == da_carteira + base
+
+    # A exportação traz as mesmas linhas, na mesma ordem
+    escritor = EscritorLista()
+    gravados, cancelada = exportar_busca(banco, filtro, campo, escritor, primeiras=da_carteira)
+    assert (gravados, cancelada) == (len(grade), False)
+    assert [tuple(linha) for linha in escritor.linhas[1:]] == grade
+
+
+def test_carteira_primeiro_com_facetas(banco):
+    carteira = CarteiraUsuario.construir(banco, 1, _maior_carteira(banco))
+    permitido = lambda rowid: rowid % 2 == 0
+    grade = _todas_as_paginas(lambda apos, limite: carteira.buscar_pagina(banco, '', 'todos', apos, limite, permitido), 7)
+    da_carteira = [linha for linha in carteira.linhas if permitido(linha[0])]
+    assert grade[:len(da_carteira)] == da_carteira
+    assert all(permitido(linha[0]) for linha in grade)
+    assert len({linha[0] for linha in grade}) == len(grade)
+
+
+def test_sem_nada_na_carteira_segue_o_caminho_normal(banco):
+    carteira = CarteiraUsuario.construir(banco, 1, 'joao')
+    assert carteira.buscar_pagina(banco, 'zzzz', 'razao_social') is None
+    assert carteira.buscar_pagina(banco, '', 'todos', apos=150) is None
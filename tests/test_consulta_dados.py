@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from consulta_dados import buscar_pagina, faixa_prefixo, verificar_planos
+from esquema_compacto import COLUNAS_DATA, TABELA_COMPACTA, TABELA_CONSULTA
+
+
+def test_faixa_prefixo_converte_so_letras_ascii():
+    assert faixa_prefixo('ABC') == ('abc', 'abd')
+    assert faixa_prefixo('JOÃO') == ('joÃo', 'joÃp')
+
+
+def test_faixa_prefixo_depois_da_arroba():
+    # O sucessor de '@' é 'A', que a NOCASE compara como 'a': o limite pula para '['
+    assert faixa_prefixo('joao@') == ('joao@', 'joao[')
+    assert faixa_prefixo('JOAO@') == ('joao@', 'joao[')
+
+
+def test_busca_por_email_nao_inclui_outros_logins(banco):
+    linhas, _ = buscar_pagina(banco, 'joao@', 'email')
+    assert sorted(linha[7] for linha in linhas) == ['JOAO@ALELO.COM.BR', 'joao@alelo.com.br']
+
+
+@pytest.mark.parametrize('filtro', ['abc', 'joao@', '12.345', '12345678', '12.345.678/0001-90'])
+def test_nenhum_modo_varre_a_projecao(banco, filtro):
+    assert verificar_planos(banco, filtros=(filtro,)) == []
+
+
+def test_verificar_planos_acusa_indice_faltando(banco):
+    # Numa cópia sem o índice do e-mail, as buscas nesse campo varrem a projeção
+    copia = sqlite3.connect(':memory:')
+    banco.backup(copia)
+    copia.execute("DROP INDEX idx_grade_email_nocase")
+    modos = {modo for modo, _ in verificar_planos(copia)}
+    copia.close()
+    assert 'email "abc"' in modos
+
+
+@pytest.mark.parametrize('coluna', COLUNAS_DATA)
+def test_filtro_por_periodo_usa_o_indice_da_data(banco, coluna):
+    sql = f"SELECT COUNT(*) FROM {TABELA_COMPACTA} WHERE {coluna} BETWEEN ? AND ?"
+    plano = ' '.join(linha[3] for linha in banco.execute(f"EXPLAIN QUERY PLAN {sql}", (20240101, 20241231)))
+    assert f'idx_{coluna}' in plano
+
+    # Da menor data até a mediana: a faixa de inteiros AAAAMMDD conta o mesmo
+    # que as datas ISO da view
+    inicio, fim = banco.execute(f"""
+        SELECT MIN({coluna}), (SELECT {coluna} FROM {TABELA_COMPACTA} WHERE {coluna} IS NOT NULL
+                               ORDER BY {coluna} LIMIT 1 OFFSET (SELECT COUNT({coluna}) / 2 FROM {TABELA_COMPACTA}))
+        FROM {TABELA_COMPACTA}
+    """).fetchone()
+    total = banco.execute(sql, (inicio, fim)).fetchone()[0]
+    assert total > 0
+    iso = [f'{data // 10000:04d}-{data // 100 % 100:02d}-{data % 100:02d}' for data in (inicio, fim)]
+    assert total == banco.execute(
+        f"SELECT COUNT(*) FROM {TABELA_CONSULTA} WHERE {coluna} BETWEEN ? AND ?", iso
+    ).fetchone()[0]
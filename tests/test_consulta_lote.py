@@ -0,0 +1,120 @@
+import pytest
+
+from consulta_lote import (
+    ENCONTRADO,
+    INVALIDO,
+    NAO_ENCONTRADO,
+    resolver_lote,
+    valores_de_arquivo,
+    valores_de_texto,
+)
+
+
+class EscritorLista:
+    def __init__(self):
+        self.linhas = []
+
+    def escrever_linhas(self, linhas):
+        self.linhas.extend(linhas)
+
+
+def _cnpj_repetido(conn):
+    # CNPJ com mais de um contrato e os ROWIDs dos contratos dele
+    cnpj, = conn.execute('''
+        SELECT cnpj FROM tb_busca_grade GROUP BY cnpj HAVING COUNT(*) > 1 ORDER BY cnpj LIMIT 1
+    ''').fetchone()
+    rowids = [linha[0] for linha in conn.execute("SELECT id FROM tb_busca_grade WHERE cnpj = ? ORDER BY id", (cnpj,))]
+    return cnpj, rowids
+
+
+def _resolver(conn, valores, tipo='cnpj', **opcoes):
+    escritor = EscritorLista()
+    resumo = resolver_lote(conn, valores, tipo, escritor, **opcoes)
+    return resumo, escritor.linhas[0], escritor.linhas[1:]
+
+
+def _tabela_temporaria(conn):
+    return conn.execute("SELECT name FROM temp.sqlite_master WHERE name = 'tb_consulta_lote'").fetchone()
+
+
+def test_cnpj_formatado_ou_so_digitos_encontram_os_mesmos_registros(banco):
+    cnpj, rowids = _cnpj_repetido(banco)
+    digitos = ''.join(caractere for caractere in cnpj if caractere.isdigit())
+    resumo, cabecalho, linhas = _resolver(banco, [cnpj, digitos, digitos.lstrip('0')])
+
+    assert cabecalho[:2] == ['valor_pesquisado', 'situacao']
+    assert 'id' not in cabecalho and 'cnpj_num' not in cabecalho
+    coluna_cnpj = cabecalho.index('cnpj')
+    # Cada valor gera uma linha por contrato, na ordem da lista
+    assert [linha[0] for linha in linhas] == [cnpj] * len(rowids) + [digitos] * len(rowids) + [digitos.lstrip('0')] * len(rowids)
+    assert all(linha[1] == ENCONTRADO and linha[coluna_cnpj] == cnpj for linha in linhas)
+    assert resumo == {
+        'valores': 3, 'encontrados': 3, 'nao_encontrados': 0, 'invalidos': 0,
+        'registros': 3 * len(rowids), 'cancelado': False,
+    }
+
+
+def test_valores_repetidos_respondidos_em_cada_posicao(banco):
+    contrato, = banco.execute("SELECT contrato FROM tb_busca_grade ORDER BY id LIMIT 1").fetchone()
+    resumo, _, linhas = _resolver(banco, [contrato, '1', contrato], 'contrato')
+    assert [linha[:2] for linha in linhas] == [
+        [contrato, ENCONTRADO], ['1', NAO_ENCONTRADO], [contrato, ENCONTRADO],
+    ]
+    assert (resumo['encontrados'], resumo['nao_encontrados'], resumo['registros']) == (2, 1, 2)
+
+
+def test_nao_encontrados_e_invalidos(banco):
+    valores = ['99.999.999/9999-99', 'abc', '123456789012345', '']
+    resumo, _, linhas = _resolver(banco, valores)
+    assert linhas == [
+        ['99.999.999/9999-99', NAO_ENCONTRADO], ['abc', INVALIDO], ['123456789012345', INVALIDO], ['', INVALIDO],
+    ]
+    assert (resumo['encontrados'], resumo['nao_encontrados'], resumo['invalidos']) == (0, 1, 3)
+    assert _tabela_temporaria(banco) is None
+
+
+def test_raiz_aceita_o_cnpj_completo(banco):
+    cnpj, rowids = _cnpj_repetido(banco)
+    raiz = cnpj.split('/')[0]
+    esperados = banco.execute("SELECT COUNT(*) FROM tb_busca_grade WHERE raiz_num = ?", (int(raiz.replace('.', '')),)).fetchone()[0]
+    resumo, _, _ = _resolver(banco, [cnpj, raiz], 'raiz')
+    assert esperados >= len(rowids)
+    assert (resumo['encontrados'], resumo['registros']) == (2, 2 * esperados)
+
+
+def test_cancelada_antes_do_fim(banco):
+    contratos = [linha[0] for linha in banco.execute("SELECT contrato FROM tb_busca_grade ORDER BY id LIMIT 10")]
+    chamadas = []
+
+    def cancelado():
+        chamadas.append(1)
+        return len(chamadas) > 1
+
+    resumo, _, linhas = _resolver(banco, contratos, 'contrato', cancelado=cancelado)
+    assert resumo['cancelado']
+    assert resumo['valores'] == 10 and len(linhas) == 10
+    assert _tabela_temporaria(banco) is None
+
+
+def test_progresso_chega_ao_total(banco, monkeypatch):
+    monkeypatch.setattr('consulta_lote.TAMANHO_BLOCO', 3)
+    contratos = [linha[0] for linha in banco.execute("SELECT contrato FROM tb_busca_grade ORDER BY id LIMIT 10")]
+    avisos = []
+    _resolver(banco, contratos, 'contrato', progresso=lambda feitos, total: avisos.append((feitos, total)))
+    assert avisos[-1] == (10, 10)
+
+
+def test_valores_de_texto():
+    assert valores_de_texto("1;2, 3\n\n4\t5\r\n") == ['1', '2', '3', '4', '5']
+    assert valores_de_texto(None) == []
+
+
+@pytest.mark.parametrize('conteudo, esperados', [
+    ("nome;CNPJ\nA;11.111.111/0001-11\nB;22222222000122\n", ['11.111.111/0001-11', '22222222000122']),
+    # Sem cabeçalho reconhecido: a primeira coluna, incluindo a primeira linha se ela for um número
+    ("11.111.111/0001-11\n22222222000122\n", ['11.111.111/0001-11', '22222222000122']),
+])
+def test_valores_de_arquivo_csv(tmp_path, conteudo, esperados):
+    caminho = tmp_path / 'lista.csv'
+    caminho.write_text(conteudo, encoding='utf-8')
+    assert list(valores_de_arquivo(str(caminho), 'cnpj')) == esperados
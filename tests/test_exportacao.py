@@ -0,0 +1,106 @@
+import pytest
+
+import exportacao
+import planilhas
+from consulta_dados import buscar_pagina, buscar_registros
+from exportacao import CABECALHO_GRADE, colunas_registro, exportar_busca
+
+
+class EscritorLista:
+    def __init__(self):
+        self.linhas = []
+
+    def escrever_linhas(self, linhas):
+        self.linhas.extend(linhas)
+
+
+def _grade(conn, filtro, campo):
+    linhas, apos = [], None
+    while True:
+        pagina, apos = buscar_pagina(conn, filtro, campo, apos)
+        linhas += pagina
+        if apos is None:
+            return [tuple(linha) for linha in linhas]
+
+
+def _exportar(conn, filtro='', campo='todos', **opcoes):
+    escritor = EscritorLista()
+    resultado = exportar_busca(conn, filtro, campo, escritor, **opcoes)
+    return resultado, escritor.linhas[0], [tuple(linha) for linha in escritor.linhas[1:]]
+
+
+def test_todas_as_linhas_da_busca_na_ordem_da_grade(banco):
+    grade = _grade(banco, 'M', 'razao_social')
+    (gravados, cancelada), cabecalho, linhas = _exportar(banco, 'M', 'razao_social')
+    assert cabecalho == CABECALHO_GRADE
+    assert (gravados, cancelada) == (len(grade), False)
+    assert linhas == grade
+
+
+def test_permitido_restringe_o_arquivo(banco):
+    permitido = lambda rowid: rowid % 3 == 0
+    (gravados, _), _, linhas = _exportar(banco, 'M', 'razao_social', permitido=permitido)
+    assert linhas == [linha for linha in _grade(banco, 'M', 'razao_social') if permitido(linha[0])]
+    assert gravados == len(linhas)
+
+
+def test_primeiras_antes_e_sem_repeticao(banco):
+    grade = _grade(banco, 'M', 'razao_social')
+    primeiras = grade[-3:]
+    (gravados, _), _, linhas = _exportar(banco, 'M', 'razao_social', primeiras=primeiras)
+    assert linhas == primeiras + grade[:-3]
+    assert gravados == len(grade)
+
+
+def test_primeiras_tambem_passam_pelo_permitido(banco):
+    grade = _grade(banco, 'M', 'razao_social')
+    permitido = lambda rowid: rowid % 2 == 0
+    primeiras = [linha for linha in grade if linha[0] % 2 == 0][:2] + [linha for linha in grade if linha[0] % 2][:2]
+    (gravados, _), _, linhas = _exportar(banco, 'M', 'razao_social', permitido=permitido, primeiras=primeiras)
+    aceitas = [linha for linha in primeiras if permitido(linha[0])]
+    restantes = [linha for linha in grade if permitido(linha[0]) and linha not in aceitas]
+    assert linhas == aceitas + restantes
+    assert gravados == len(linhas)
+
+
+def test_cancelada_entre_blocos(banco, monkeypatch):
+    monkeypatch.setattr(exportacao, 'TAMANHO_BLOCO', 50)
+    verificacoes = []
+
+    def cancelado():
+        verificacoes.append(1)
+        return len(verificacoes) > 2
+
+    progresso = []
+    (gravados, cancelada), _, linhas = _exportar(banco, cancelado=cancelado, progresso=progresso.append)
+    assert (gravados, cancelada) == (100, True)
+    assert len(linhas) == 100
+    assert progresso and progresso[-1] <= 100
+
+
+def test_completo_grava_todas_as_colunas(banco):
+    (gravados, _), cabecalho, linhas = _exportar(banco, '00', 'cnpj', completo=True)
+    colunas = colunas_registro(banco)
+    assert cabecalho == ['id', *colunas]
+    assert 'cnpj_num' not in cabecalho
+    registros = buscar_registros(banco, [linha[0] for linha in linhas])
+    assert gravados == len(linhas) > 0
+    assert linhas == [(rowid, *(registros[rowid][coluna] for coluna in colunas)) for rowid, *_ in linhas]
+
+
+@pytest.mark.parametrize('extensao', ['csv', 'xlsx'])
+def test_arquivo_gravado_e_lido_de_volta(banco, tmp_path, extensao):
+    if extensao == 'xlsx' and not planilhas.xlsx_disponivel():
+        pytest.skip("openpyxl não instalado")
+    caminho = str(tmp_path / f'exportacao.{extensao}')
+    escritor = planilhas.abrir_escritor(caminho)
+    try:
+        gravados, _ = exportar_busca(banco, 'joao', 'email', escritor)
+    finally:
+        escritor.fechar()
+
+    lidas = list(planilhas.ler_linhas(caminho))
+    grade = _grade(banco, 'joao', 'email')
+    assert gravados == len(grade) > 0
+    assert lidas[0] == CABECALHO_GRADE
+    assert lidas[1:] == [['' if valor is None else str(valor) for valor in linha] for linha in grade]
@@ -0,0 +1,119 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from criar_banco import COLUNAS_FACETA
+from facetas import IndiceFacetas
+
+
+@pytest.fixture
+def indice(banco):
+    return IndiceFacetas.carregar(banco, 1)
+
+
+def _mais_frequente(banco, faceta, onde='1', parametros=()):
+    return banco.execute(f'''
+        SELECT {faceta} FROM tb_base_contrato_consultor
+        WHERE {faceta} IS NOT NULL AND {onde}
+        GROUP BY {faceta} ORDER BY COUNT(*) DESC, {faceta} LIMIT 1
+    ''', parametros).fetchone()[0]
+
+
+def _condicao(selecao):
+    return ' AND '.join(f'{faceta} = ?' for faceta in selecao) or '1', tuple(selecao.values())
+
+
+def _selecao(banco):
+    # Estado mais comum e, dentro dele, o produto mais comum
+    estado = _mais_frequente(banco, 'estado')
+    return {'estado': estado, 'produto': _mais_frequente(banco, 'produto', 'estado = ?', (estado,))}
+
+
+def test_codigos_por_rowid_voltam_aos_valores_da_base(banco, indice):
+    assert set(indice.codigos) == set(COLUNAS_FACETA)
+    for faceta in COLUNAS_FACETA:
+        codigos, valores = indice.codigos[faceta], indice.valores[faceta]
+        for rowid, valor in banco.execute(f"SELECT ROWID, {faceta} FROM tb_base_contrato_consultor"):
+            assert valores.get(int(codigos[rowid])) == valor
+
+
+def test_totais_iguais_ao_group_by(banco, indice):
+    for faceta in COLUNAS_FACETA:
+        esperado = dict(banco.execute(f'''
+            SELECT {faceta}, COUNT(*) FROM tb_base_contrato_consultor
+            WHERE {faceta} IS NOT NULL GROUP BY {faceta}
+        '''))
+        opcoes = dict(indice.opcoes(faceta, {faceta: indice.totais[faceta]}))
+        assert opcoes == esperado
+
+
+def test_total_e_permitido_da_selecao(banco, indice):
+    selecao = _selecao(banco)
+    onde, parametros = _condicao(selecao)
+    esperados = [linha[0] for linha in banco.execute(
+        f"SELECT ROWID FROM tb_base_contrato_consultor WHERE {onde} ORDER BY ROWID", parametros
+    )]
+    assert 0 < indice.total(selecao) == len(esperados)
+
+    permitido = indice.permitido(selecao)
+    ultimo = banco.execute("SELECT MAX(ROWID) FROM tb_base_contrato_consultor").fetchone()[0]
+    assert [rowid for rowid in range(ultimo + 10) if permitido(rowid)] == esperados
+    assert indice.permitido({}) is None
+
+
+def test_contagens_dentro_das_outras_selecoes(banco, indice):
+    selecao = _selecao(banco)
+    contagens = indice.contagens(selecao)
+    for faceta in COLUNAS_FACETA:
+        # A faceta selecionada conta dentro das demais seleções, não da própria
+        outras = {chave: valor for chave, valor in selecao.items() if chave != faceta}
+        onde, parametros = _condicao(outras)
+        esperado = dict(banco.execute(f'''
+            SELECT {faceta}, COUNT(*) FROM tb_base_contrato_consultor
+            WHERE {faceta} IS NOT NULL AND {onde} GROUP BY {faceta}
+        ''', parametros))
+        assert dict(indice.opcoes(faceta, contagens)) == esperado
+
+
+def test_valor_ausente_nesta_versao_nao_atende_nenhuma_linha(indice):
+    selecao = {'estado': 'NÃO EXISTE'}
+    assert indice.total(selecao) == 0
+    assert not indice.permitido(selecao)(1)
+
+
+def test_paginas_da_selecao(banco, indice):
+    selecao = _selecao(banco)
+    onde, parametros = _condicao(selecao)
+
+    # Sem filtro de texto, as páginas percorrem a máscara em ordem de ROWID
+    vistos, apos = [], None
+    while True:
+        linhas, apos = indice.buscar_pagina(banco, selecao, '', 'todos', apos, limite=7)
+        vistos += [linha[0] for linha in linhas]
+        if apos is None:
+            break
+    assert vistos == [linha[0] for linha in banco.execute(
+        f"SELECT ROWID FROM tb_base_contrato_consultor WHERE {onde} ORDER BY ROWID", parametros
+    )]
+
+    # Com filtro de texto, o resultado do SQL é cortado pela seleção
+    inicial = banco.execute(
+        f"SELECT substr(razao_social, 1, 1) FROM tb_base_contrato_consultor WHERE {onde} LIMIT 1", parametros
+    ).fetchone()[0]
+    linhas, _ = indice.buscar_pagina(banco, selecao, inicial, 'razao_social', limite=1000)
+    esperados = [linha[0] for linha in banco.execute(f'''
+        SELECT ROWID FROM tb_base_contrato_consultor
+        WHERE razao_social LIKE ? || '%' AND {onde} ORDER BY ROWID
+    ''', (inicial, *parametros))]
+    assert esperados and [linha[0] for linha in linhas] == esperados
+    assert indice.buscar_pagina(banco, {}, '', 'todos') is None
+
+
+def test_banco_sem_facetas(banco):
+    copia = sqlite3.connect(':memory:')
+    banco.backup(copia)
+    copia.execute("DELETE FROM tb_faceta_codigos")
+    assert IndiceFacetas.carregar(copia, 1) is None
+    copia.close()
@@ -0,0 +1,132 @@
+import shutil
+import sqlite3
+
+import pytest
+
+import sincronizar_dados
+from fontes_dados import TAMANHO_LOTE, FonteSqlite, faixas_alteradas, particoes_da_impressao
+from sincronizar_dados import SQL_TABLE, conferir_origem, ler_impressao_anterior, sincronizar
+
+CONTRATO_ALTERADO = '10000019'
+
+
+class FonteEspia(FonteSqlite):
+    """FonteSqlite que anota as partições lidas (também pelas cópias do leitor particionado)"""
+
+    def __init__(self, caminho, tabela, lidas):
+        super().__init__(caminho, tabela)
+        self.lidas = lidas
+
+    def lotes(self, tamanho_lote=TAMANHO_LOTE, particao=None):
+        self.lidas.append(None if particao is None else particao.numero)
+        return super().lotes(tamanho_lote, particao)
+
+    def copia(self):
+        return FonteEspia(self.caminho, self.tabela, self.lidas)
+
+
+def _alterar_origem(origem, contrato=CONTRATO_ALTERADO):
+    conn = sqlite3.connect(origem)
+    conn.execute(f"UPDATE {SQL_TABLE} SET razao_social = 'ALTERADA NA ORIGEM' WHERE contrato = ?", (contrato,))
+    conn.commit()
+    conn.close()
+
+
+def _particao_do_contrato(particoes, contrato=CONTRATO_ALTERADO):
+    for particao in particoes:
+        if particao.nulos:
+            continue
+        if (particao.inicio is None or contrato > particao.inicio) and (particao.fim is None or contrato <= particao.fim):
+            return particao.numero
+    return None
+
+
+@pytest.fixture
+def origem(caminho_origem, tmp_path):
+    caminho = str(tmp_path / 'origem.db')
+    shutil.copyfile(caminho_origem, caminho)
+    return caminho
+
+
+def test_impressao_so_muda_na_faixa_alterada(origem):
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    particoes = fonte.particoes(8)
+    anterior = fonte.impressao(particoes)
+    assert faixas_alteradas(anterior, fonte.impressao(particoes)) == []
+
+    _alterar_origem(origem)
+    atual = fonte.impressao(particoes)
+    fonte.fechar()
+    assert faixas_alteradas(anterior, atual) == [_particao_do_contrato(particoes)]
+    # Só a soma de verificação muda: a quantidade de linhas da faixa é a mesma
+    assert [faixa[4] for faixa in anterior['faixas']] == [faixa[4] for faixa in atual['faixas']]
+
+
+def test_faixas_diferentes_nao_sao_comparadas(origem):
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    anterior = fonte.impressao(fonte.particoes(4))
+    atual = fonte.impressao(fonte.particoes(8))
+    fonte.fechar()
+    assert faixas_alteradas(anterior, atual) is None
+
+
+def test_conferir_origem_usa_as_faixas_da_impressao_anterior(origem):
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    anterior, alteradas = conferir_origem(fonte, None)
+    assert anterior is not None and alteradas is None
+
+    _alterar_origem(origem)
+    atual, alteradas = conferir_origem(fonte, anterior)
+    fonte.fechar()
+    assert [faixa[:4] for faixa in atual['faixas']] == [faixa[:4] for faixa in anterior['faixas']]
+    assert len(alteradas) == 1
+
+
+@pytest.fixture
+def ambiente(origem, caminho_banco, tmp_path, monkeypatch):
+    # Banco tradicional (sem snapshot) e a origem local no papel do SQL Server
+    rede = tmp_path / 'rede'
+    rede.mkdir()
+    shutil.copyfile(caminho_banco, rede / sincronizar_dados.SQLITE_DB)
+    lidas = []
+    monkeypatch.setattr(sincronizar_dados, 'DIRETORIO_SQLITE', str(rede))
+    monkeypatch.setattr(sincronizar_dados, 'conectar_sqlserver', lambda: sqlite3.connect(':memory:'))
+    monkeypatch.setattr(sincronizar_dados, 'FonteSqlServer', lambda conn, tabela, conectar: FonteEspia(origem, tabela, lidas))
+    return origem, str(rede / sincronizar_dados.SQLITE_DB), lidas
+
+
+def _impressao_gravada(banco):
+    conn = sqlite3.connect(banco)
+    try:
+        return ler_impressao_anterior(conn)
+    finally:
+        conn.close()
+
+
+def test_incremental_le_so_a_faixa_alterada(ambiente):
+    origem, banco, lidas = ambiente
+
+    # Primeira execução: sem impressão no log, todas as faixas são lidas
+    sincronizar('incremental')
+    impressao = _impressao_gravada(banco)
+    assert impressao is not None
+    assert sorted(lidas) == [faixa[0] for faixa in impressao['faixas']]
+
+    # Origem sem alterações: a impressão do log basta e nenhuma linha é lida
+    lidas.clear()
+    sincronizar('incremental')
+    assert lidas == []
+
+    # Uma linha alterada: só a faixa dela é lida e a alteração chega ao banco
+    _alterar_origem(origem)
+    sincronizar('incremental')
+    particoes = particoes_da_impressao(impressao)
+    assert lidas == [_particao_do_contrato(particoes)]
+    conn = sqlite3.connect(banco)
+    razao_social, = conn.execute(
+        "SELECT razao_social FROM tb_base_contrato_consultor WHERE contrato = ?", (CONTRATO_ALTERADO,)
+    ).fetchone()
+    total, = conn.execute("SELECT COUNT(*) FROM tb_base_contrato_consultor").fetchone()
+    conn.close()
+    assert razao_social == 'ALTERADA NA ORIGEM'
+    assert total == 2000
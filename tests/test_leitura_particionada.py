@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from fontes_dados import CHAVE_PARTICAO, FonteRedeSimulada, FonteSqlite
+from sincronizar_dados import SQL_TABLE, ContagemDivergente, LeitorEmSegundoPlano, LeitorParticionado
+
+TAMANHO_LOTE = 50
+PARTICOES = 4
+# Latência simulada por lote e por conexão nova (segundos)
+ATRASO_LOTE = 0.01
+ATRASO_CONEXAO = 0.02
+
+
+class FonteContagemErrada(FonteRedeSimulada):
+    """Origem cuja contagem da partição não bate com as linhas entregues"""
+
+    def contar(self, particao=None):
+        return super().contar(particao) + 1
+
+    def copia(self):
+        return FonteContagemErrada(self.fonte.copia(), self.atraso_lote, self.atraso_conexao)
+
+
+@pytest.fixture
+def origem(caminho_origem):
+    fonte = FonteSqlite(caminho_origem, SQL_TABLE)
+    yield fonte
+    fonte.fechar()
+
+
+def _rede(origem, **opcoes):
+    return FonteRedeSimulada(origem, atraso_lote=ATRASO_LOTE, atraso_conexao=ATRASO_CONEXAO, **opcoes)
+
+
+def _ler(leitor, depois_do_lote=None):
+    linhas = []
+    for lote in leitor:
+        linhas.extend(lote)
+        if depois_do_lote is not None:
+            depois_do_lote(leitor)
+    return linhas
+
+
+@pytest.mark.parametrize('conexoes', [1, 4])
+def test_particoes_em_ordem_com_contagens(origem, conexoes):
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+    leitor = LeitorParticionado(_rede(origem), particoes, conexoes, TAMANHO_LOTE)
+    linhas = _ler(leitor)
+
+    # Mesmas linhas da leitura única, na ordem das partições
+    esperadas = [linha for particao in particoes for lote in origem.lotes(TAMANHO_LOTE, particao) for linha in lote]
+    assert linhas == esperadas
+    assert len(linhas) == origem.contar()
+    assert leitor.contagens == {particao.numero: origem.contar(particao) for particao in particoes}
+
+
+def test_fila_limitada_com_gravacao_lenta(origem):
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+    leitor = LeitorParticionado(_rede(origem), particoes, 4, TAMANHO_LOTE, tamanho_fila=2)
+    profundidades = []
+
+    def gravar_devagar(leitor):
+        time.sleep(ATRASO_LOTE * 2)
+        profundidades.append(leitor.profundidade_fila())
+
+    assert len(_ler(leitor, gravar_devagar)) == origem.contar()
+    assert max(profundidades) <= leitor.capacidade_fila()
+
+
+def test_leitura_em_segundo_plano_limitada(origem):
+    leitor = LeitorEmSegundoPlano(_rede(origem), TAMANHO_LOTE, tamanho_fila=3)
+    profundidades = []
+
+    def gravar_devagar(leitor):
+        time.sleep(ATRASO_LOTE * 2)
+        profundidades.append(leitor.profundidade_fila())
+
+    assert len(_ler(leitor, gravar_devagar)) == origem.contar()
+    assert max(profundidades) <= leitor.capacidade_fila()
+
+
+def test_conexoes_em_paralelo_escondem_a_latencia(origem):
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+    tempos = {}
+    for conexoes in (1, 4):
+        inicio = time.perf_counter()
+        _ler(LeitorParticionado(_rede(origem), particoes, conexoes, TAMANHO_LOTE))
+        tempos[conexoes] = time.perf_counter() - inicio
+    assert tempos[4] < tempos[1] * 0.75
+
+
+def test_contagem_divergente_interrompe_a_leitura(origem):
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+    fonte = FonteContagemErrada(origem, atraso_lote=0, atraso_conexao=0)
+    with pytest.raises(ContagemDivergente):
+        _ler(LeitorParticionado(fonte, particoes, 2, TAMANHO_LOTE))
+
+
+def test_queda_da_origem_chega_a_quem_grava(origem):
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+    leitor = LeitorParticionado(_rede(origem, falhar_apos=10), particoes, 3, TAMANHO_LOTE)
+    with pytest.raises(ConnectionError):
+        _ler(leitor)
+    assert not any(thread.is_alive() for thread in leitor._threads)
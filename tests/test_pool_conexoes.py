@@ -0,0 +1,123 @@
+import threading
+
+from pool_conexoes import PoolConexoes
+
+
+class ConexaoFalsa:
+    def __init__(self, numero):
+        self.numero = numero
+        self.fechada = False
+
+
+class Banco:
+    """Abre conexões falsas e faz o papel da versão atual da cópia local"""
+
+    def __init__(self):
+        self.versao = 'v1'
+        self.abertas = []
+        self.leituras = 0
+
+    def abrir(self):
+        conn = ConexaoFalsa(len(self.abertas))
+        self.abertas.append(conn)
+        return conn
+
+    def fechar(self, conn):
+        conn.fechada = True
+
+    def versao_atual(self):
+        self.leituras += 1
+        return self.versao
+
+    def pool(self, tamanho=4):
+        return PoolConexoes(self.abrir, versao_atual=self.versao_atual, fechar=self.fechar, tamanho=tamanho)
+
+
+def test_conexao_devolvida_e_reutilizada_na_mesma_versao():
+    banco = Banco()
+    pool = banco.pool()
+    with pool.conexao() as primeira:
+        assert pool.versao_de(primeira) == 'v1'
+    with pool.conexao() as segunda:
+        assert segunda is primeira
+    estatisticas = pool.estatisticas()
+    assert (estatisticas['conexoes_abertas'], estatisticas['conexoes_reutilizadas']) == (1, 1)
+    assert estatisticas['conexoes_livres'] == 1
+
+
+def test_conexao_da_versao_anterior_descartada_na_devolucao():
+    banco = Banco()
+    pool = banco.pool()
+    with pool.conexao() as antiga:
+        banco.versao = 'v2'
+    assert antiga.fechada
+    with pool.conexao() as nova:
+        assert nova is not antiga and pool.versao_de(nova) == 'v2'
+    assert pool.estatisticas()['conexoes_descartadas'] == 1
+    assert pool.versao_de(antiga) is None
+
+
+def test_conexao_livre_da_versao_anterior_descartada_no_emprestimo():
+    banco = Banco()
+    pool = banco.pool()
+    # A busca informou a versão que leu: a conexão volta livre para o pool
+    with pool.conexao('v1') as antiga:
+        banco.versao = 'v2'
+    assert not antiga.fechada and pool.estatisticas()['conexoes_livres'] == 1
+
+    with pool.conexao() as nova:
+        assert nova is not antiga
+    assert antiga.fechada
+    assert pool.estatisticas()['conexoes_descartadas'] == 1
+
+
+def test_versao_informada_nao_e_lida_de_novo():
+    banco = Banco()
+    pool = banco.pool()
+    for _ in range(3):
+        with pool.conexao('v1') as conn:
+            assert pool.versao_de(conn) == 'v1'
+    assert banco.leituras == 0
+    assert len(banco.abertas) == 1
+
+
+def test_emprestimos_limitados_ao_tamanho_do_pool():
+    banco = Banco()
+    pool = banco.pool(tamanho=2)
+    emprestadas, liberar = [], threading.Event()
+
+    def usar():
+        with pool.conexao() as conn:
+            emprestadas.append(conn)
+            liberar.wait(5)
+
+    threads = [threading.Thread(target=usar) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    threads[0].join(0.2)
+    assert len(emprestadas) == 2
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(emprestadas) == 3
+    # A terceira reaproveita uma das duas conexões devolvidas
+    assert len(banco.abertas) == 2
+
+
+def test_banco_que_nao_abre_empresta_none():
+    pool = PoolConexoes(lambda: None)
+    with pool.conexao() as conn:
+        assert conn is None
+    with pool.conexao() as conn:
+        assert conn is None
+    assert pool.estatisticas()['conexoes_abertas'] == 0
+
+
+def test_fechar_descarta_as_conexoes_livres():
+    banco = Banco()
+    pool = banco.pool()
+    with pool.conexao() as primeira, pool.conexao() as segunda:
+        pass
+    pool.fechar()
+    assert primeira.fechada and segunda.fechada
+    assert pool.estatisticas()['conexoes_livres'] == 0
@@ -0,0 +1,87 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import sincronizar_dados
+from fontes_dados import FonteSqlite
+from replica_local import GerenciadorReplica
+from sincronizar_dados import SQL_TABLE, sincronizar, sincronizar_snapshot
+from versao_banco import caminho_banco_atual, ler_versao
+
+
+class ConexaoFalsa:
+    def close(self):
+        pass
+
+
+def _resumo_arquivo(caminho):
+    with open(caminho, 'rb') as arquivo:
+        return hashlib.blake2b(arquivo.read()).hexdigest()
+
+
+@pytest.fixture
+def ambiente(caminho_origem, tmp_path, monkeypatch):
+    # A origem local faz o papel do SQL Server e uma pasta, o da pasta compartilhada
+    origem = str(tmp_path / 'origem.db')
+    shutil.copyfile(caminho_origem, origem)
+    rede = tmp_path / 'rede'
+    rede.mkdir()
+    monkeypatch.setattr(sincronizar_dados, 'DIRETORIO_SQLITE', str(rede))
+    monkeypatch.setattr(sincronizar_dados, 'conectar_sqlserver', ConexaoFalsa)
+    monkeypatch.setattr(sincronizar_dados, 'FonteSqlServer', lambda conn, tabela, conectar: FonteSqlite(origem, tabela))
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    assert sincronizar_snapshot(fonte, str(rede)) is not None
+    fonte.fechar()
+    return origem, str(rede), str(tmp_path / 'cliente')
+
+
+def _alterar_origem(origem):
+    conn = sqlite3.connect(origem)
+    conn.execute(f"UPDATE {SQL_TABLE} SET razao_social = 'ALTERADA NA ORIGEM' WHERE ROWID = 20")
+    conn.commit()
+    conn.close()
+
+
+def _razao_social(conn):
+    return conn.execute(
+        "SELECT razao_social FROM tb_base_contrato_consultor WHERE contrato = '10000019'"
+    ).fetchone()[0]
+
+
+def test_conectar_sqlite_nao_abre_o_snapshot(ambiente):
+    assert sincronizar_dados.conectar_sqlite() is None
+
+
+@pytest.mark.parametrize('modo', ['incremental', 'completo'])
+def test_sincronizacao_depois_do_snapshot_publica_versao_nova(ambiente, modo):
+    origem, rede, cliente = ambiente
+    replica = GerenciadorReplica(rede, cliente)
+    assert replica.atualizar()
+    publicado = caminho_banco_atual(rede)
+    resumo = _resumo_arquivo(publicado)
+    versao = ler_versao(rede)['versao']
+
+    _alterar_origem(origem)
+    sincronizar(modo)
+
+    # O snapshot anterior continua como foi publicado e o marcador aponta para outro arquivo
+    assert _resumo_arquivo(publicado) == resumo
+    assert ler_versao(rede)['versao'] != versao
+    assert caminho_banco_atual(rede) != publicado
+
+    # A réplica copia a versão nova
+    assert replica.atualizar()
+    conn = replica.conectar()
+    assert _razao_social(conn) == 'ALTERADA NA ORIGEM'
+    conn.close()
+
+
+def test_incremental_sem_alteracoes_nao_publica(ambiente):
+    origem, rede, cliente = ambiente
+    versao = ler_versao(rede)['versao']
+    sincronizar('incremental')
+    assert ler_versao(rede)['versao'] == versao
+    assert not [nome for nome in os.listdir(rede) if nome.endswith('.tmp')]
@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+import replica_local
+from replica_local import GerenciadorReplica
+from versao_banco import ARQUIVO_BANCO, PREFIXO_SNAPSHOT, publicar_versao
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    # Uma pasta faz o papel do compartilhamento na rede e a outra, do disco do cliente
+    origem, local = tmp_path / 'rede', tmp_path / 'cliente'
+    origem.mkdir()
+    return str(origem), str(local)
+
+
+def _publicar(caminho_banco, origem, versao):
+    arquivo = f'{PREFIXO_SNAPSHOT}{versao}.db'
+    shutil.copyfile(caminho_banco, os.path.join(origem, arquivo))
+    conn = sqlite3.connect(os.path.join(origem, arquivo))
+    conn.execute(f"PRAGMA user_version = {len(os.listdir(origem))}")
+    conn.commit()
+    conn.close()
+    publicar_versao(origem, arquivo, versao=versao)
+
+
+def _versao_do_arquivo(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_copia_e_troca_de_versao(caminho_banco, pastas):
+    origem, local = pastas
+    replica = GerenciadorReplica(origem, local)
+    assert replica.conectar() is None
+
+    _publicar(caminho_banco, origem, 'v1')
+    assert replica.atualizar()
+    assert replica.versao_local() == 'v1'
+    conn_v1 = replica.conectar()
+    versao_v1 = _versao_do_arquivo(conn_v1)
+    total = conn_v1.execute("SELECT COUNT(*) FROM tb_busca_grade").fetchone()[0]
+    assert total > 0
+    with pytest.raises(sqlite3.OperationalError):
+        conn_v1.execute("DELETE FROM tb_busca_grade")
+
+    # Sem versão nova, nada é copiado de novo
+    copiado = os.path.getmtime(replica.caminho_banco())
+    assert not replica.atualizar()
+    assert os.path.getmtime(replica.caminho_banco()) == copiado
+
+    _publicar(caminho_banco, origem, 'v2')
+    assert replica.atualizar()
+    assert replica.versao_local() == 'v2'
+    conn_v2 = replica.conectar()
+    assert _versao_do_arquivo(conn_v2) != versao_v1
+    assert conn_v2.execute("SELECT COUNT(*) FROM tb_busca_grade").fetchone()[0] == total
+
+    # A conexão aberta na versão anterior continua lendo o arquivo dela
+    assert _versao_do_arquivo(conn_v1) == versao_v1
+    conn_v1.close()
+    conn_v2.close()
+
+    _publicar(caminho_banco, origem, 'v3')
+    assert replica.atualizar()
+    locais = sorted(nome for nome in os.listdir(local) if nome.startswith(PREFIXO_SNAPSHOT))
+    assert locais == [f'{PREFIXO_SNAPSHOT}v2.db', f'{PREFIXO_SNAPSHOT}v3.db']
+
+
+def test_marcador_lido_uma_vez_por_atualizacao(caminho_banco, pastas, monkeypatch):
+    origem, local = pastas
+    _publicar(caminho_banco, origem, 'v1')
+    leituras = []
+    ler_versao = replica_local.ler_versao
+
+    def contar_leituras(diretorio):
+        if diretorio == origem:
+            leituras.append(diretorio)
+            # A sincronização publica outra versão enquanto a cópia começa
+            if len(leituras) == 1:
+                versao = ler_versao(diretorio)
+                _publicar(caminho_banco, origem, 'v2')
+                return versao
+        return ler_versao(diretorio)
+
+    monkeypatch.setattr(replica_local, 'ler_versao', contar_leituras)
+    replica = GerenciadorReplica(origem, local)
+    assert replica.atualizar()
+    assert len(leituras) == 1
+    # O nome local e o arquivo copiado são da mesma versão
+    assert replica.versao_local() == 'v1'
+    assert os.path.basename(replica.caminho_banco()) == f'{PREFIXO_SNAPSHOT}v1.db'
+    assert replica.atualizar()
+    assert replica.versao_local() == 'v2'
+
+
+def test_banco_tradicional_sem_marcador(caminho_banco, pastas):
+    origem, local = pastas
+    shutil.copyfile(caminho_banco, os.path.join(origem, ARQUIVO_BANCO))
+    replica = GerenciadorReplica(origem, local)
+    assert replica.atualizar()
+    assert replica.versao_local() == replica.versao_origem()
+    assert not replica.atualizar()
+    conn = replica.conectar()
+    assert conn.execute("SELECT COUNT(*) FROM tb_busca_grade").fetchone()[0] > 0
+    conn.close()
+
+
+def test_snapshot_alterado_depois_de_publicado_e_copiado_de_novo(caminho_banco, pastas):
+    origem, local = pastas
+    _publicar(caminho_banco, origem, 'v1')
+    replica = GerenciadorReplica(origem, local)
+    assert replica.atualizar()
+
+    # Alguém grava no arquivo publicado sem publicar outra versão
+    publicado = os.path.join(origem, f'{PREFIXO_SNAPSHOT}v1.db')
+    conn = sqlite3.connect(publicado)
+    conn.execute("PRAGMA user_version = 99")
+    conn.commit()
+    conn.close()
+    info = os.stat(publicado)
+    os.utime(publicado, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+
+    assert replica.atualizar()
+    assert replica.versao_local() != 'v1'
+    conn = replica.conectar()
+    assert _versao_do_arquivo(conn) == 99
+    conn.close()
+    assert not replica.atualizar()
+
+
+def test_marcador_sem_identidade_do_arquivo(caminho_banco, pastas):
+    # Marcadores publicados antes da identidade do arquivo continuam valendo
+    origem, local = pastas
+    _publicar(caminho_banco, origem, 'v1')
+    caminho = os.path.join(origem, 'consultor.versao')
+    with open(caminho, encoding='utf-8') as arquivo:
+        marcador = json.load(arquivo)
+    del marcador['tamanho'], marcador['modificado_ns']
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(marcador, arquivo)
+    replica = GerenciadorReplica(origem, local)
+    assert replica.atualizar()
+    assert replica.versao_local() == 'v1'
@@ -0,0 +1,106 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from criar_banco import DIMENSOES_RESUMO, VALORES_SIM
+from fontes_dados import FonteSqlite
+from sincronizar_dados import SQL_TABLE, sincronizar_incremental
+
+INDICADORES = ('cancelamento_de_contrato_renegociacao_de_tarifas', 'interesse_em_novos_produtos_prospects')
+
+
+def _marcado(valor):
+    return valor is not None and str(valor).strip().upper() in VALORES_SIM
+
+
+def _esperado(conn):
+    """Resumos calculados à parte: GROUP BY pela dimensão e pelos indicadores, marcados conferidos em Python"""
+    esperado = {}
+    for dimensao in DIMENSOES_RESUMO:
+        por_valor = esperado[dimensao] = {}
+        for valor, cancelamento, interesse, contratos in conn.execute(f'''
+            SELECT {dimensao}, {', '.join(INDICADORES)}, COUNT(*)
+            FROM tb_base_contrato_consultor
+            GROUP BY {dimensao}, {', '.join(INDICADORES)}
+        '''):
+            chave = '' if valor is None else str(valor)
+            anterior = por_valor.get(chave, (0, 0, 0))
+            por_valor[chave] = (
+                anterior[0] + contratos,
+                anterior[1] + contratos * _marcado(cancelamento),
+                anterior[2] + contratos * _marcado(interesse),
+            )
+    return esperado
+
+
+def _gravado(conn):
+    gravado = {}
+    for dimensao, valor, *totais in conn.execute('''
+        SELECT dimensao, valor, contratos, com_cancelamento, com_interesse FROM tb_resumo_carteira
+    '''):
+        gravado.setdefault(dimensao, {})[valor] = tuple(totais)
+    return gravado
+
+
+def _conferir(conn):
+    gravado = _gravado(conn)
+    total = gravado.pop('total')
+    assert gravado == _esperado(conn)
+
+    linhas = conn.execute(f"SELECT {', '.join(INDICADORES)} FROM tb_base_contrato_consultor").fetchall()
+    assert total == {'': (
+        len(linhas),
+        sum(_marcado(linha[0]) for linha in linhas),
+        sum(_marcado(linha[1]) for linha in linhas),
+    )}
+
+
+def test_resumos_iguais_ao_group_by(banco):
+    _conferir(banco)
+
+
+def test_resumos_depois_da_sincronizacao_incremental(caminho_origem, caminho_banco, tmp_path):
+    origem, banco = str(tmp_path / 'origem.db'), str(tmp_path / 'consultor.db')
+    shutil.copyfile(caminho_origem, origem)
+    shutil.copyfile(caminho_banco, banco)
+
+    # Na origem: um estado trocado, um indicador marcado, um contrato novo e um removido
+    conn = sqlite3.connect(origem)
+    conn.execute(f"UPDATE {SQL_TABLE} SET estado = 'XX' WHERE ROWID = 30")
+    conn.execute(f'''
+        UPDATE {SQL_TABLE} SET interesse_em_novos_produtos_prospects = ' sim ',
+               cancelamento_de_contrato_renegociacao_de_tarifas = 'NAO'
+        WHERE ROWID = 31
+    ''')
+    colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_info({SQL_TABLE})")]
+    copiadas = ', '.join("'99999999'" if coluna == 'contrato' else coluna for coluna in colunas)
+    conn.execute(f"INSERT INTO {SQL_TABLE} ({', '.join(colunas)}) SELECT {copiadas} FROM {SQL_TABLE} WHERE ROWID = 32")
+    conn.execute(f"DELETE FROM {SQL_TABLE} WHERE ROWID = 33")
+    conn.commit()
+    conn.close()
+
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    conn = sqlite3.connect(banco)
+    try:
+        assert sincronizar_incremental(fonte, conn) == (1, 2, 1)
+        _conferir(conn)
+        assert _gravado(conn)['estado']['XX'][0] == 1
+    finally:
+        conn.close()
+        fonte.fechar()
+
+
+def test_painel_le_os_resumos_gravados(banco):
+    painel_carteira = pytest.importorskip('painel_carteira')
+    resumo = painel_carteira.ler_resumo(banco, limite=5)
+    gravado = _gravado(banco)
+    assert tuple(resumo['total']) == gravado['total']['']
+    for dimensao in DIMENSOES_RESUMO:
+        linhas = resumo[dimensao]
+        assert len(linhas) == min(5, len(gravado[dimensao]))
+        assert all(gravado[dimensao][valor] == tuple(totais) for valor, *totais in linhas)
+        if dimensao in painel_carteira.ORDEM_POR_VALOR:
+            assert [linha[0] for linha in linhas] == sorted(gravado[dimensao], reverse=True)[:5]
+        else:
+            assert [linha[1] for linha in linhas] == sorted((totais[0] for totais in gravado[dimensao].values()), reverse=True)[:5]
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import sincronizar_dados
+from criar_banco import criar_tabelas
+from fontes_dados import CHAVE_PARTICAO, FonteRedeSimulada, FonteSqlite
+from retomada_sincronizacao import execucao_pendente
+from sincronizar_dados import SQL_TABLE, sincronizar_completo
+
+TAMANHO_LOTE = 100
+PARTICOES = 4
+
+
+def _banco_vazio(caminho):
+    conn = sqlite3.connect(caminho)
+    criar_tabelas(conn.cursor())
+    conn.commit()
+    return conn
+
+
+def _conteudo(conn):
+    return (
+        conn.execute("SELECT * FROM tb_base_contrato_consultor ORDER BY contrato").fetchall(),
+        conn.execute("SELECT contrato, hash_linha, particao FROM tb_hash_contrato ORDER BY contrato").fetchall(),
+    )
+
+
+@pytest.fixture
+def banco_referencia(caminho_origem, tmp_path):
+    # Mesma origem carregada de uma vez, sem falhas
+    conn = _banco_vazio(str(tmp_path / 'referencia.db'))
+    fonte = FonteSqlite(caminho_origem, SQL_TABLE)
+    sincronizar_completo(fonte, conn, TAMANHO_LOTE, fonte.particoes(PARTICOES, CHAVE_PARTICAO))
+    fonte.fechar()
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize('conexoes', [1, 3])
+@pytest.mark.parametrize('falhar_apos', [3, 7, 12])
+def test_carga_interrompida_retoma_e_converge(caminho_origem, tmp_path, banco_referencia, monkeypatch,
+                                              conexoes, falhar_apos):
+    monkeypatch.setattr(sincronizar_dados, 'conexoes_leitura', lambda: conexoes)
+    conn = _banco_vazio(str(tmp_path / 'consultor.db'))
+    origem = FonteSqlite(caminho_origem, SQL_TABLE)
+    total = origem.contar()
+    particoes = origem.particoes(PARTICOES, CHAVE_PARTICAO)
+
+    # A origem cai no meio de uma partição (como numa queda da VPN)
+    fonte = FonteRedeSimulada(origem, atraso_lote=0, atraso_conexao=0, falhar_apos=falhar_apos)
+    with pytest.raises(ConnectionError):
+        sincronizar_completo(fonte, conn, TAMANHO_LOTE, particoes)
+
+    execucao = execucao_pendente(conn)
+    assert execucao is not None
+    gravados, = conn.execute(
+        "SELECT SUM(registros) FROM tb_sincronizacao_particao WHERE execucao = ?", (execucao['id'],)
+    ).fetchone()
+    # Com várias conexões, os lotes lidos antes da queda podem ser todos de
+    # partições seguintes à que estava sendo gravada
+    assert gravados < total
+    if conexoes == 1:
+        assert gravados > 0
+    assert conn.execute("SELECT COUNT(*) FROM tb_sincronizacao_particao WHERE NOT concluida").fetchone()[0] > 0
+
+    # A execução seguinte continua do último ponto gravado e chega ao mesmo banco
+    fonte = FonteSqlite(caminho_origem, SQL_TABLE)
+    assert sincronizar_completo(fonte, conn, TAMANHO_LOTE) == total
+    fonte.fechar()
+    assert execucao_pendente(conn) is None
+    assert conn.execute("SELECT id FROM tb_sincronizacao_execucao").fetchone()[0] == execucao['id']
+    assert _conteudo(conn) == _conteudo(banco_referencia)
+    conn.close()
+    origem.fechar()
@@ -0,0 +1,80 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from esquema_compacto import inteiro_gravado
+from fontes_dados import FonteSqlite
+from sincronizar_dados import SQL_TABLE, sincronizar_incremental
+
+
+@pytest.fixture
+def copias(caminho_origem, caminho_banco, tmp_path):
+    origem, banco = str(tmp_path / 'origem.db'), str(tmp_path / 'consultor.db')
+    shutil.copyfile(caminho_origem, origem)
+    shutil.copyfile(caminho_banco, banco)
+    return origem, banco
+
+
+def _incremental(origem, banco):
+    fonte = FonteSqlite(origem, SQL_TABLE)
+    conn = sqlite3.connect(banco)
+    try:
+        return sincronizar_incremental(fonte, conn)
+    finally:
+        conn.close()
+        fonte.fechar()
+
+
+def test_datas_da_origem_e_do_banco_em_formatos_diferentes(copias):
+    origem, banco = copias
+    conn = sqlite3.connect(origem)
+    data_origem, = conn.execute(f"SELECT dt_prim_fat FROM {SQL_TABLE} LIMIT 1").fetchone()
+    conn.close()
+    conn = sqlite3.connect(banco)
+    data_banco, = conn.execute("SELECT dt_prim_fat FROM tb_base_contrato_consultor LIMIT 1").fetchone()
+    conn.close()
+    # A origem entrega DD/MM/AAAA e a view do layout compacto devolve ISO
+    assert '/' in data_origem and '-' in data_banco
+
+
+def test_sem_alteracoes_nada_e_regravado(copias):
+    assert _incremental(*copias) == (0, 0, 0)
+
+
+def test_hashes_calculados_da_replica_na_primeira_execucao(copias):
+    origem, banco = copias
+    conn = sqlite3.connect(banco)
+    conn.execute("DELETE FROM tb_hash_contrato")
+    conn.commit()
+    conn.close()
+    assert _incremental(origem, banco) == (0, 0, 0)
+
+
+def test_linha_alterada_na_origem(copias):
+    origem, banco = copias
+    conn = sqlite3.connect(banco)
+    conn.execute("DELETE FROM tb_hash_contrato")
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(origem)
+    conn.execute(f"UPDATE {SQL_TABLE} SET dt_ult_fat = '01/01/2001' WHERE ROWID = 10")
+    # Zero à esquerda num número: o valor gravado é o mesmo, não conta como alteração
+    conn.execute(f"UPDATE {SQL_TABLE} SET dias_prazo_pagto = '0' || dias_prazo_pagto WHERE ROWID = 11")
+    conn.commit()
+    conn.close()
+    assert _incremental(origem, banco) == (0, 1, 0)
+    assert _incremental(origem, banco) == (0, 0, 0)
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    ('45', 45), (' 45 ', 45), ('045', 45), ('+45', 45), ('45.0', 45), ('1e2', 100),
+    ('4.5', 4.5), ('abc', 'abc'), ('', ''), ('1_000', '1_000'), ('nan', 'nan'), (None, None), (30, 30),
+])
+def test_inteiro_gravado_como_a_afinidade_integer(valor, esperado):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (?)", (valor,))
+    assert conn.execute("SELECT x FROM t").fetchone()[0] == esperado
+    conn.close()
+    assert inteiro_gravado(valor) == esperado
@@ -0,0 +1,104 @@
+import glob
+import json
+import os
+
+# Nome padrão do banco (usado enquanto nenhum snapshot foi publicado)
+ARQUIVO_BANCO = 'consultor.db'
+
+# Marcador da versão publicada: aponta para o arquivo de snapshot atual
+ARQUIVO_VERSAO = 'consultor.versao'
+
+# Prefixo dos arquivos de snapshot (consultor_<versao>.db)
+PREFIXO_SNAPSHOT = 'consultor_'
+
+
+def ler_versao(diretorio):
+    """Lê o marcador de versão do diretório (None se não houver snapshot publicado)"""
+    caminho = os.path.join(diretorio, ARQUIVO_VERSAO)
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def caminho_banco_atual(diretorio):
+    """Retorna o caminho do banco que os leitores devem abrir
+
+    Quando há um snapshot publicado, é o arquivo indicado pelo marcador de
+    versão; caso contrário, o consultor.db tradicional.
+    """
+    versao = ler_versao(diretorio)
+    if versao:
+        caminho = os.path.join(diretorio, versao['arquivo'])
+        if os.path.exists(caminho):
+            return caminho
+    return os.path.join(diretorio, ARQUIVO_BANCO)
+
+
+def identidade_arquivo(caminho):
+    """Tamanho e data de modificação do arquivo, gravados no marcador ao publicar"""
+    info = os.stat(caminho)
+    return {'tamanho': info.st_size, 'modificado_ns': info.st_mtime_ns}
+
+
+def arquivo_inalterado(diretorio, versao):
+    """Indica se o arquivo do marcador `versao` continua como foi publicado
+
+    Marcadores gravados antes desta conferência (sem a identidade do
+    arquivo) são aceitos como estão.
+    """
+    if 'tamanho' not in versao:
+        return True
+    try:
+        identidade = identidade_arquivo(os.path.join(diretorio, versao['arquivo']))
+    except OSError:
+        return False
+    return identidade == {'tamanho': versao['tamanho'], 'modificado_ns': versao.get('modificado_ns')}
+
+
+def publicar_versao(diretorio, arquivo, **informacoes):
+    """Publica `arquivo` como a versão atual do banco
+
+    O marcador é gravado em um arquivo temporário e trocado com os.replace,
+    que é atômico: quem ler o marcador vê a versão anterior ou a nova, nunca
+    um arquivo pela metade. O arquivo do snapshot em si nunca é sobrescrito,
+    o que também funciona no Windows com leitores ainda abertos. O marcador
+    guarda o tamanho e a data de modificação do arquivo, para quem copia
+    perceber se ele foi alterado depois de publicado.
+    """
+    versao = {
+        'versao': informacoes.pop('versao', arquivo),
+        'arquivo': arquivo,
+        **identidade_arquivo(os.path.join(diretorio, arquivo)),
+        **informacoes,
+    }
+    caminho = os.path.join(diretorio, ARQUIVO_VERSAO)
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as saida:
+        json.dump(versao, saida, ensure_ascii=False, indent=2)
+        saida.flush()
+        os.fsync(saida.fileno())
+    os.replace(temporario, caminho)
+    return versao
+
+
+def remover_snapshots_antigos(diretorio, manter=2):
+    """Apaga os snapshots mais antigos, mantendo os `manter` mais recentes
+
+    Arquivos ainda abertos por algum leitor (no Windows) não podem ser
+    apagados; eles são ignorados e removidos em uma próxima sincronização.
+    """
+    atual = ler_versao(diretorio)
+    arquivo_atual = atual['arquivo'] if atual else None
+    snapshots = sorted(glob.glob(os.path.join(diretorio, f'{PREFIXO_SNAPSHOT}*.db')), reverse=True)
+    removidos = []
+    for caminho in snapshots[manter:]:
+        if os.path.basename(caminho) == arquivo_atual:
+            continue
+        try:
+            os.remove(caminho)
+            removidos.append(caminho)
+        except OSError:
+            pass
+    return removidos